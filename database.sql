@@ -89,6 +89,89 @@ FOREIGN KEY (order_id) REFERENCES orders(order_id) ON DELETE CASCADE  ON UPDATE
 FOREIGN KEY (artwork_id) REFERENCES artworks(artwork_id) ON DELETE RESTRICT ON UPDATE CASCADE
 );
 
+CREATE INDEX idx_orders_orderDate ON orders (orderDate);
+
+-- Closed orders older than ORDER_ARCHIVE_MONTHS (moved by project/archive.py)
+CREATE TABLE orders_archive (
+order_id INT PRIMARY KEY,
+customer_id INT,
+orderStatus ENUM('Pending', 'Confirmed', 'Cancelled'),
+orderDate DATETIME,
+billingAddressID INT,
+deliveryAddressID INT,
+FOREIGN KEY (customer_id) REFERENCES customers(customer_id) ON DELETE RESTRICT ON UPDATE CASCADE
+);
+
+CREATE TABLE order_item_archive (
+orderItem_id INT PRIMARY KEY,
+order_id INT,
+artwork_id INT,
+quantity INT DEFAULT 1,
+rentalDuration INT,
+unitPrice DECIMAL(10,2),
+FOREIGN KEY (order_id) REFERENCES orders_archive(order_id) ON DELETE CASCADE ON UPDATE CASCADE,
+FOREIGN KEY (artwork_id) REFERENCES artworks(artwork_id) ON DELETE RESTRICT ON UPDATE CASCADE
+);
+
+CREATE INDEX idx_orders_archive_orderDate ON orders_archive (orderDate);
+
+-- Top-K similar artworks per artwork (built by project/recommend.py)
+CREATE TABLE artwork_similar (
+artwork_id INT NOT NULL,
+position INT NOT NULL,
+similar_id INT NOT NULL,
+score FLOAT NOT NULL,
+PRIMARY KEY (artwork_id, position)
+);
+
+-- Artwork ids touched by catalog writes; followed by every worker (project/catalog_changes.py)
+CREATE TABLE catalog_changes (
+change_id INT AUTO_INCREMENT PRIMARY KEY,
+artwork_id INT NOT NULL,
+changedAt DATETIME NOT NULL
+);
+
+-- Daily sales rollup per vendor/artwork (maintained by project/rollups.py)
+CREATE TABLE vendor_daily_sales (
+vendor_id INT NOT NULL,
+salesDate DATE NOT NULL,
+artwork_id INT NOT NULL,
+leases INT NOT NULL DEFAULT 0,
+itemsLeased INT NOT NULL DEFAULT 0,
+revenue DECIMAL(12,2) NOT NULL DEFAULT 0,
+PRIMARY KEY (vendor_id, salesDate, artwork_id)
+);
+
+-- Days whose rollup must be rebuilt after an order status/date/line change
+CREATE TABLE sales_rollup_dirty (
+dirty_id INT AUTO_INCREMENT PRIMARY KEY,
+salesDate DATE NOT NULL
+);
+
+CREATE TABLE rollup_state (
+rollupName VARCHAR(50) PRIMARY KEY,
+lastOrderID INT NOT NULL DEFAULT 0
+);
+
+-- Durable background job queue (project/jobs.py, worker.py)
+CREATE TABLE jobs (
+job_id INT AUTO_INCREMENT PRIMARY KEY,
+jobName VARCHAR(100) NOT NULL,
+payload TEXT NOT NULL,
+idempotencyKey VARCHAR(191) UNIQUE,
+jobStatus ENUM('Queued', 'Running', 'Done', 'Failed') NOT NULL DEFAULT 'Queued',
+attempts INT NOT NULL DEFAULT 0,
+maxAttempts INT NOT NULL DEFAULT 5,
+runAfter DATETIME NOT NULL,
+lockedBy VARCHAR(100),
+lockedAt DATETIME,
+lastError TEXT,
+createdAt DATETIME NOT NULL,
+updatedAt DATETIME NOT NULL
+);
+
+CREATE INDEX idx_jobs_ready ON jobs (jobStatus, runAfter);
+
 
 
 INSERT INTO addresses (address_id, streetNumber, streetName, city, state, postcode, country) VALUES
@@ -166,4 +249,6 @@ INSERT INTO orders (order_id, customer_id, orderStatus, orderDate, billingAddres
 VALUES (3, 1, 'Confirmed', '2025-08-15 14:30:00', 3, 3);
 
 INSERT INTO order_item (orderItem_id, order_id, artwork_id, quantity, rentalDuration, unitPrice)
-VALUES (3, 3, 13, 1, 1, 15.00);    
+VALUES (3, 3, 13, 1, 1, 15.00);
+
+INSERT INTO rollup_state (rollupName, lastOrderID) VALUES ('vendor_daily_sales', 0);
@@ -0,0 +1,49 @@
+"""
+Production server settings: `gunicorn -c gunicorn.conf.py wsgi:app`
+
+Preforked worker processes, each with a few threads. The app is imported
+once in the master and then forked (preload_app). Workers are recycled
+after max_requests requests. Every value can be overridden from the
+environment.
+
+A preloaded master keeps the code it started with, so HUP only restarts
+workers on that old code. To deploy new code without dropping requests:
+
+    kill -USR2 <master pid>    # start a new master and workers on the new code
+    kill -WINCH <old pid>      # once they serve, stop the old workers
+    kill -QUIT <old pid>       # then the old master
+
+With WEB_PRELOAD=0 each worker imports the app itself and `kill -HUP`
+reloads code, at the cost of that import per worker and no shared pages.
+"""
+import multiprocessing
+import os
+
+os.environ.setdefault('APP_ENV', 'prod')
+
+bind = os.environ.get('WEB_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('WEB_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('WEB_THREADS', 4))
+preload_app = os.environ.get('WEB_PRELOAD', '1') != '0'
+
+# Recycle workers to cap slow memory growth; jitter avoids all restarting at once
+max_requests = int(os.environ.get('WEB_MAX_REQUESTS', 2000))
+max_requests_jitter = int(os.environ.get('WEB_MAX_REQUESTS_JITTER', 200))
+
+timeout = int(os.environ.get('WEB_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('WEB_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('WEB_KEEPALIVE', 5))
+
+accesslog = os.environ.get('WEB_ACCESS_LOG', '-')
+errorlog = '-'
+
+
+def when_ready(server):
+    # Files left by the previous master's workers count as exited (project/metrics.py)
+    if not server.cfg.preload_app:
+        return   # importing the app here would pin its code for every HUP; scrapes fold them instead
+    from project import metrics
+    directory = server.app.wsgi().config.get('METRICS_DIR')
+    if directory:
+        metrics.fold_exited(directory, everyone=True)
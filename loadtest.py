@@ -0,0 +1,307 @@
+"""
+Load test: simulated users replaying weighted journeys against a running server.
+
+    python loadtest.py --url http://127.0.0.1:8888 --users 20 --duration 60
+    python loadtest.py --mix browse=5,shop=3,vendor=1,admin=1 --think 0.5
+
+Journeys:
+    browse  homepage, filtered and priced listings, search suggestions, an item, a vendor gallery
+    shop    log in as the customer, filtered listing, item, add to cart, cart, +1 quantity,
+            checkout page, place the order, log out
+    vendor  log in as the vendor, dashboard, sales chart data, own gallery, log out
+    admin   log in as the admin, orders, reports page and data, log out
+
+Every journey starts as a new visitor with its own cookie jar and sends
+the CSRF token of the page it loaded last. Redirects are not followed, so
+each step is one request; 2xx and 3xx count as success. Steps whose effect
+matters check it too: logins and the checkout must redirect as on success,
+and the cart must hold a line, otherwise the journey counts as failed. At
+the end the throughput, error rates and p50/p95/p99 latency per step are
+printed.
+
+The shop journey places real orders: point the server at a test database
+(APP_ENV=test). Logins, cart updates and searches from one address hit
+the rate limits quickly; run the server with FLASK_RATE_LIMITS_ENABLED=false
+to measure the app rather than the limiter (429s are counted separately).
+
+Standard library only.
+"""
+import argparse
+import gzip
+import random
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from http.cookiejar import CookieJar
+from typing import Dict, List, Optional, Tuple
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode, urljoin, urlsplit
+from urllib.request import HTTPCookieProcessor, HTTPRedirectHandler, Request, build_opener
+
+ITEM = re.compile(r'/item/(\d+)/')
+VENDOR = re.compile(r'/vendor/(\d+)/')
+CATEGORY = re.compile(r'category_id=(\d+)')
+CART_LINE = re.compile(r'/cart/update/(\d+)/')
+CSRF = re.compile(r'name="csrf_token"[^>]*value="([^"]+)"')
+SUGGEST_PREFIXES = ('a', 'ar', 'mo', 'la', 'sun', 'po')
+
+CHECKOUT_FORM = {
+    'firstname': 'Load', 'surname': 'Test', 'email': 'loadtest@example.com', 'phone': '0400000000',
+    'del_streetNumber': '1', 'del_streetName': 'George St', 'del_city': 'Brisbane',
+    'del_state': 'QLD', 'del_postcode': '4000', 'del_country': 'Australia',
+    'bill_streetNumber': '1', 'bill_streetName': 'George St', 'bill_city': 'Brisbane',
+    'bill_state': 'QLD', 'bill_postcode': '4000', 'bill_country': 'Australia',
+    'payment_method': 'card', 'submit': 'Place order',
+}
+
+
+class StepFailed(Exception):
+    pass
+
+
+class Stats:
+    def __init__(self):
+        self.latency: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Counter = Counter()
+        self.limited: Counter = Counter()
+        self.journeys: Counter = Counter()
+        self.failed_journeys: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, step: str, seconds: float, status: int) -> None:
+        with self._lock:
+            self.latency[step].append(seconds)
+            if status == 429:
+                self.limited[step] += 1
+            elif status == 0 or status >= 400:
+                self.errors[step] += 1
+
+    def journey(self, name: str, ok: bool) -> None:
+        with self._lock:
+            (self.journeys if ok else self.failed_journeys)[name] += 1
+
+
+class _NoRedirect(HTTPRedirectHandler):
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None   # hand the 3xx back as the step's response
+
+
+class Visitor:
+    """One browser session: cookies, the last CSRF token, and timed requests."""
+
+    def __init__(self, base: str, stats: Stats, timeout: float, think: float):
+        self.base = base
+        self.stats = stats
+        self.timeout = timeout
+        self.think = think
+        self.csrf: Optional[str] = None
+        self.location: Optional[str] = None   # Location of the last redirect
+        self._opener = build_opener(HTTPCookieProcessor(CookieJar()), _NoRedirect)
+
+    def _send(self, step: str, path: str, data: Optional[dict] = None) -> Tuple[int, str]:
+        body = None
+        if data is not None:
+            if self.csrf:
+                data = {'csrf_token': self.csrf, **data}
+            body = urlencode(data).encode()
+        req = Request(urljoin(self.base, path), data=body, headers={'Accept-Encoding': 'gzip'})
+        started = time.perf_counter()
+        try:
+            resp = self._opener.open(req, timeout=self.timeout)
+        except HTTPError as e:
+            resp = e
+        except (URLError, OSError):
+            self.stats.record(step, time.perf_counter() - started, 0)
+            raise StepFailed(step)
+        with resp:
+            status, raw = resp.status, resp.read()   # time to the last byte
+        self.location = resp.headers.get('Location')
+        self.stats.record(step, time.perf_counter() - started, status)
+        if status >= 400:
+            raise StepFailed(step)
+        if resp.headers.get('Content-Encoding') == 'gzip':
+            raw = gzip.decompress(raw)
+        html = raw.decode('utf-8', 'replace')
+        m = CSRF.search(html)
+        if m:
+            self.csrf = m.group(1)
+        if self.think:
+            time.sleep(self.think)
+        return status, html
+
+    def get(self, step: str, path: str) -> str:
+        return self._send(step, path)[1]
+
+    def post(self, step: str, path: str, data: dict) -> str:
+        return self._send(step, path, data)[1]
+
+    def login(self, role: str, account: Tuple[str, str]) -> None:
+        self.get('login_page', '/login/')
+        status, _ = self._send('login', '/login/', {
+            'username': account[0], 'password': account[1],
+            'account_type': 'vendor' if role == 'vendor' else 'customer',
+        })
+        if status != 302:
+            raise StepFailed('login')   # the form came back: wrong credentials
+
+
+def _pick(pattern, html: str, rng: random.Random) -> Optional[str]:
+    found = pattern.findall(html)
+    return rng.choice(found) if found else None
+
+
+# Journeys
+
+def browse(v: Visitor, accounts: dict, rng: random.Random) -> None:
+    html = v.get('home', '/')
+    category = _pick(CATEGORY, html, rng)
+    if category:
+        v.get('home_filtered', f'/?category_id={category}&sort=price_asc')
+    v.get('home_price', f'/?min=0&max={rng.choice((50, 100, 200))}&sort=price_desc')
+    v.get('suggest', f'/search/suggest?q={rng.choice(SUGGEST_PREFIXES)}')
+    item = _pick(ITEM, html, rng)
+    if item:
+        v.get('item', f'/item/{item}/')
+    vendor = _pick(VENDOR, html, rng)
+    if vendor:
+        v.get('vendor_gallery', f'/vendor/{vendor}/')
+
+
+def shop(v: Visitor, accounts: dict, rng: random.Random) -> None:
+    v.login('customer', accounts['customer'])
+    html = v.get('home', '/')
+    category = _pick(CATEGORY, html, rng)
+    if category:
+        html = v.get('home_filtered', f'/?category_id={category}') or html
+    item = _pick(ITEM, html, rng) or _pick(ITEM, v.get('home', '/'), rng)
+    if not item:
+        raise StepFailed('no listed items')
+    v.get('item', f'/item/{item}/')
+    v.post('cart_add', f'/cart/add/{item}/', {'quantity': 1, 'weeks': rng.choice((1, 2, 4))})
+    line = _pick(CART_LINE, v.get('cart', '/cart/'), rng)
+    if not line:
+        raise StepFailed('cart_add')   # redirected back without adding (e.g. item unavailable)
+    v.post('cart_update', f'/cart/update/{line}/', {'direction': 'increase'})
+    v.get('checkout', '/checkout/')
+    status, _ = v._send('checkout_submit', '/checkout/', CHECKOUT_FORM)
+    if status != 302 or urlsplit(v.location or '').path != '/':
+        raise StepFailed('checkout_submit')   # the form came back or bounced to the cart: no order
+    v.get('logout', '/logout/')
+
+
+def vendor(v: Visitor, accounts: dict, rng: random.Random) -> None:
+    v.login('vendor', accounts['vendor'])
+    v.get('vendor_manage', '/vendor/manage/')
+    v.get('vendor_sales', f'/vendor/manage/sales.json?grain={rng.choice(("day", "week", "month"))}')
+    v.get('vendor_self_gallery', '/vendor/self_gallery/')
+    v.get('logout', '/logout/')
+
+
+def admin(v: Visitor, accounts: dict, rng: random.Random) -> None:
+    v.login('admin', accounts['admin'])
+    v.get('manage', '/manage/')
+    v.get('reports', '/manage/reports/')
+    v.get('reports_json', '/manage/reports.json')
+    v.get('logout', '/logout/')
+
+
+JOURNEYS = {'browse': browse, 'shop': shop, 'vendor': vendor, 'admin': admin}
+
+
+def _run_user(args, accounts: dict, mix: dict, stats: Stats, deadline: float, seed: int) -> None:
+    rng = random.Random(seed)
+    names, weights = list(mix), list(mix.values())
+    while time.monotonic() < deadline:
+        name = rng.choices(names, weights)[0]
+        visitor = Visitor(args.url, stats, args.timeout, args.think)
+        try:
+            JOURNEYS[name](visitor, accounts, rng)
+        except StepFailed:
+            stats.journey(name, False)
+        else:
+            stats.journey(name, True)
+
+
+def _percentile(sorted_values: List[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def report(stats: Stats, elapsed: float) -> None:
+    total = sum(len(v) for v in stats.latency.values())
+    errors = sum(stats.errors.values())
+    print(f"\n{total} requests in {elapsed:.1f}s: {total / elapsed:.1f} req/s, "
+          f"{errors} errors ({errors / max(total, 1):.1%}), {sum(stats.limited.values())} rate limited")
+    for name in JOURNEYS:
+        ok, failed = stats.journeys[name], stats.failed_journeys[name]
+        if ok or failed:
+            print(f"  {name:<8} {ok} completed, {failed} failed, {ok / elapsed:.2f}/s")
+
+    print(f"\n{'step':<20}{'count':>8}{'err%':>8}{'429':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for step in sorted(stats.latency, key=lambda s: -len(stats.latency[s])):
+        values = sorted(stats.latency[step])
+        p = lambda q: f"{_percentile(values, q) * 1000:.1f}"
+        print(f"{step:<20}{len(values):>8}{stats.errors[step] / len(values):>8.1%}{stats.limited[step]:>6}"
+              f"{p(50):>10}{p(95):>10}{p(99):>10}")
+
+
+def _account(value: str) -> Tuple[str, str]:
+    user, _, password = value.partition(':')
+    if not user or not password:
+        raise argparse.ArgumentTypeError('expected USER:PASSWORD')
+    return user, password
+
+
+def _mix(value: str) -> dict:
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        if name not in JOURNEYS:
+            raise argparse.ArgumentTypeError(f"unknown journey '{name}' (choose from {', '.join(JOURNEYS)})")
+        mix[name] = float(weight or 1)
+    mix = {k: w for k, w in mix.items() if w > 0}
+    if not mix:
+        raise argparse.ArgumentTypeError('at least one journey needs a weight above 0')
+    return mix
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Replay weighted user journeys against a running server.')
+    parser.add_argument('--url', default='http://127.0.0.1:8888', help='server base URL')
+    parser.add_argument('--users', '-u', type=int, default=10, help='concurrent simulated users')
+    parser.add_argument('--duration', '-d', type=float, default=30, help='seconds to run')
+    parser.add_argument('--ramp', type=float, default=0, help='seconds over which users start')
+    parser.add_argument('--mix', type=_mix, default='browse=6,shop=3,vendor=1,admin=1',
+                        help='journey weights, e.g. browse=6,shop=3,vendor=1,admin=1')
+    parser.add_argument('--think', type=float, default=0, help='pause after each step, in seconds')
+    parser.add_argument('--timeout', type=float, default=30, help='per-request timeout, in seconds')
+    parser.add_argument('--seed', type=int, default=None, help='random seed, for repeatable runs')
+    # The test accounts from README.md
+    parser.add_argument('--customer', type=_account, default='dusty@example.com:123456')
+    parser.add_argument('--vendor', type=_account, default='loremipsum@project582.com:123456')
+    parser.add_argument('--admin', type=_account, default='admin1:123456')
+    args = parser.parse_args()
+
+    accounts = {'customer': args.customer, 'vendor': args.vendor, 'admin': args.admin}
+    seed = args.seed if args.seed is not None else random.randrange(1 << 30)
+    stats = Stats()
+    started = time.monotonic()
+    deadline = started + args.ramp + args.duration
+
+    threads = []
+    for i in range(max(1, args.users)):
+        delay = args.ramp * i / max(1, args.users)
+        t = threading.Timer(delay, _run_user, args=(args, accounts, args.mix, stats, deadline, seed + i))
+        t.daemon = True
+        threads.append(t)
+        t.start()
+    print(f"{len(threads)} users for {args.duration:.0f}s against {args.url} (seed {seed})")
+    try:
+        for t in threads:
+            t.join()
+    except KeyboardInterrupt:
+        print("interrupted")
+    report(stats, time.monotonic() - started)
@@ -1,27 +1,109 @@
+import time
+_PROCESS_STARTED = time.perf_counter()
+
 from flask import Flask, render_template
 from flask_bootstrap import Bootstrap5
-from flask_mysqldb import MySQL
+from .config import load_config
+from .backends import Database
+from .startup import configure_bytecode_cache, precompile_templates, track_cold_start
+
+_IMPORTS_SECONDS = time.perf_counter() - _PROCESS_STARTED
 
-mysql = MySQL()
+# MySQL or SQLite, per DB_BACKEND (project/backends.py)
+mysql = Database()
 
-def create_app():
+def create_app(profile=None):
+    created_started = time.perf_counter()
     app = Flask(__name__)
-    app.debug = True
-    app.secret_key = 'BetterSecretNeeded123'
 
-    # MySQL configurations
-    app.config['MYSQL_USER'] = 'root'
-    app.config['MYSQL_PASSWORD'] = 'mysqlroot'   # <-- change to your local password
-    app.config['MYSQL_DB'] = 'assessment3_group4'       
-    app.config['MYSQL_HOST'] = 'localhost'
-    app.config['MYSQL_CURSORCLASS'] = 'DictCursor'
+    # dev / test / prod profile from APP_ENV, plus FLASK_* overrides (see project/config.py)
+    load_config(app, profile)
+    configure_bytecode_cache(app)
 
     mysql.init_app(app)
     Bootstrap5(app)
 
+    # Rate limits and load shedding (project/limits.py)
+    from . import limits
+    limits.init_app(app)
+
+    # On-demand request profiling (project/profiling.py)
+    from . import profiling
+    profiling.init_app(app)
+
+    # Opt-in per-endpoint allocation tracking (project/memtrack.py)
+    from . import memtrack
+    memtrack.init_app(app)
+
+    # Request latency and runtime stats at /metrics (project/metrics.py)
+    from . import metrics
+    metrics.init_app(app)
+
     from . import views
     app.register_blueprint(views.bp)
 
+    # Register background job handlers (used by worker.py)
+    from . import tasks
+
+    # `flask --app project refresh-sales [--every N]` keeps vendor_daily_sales current
+    import click
+    from .rollups import refresh_vendor_daily_sales
+
+    @app.cli.command('refresh-sales')
+    @click.option('--every', type=int, default=0, help='Repeat every N seconds (0 = run once).')
+    def refresh_sales(every):
+        while True:
+            days = refresh_vendor_daily_sales()
+            click.echo(f"vendor_daily_sales: rebuilt {days} day(s)")
+            if not every:
+                break
+            time.sleep(every)
+
+    # `flask --app project archive-orders [--months N]` moves old closed orders to the archive tables
+    @app.cli.command('archive-orders')
+    @click.option('--months', type=int, default=None, help='Archive closed orders older than N months (default ORDER_ARCHIVE_MONTHS).')
+    def archive_orders(months):
+        from .archive import archive_closed_orders
+        refresh_vendor_daily_sales()
+        click.echo(f"archived {archive_closed_orders(months)} order(s)")
+
+    # `flask --app project purge-jobs [--days N]` deletes finished jobs; failed ones stay for inspection
+    @app.cli.command('purge-jobs')
+    @click.option('--days', type=int, default=30, help='Delete jobs finished more than N days ago.')
+    def purge_jobs(days):
+        from .jobs import purge_finished
+        click.echo(f"jobs: deleted {purge_finished(days)} finished job(s)")
+
+    # `flask --app project purge-catalog-changes [--hours N]` trims the log the search index follows
+    @app.cli.command('purge-catalog-changes')
+    @click.option('--hours', type=int, default=24, help='Delete changes older than N hours.')
+    def purge_catalog_changes(hours):
+        from .catalog_changes import purge_changes
+        click.echo(f"catalog_changes: deleted {purge_changes(hours)} row(s)")
+
+    # `flask --app project build-similar` (re)builds all "similar artworks" lists
+    @app.cli.command('build-similar')
+    def build_similar():
+        from .recommend import rebuild_similar
+        click.echo(f"artwork_similar: rebuilt {rebuild_similar()} artwork(s)")
+
+    # `flask --app project compile-templates` warms the bytecode cache at build time
+    @app.cli.command('compile-templates')
+    def compile_templates():
+        click.echo(f"compiled {precompile_templates(app)} template(s)")
+
+    # `flask --app project ingest-images` moves static/ images into the content-addressed store
+    @app.cli.command('ingest-images')
+    def ingest_images():
+        from .images import ingest_static_images
+        stats = ingest_static_images()
+        click.echo(f"images: {stats['files']} file(s), {stats['stored']} stored, "
+                   f"{stats['duplicates']} duplicate(s), {stats['skipped']} skipped")
+
+    # Stored images and legacy static/ paths alike (project/images.py)
+    from .images import image_url
+    app.jinja_env.globals['image_url'] = image_url
+
     #Expose delivery_cost_from_session() to Jinja templates
     from .session import delivery_cost_from_session
     app.jinja_env.globals['delivery_cost_from_session'] = delivery_cost_from_session
@@ -35,6 +117,27 @@ def create_app():
             message="Sorry, we couldn't find what you were looking for."
         ), 404
 
+    def _retry_after(e):
+        return {'Retry-After': str(e.retry_after)} if getattr(e, 'retry_after', None) else {}
+
+    @app.errorhandler(429)
+    def too_many_requests(e):
+        return render_template(
+            "error.html",
+            code=429,
+            title="Too many requests",
+            message="You're doing that too often. Please wait a moment and try again."
+        ), 429, _retry_after(e)
+
+    @app.errorhandler(503)
+    def service_unavailable(e):
+        return render_template(
+            "error.html",
+            code=503,
+            title="We're busy right now",
+            message="The site is under heavy load. Please try again in a few seconds."
+        ), 503, _retry_after(e)
+
     @app.errorhandler(500)
     def internal_error(e):
         return render_template(
@@ -44,4 +147,25 @@ def create_app():
             message="The server encountered an error. Please try again in a few minutes."
         ), 500
 
+    # gzip/brotli, streaming-aware (project/compression.py); turn off if a proxy compresses
+    if app.config.get('COMPRESS_ENABLED'):
+        from .compression import CompressionMiddleware
+        app.wsgi_app = CompressionMiddleware(
+            app.wsgi_app,
+            min_size=app.config['COMPRESS_MIN_SIZE'],
+            level=app.config['COMPRESS_LEVEL'],
+            brotli_quality=app.config['COMPRESS_BROTLI_QUALITY'],
+        )
+
+    # Server-Timing header, outermost so its total covers compression (project/server_timing.py)
+    from . import server_timing
+    server_timing.init_app(app)
+
+    if app.config.get('TEMPLATE_PRECOMPILE'):
+        started = time.perf_counter()
+        count = precompile_templates(app)
+        app.extensions.setdefault('cold_start', {})['precompile'] = round(time.perf_counter() - started, 4)
+        app.logger.info("precompiled %d templates in %.3fs", count, time.perf_counter() - started)
+
+    track_cold_start(app, _PROCESS_STARTED, _IMPORTS_SECONDS, created_started)
     return app
\ No newline at end of file
@@ -0,0 +1,114 @@
+"""
+Hot/archive split for order history.
+
+Closed orders (Confirmed or Cancelled) older than ORDER_ARCHIVE_MONTHS are
+moved, with their lines, from orders/order_item into orders_archive/
+order_item_archive. The hot tables stay small, so the admin screens and
+recent-range reports never scan old history.
+
+Queries that may need old orders take their FROM clause from
+orders_source()/order_items_source(). These include the archive only when
+the requested range starts on or before the newest archived order.
+
+MySQL native partitioning is not used: partitioned InnoDB tables cannot
+have foreign keys, and orders/order_item rely on them.
+"""
+from datetime import date, datetime
+from typing import List, Optional, Union
+
+from flask import current_app, g
+
+from . import mysql
+
+CLOSED_STATUSES = ('Confirmed', 'Cancelled')
+
+_ORDER_COLUMNS = "order_id, customer_id, orderStatus, orderDate, billingAddressID, deliveryAddressID"
+_ITEM_COLUMNS = "orderItem_id, order_id, artwork_id, quantity, rentalDuration, unitPrice"
+
+
+def archive_boundary() -> Optional[datetime]:
+    """orderDate of the newest archived order (None while the archive is empty)."""
+    if 'order_archive_boundary' not in g:
+        cur = mysql.connection.cursor()
+        cur.execute("SELECT MAX(orderDate) AS boundary FROM orders_archive")
+        row = cur.fetchone()
+        cur.close()
+        boundary = row['boundary'] if row else None
+        if isinstance(boundary, str):
+            boundary = datetime.fromisoformat(boundary)   # SQLite: MAX() of a column has no type
+        g.order_archive_boundary = boundary
+    return g.order_archive_boundary
+
+
+def _needs_archive(start: Union[date, datetime, None]) -> bool:
+    boundary = archive_boundary()
+    if boundary is None:
+        return False
+    if start is None:
+        return True
+    if not isinstance(start, datetime):
+        start = datetime.combine(start, datetime.min.time())
+    return start <= boundary
+
+
+def orders_source(start: Union[date, datetime, None] = None) -> str:
+    """`orders`, or hot + archive when orders from `start` onwards may be archived. Alias it in the query."""
+    if not _needs_archive(start):
+        return "orders"
+    return (f"(SELECT {_ORDER_COLUMNS} FROM orders"
+            f" UNION ALL SELECT {_ORDER_COLUMNS} FROM orders_archive)")
+
+
+def order_items_source(start: Union[date, datetime, None] = None) -> str:
+    if not _needs_archive(start):
+        return "order_item"
+    return (f"(SELECT {_ITEM_COLUMNS} FROM order_item"
+            f" UNION ALL SELECT {_ITEM_COLUMNS} FROM order_item_archive)")
+
+
+def _months_ago(months: int, today: Optional[date] = None) -> datetime:
+    today = today or date.today()
+    year, month = divmod(today.year * 12 + today.month - 1 - months, 12)
+    return datetime(year, month + 1, 1)
+
+
+def archive_closed_orders(months: Optional[int] = None, batch_size: int = 500) -> int:
+    """
+    Move closed orders placed before the first day of the month `months` ago
+    into the archive tables, batch_size orders per transaction. Returns the
+    number of orders moved. Run the sales rollup first so no moved order is
+    still pending in it (see tasks.archive_orders).
+    """
+    if months is None:
+        months = current_app.config.get('ORDER_ARCHIVE_MONTHS', 12)
+    cutoff = _months_ago(months)
+    status_marks = ", ".join(["%s"] * len(CLOSED_STATUSES))
+
+    from .db import transaction   # db imports this module
+
+    moved = 0
+    while True:
+        # Copy and delete in one transaction per batch, so an order is always in exactly one place
+        with transaction() as cur:
+            cur.execute(f"""
+                SELECT order_id FROM orders
+                 WHERE orderStatus IN ({status_marks}) AND orderDate < %s
+                 ORDER BY order_id
+                 LIMIT %s
+            """, (*CLOSED_STATUSES, cutoff, batch_size))
+            ids: List[int] = [r['order_id'] for r in cur.fetchall()]
+            if ids:
+                id_marks = ", ".join(["%s"] * len(ids))
+                cur.execute(f"INSERT INTO orders_archive ({_ORDER_COLUMNS}) "
+                            f"SELECT {_ORDER_COLUMNS} FROM orders WHERE order_id IN ({id_marks})", tuple(ids))
+                cur.execute(f"INSERT INTO order_item_archive ({_ITEM_COLUMNS}) "
+                            f"SELECT {_ITEM_COLUMNS} FROM order_item WHERE order_id IN ({id_marks})", tuple(ids))
+                cur.execute(f"DELETE FROM order_item WHERE order_id IN ({id_marks})", tuple(ids))
+                cur.execute(f"DELETE FROM orders WHERE order_id IN ({id_marks})", tuple(ids))
+        moved += len(ids)
+
+        if len(ids) < batch_size:
+            break
+
+    g.pop('order_archive_boundary', None)
+    return moved
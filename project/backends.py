@@ -0,0 +1,54 @@
+"""
+The `mysql` object every module imports (project/__init__.py), backed by the
+storage engine chosen with DB_BACKEND:
+
+    mysql   PooledMySQL (project/pool.py): a MySQL server, pooled, optional read replicas
+    sqlite  SQLiteBackend (project/sqlite_backend.py): one database file, no server
+
+Both hand out connections with the MySQLdb interface the db functions use
+(cursor(), commit(), rollback(), IntegrityError, %s placeholders, dict rows
+by default), so the SQL in project/db.py runs unchanged on either.
+"""
+from flask import current_app
+
+
+class Database:
+    def init_app(self, app):
+        app.config.setdefault("DB_BACKEND", "mysql")
+        name = app.config["DB_BACKEND"]
+        if name == "mysql":
+            from . import pool
+            if pool.MySQLdb is None:
+                raise RuntimeError("DB_BACKEND 'mysql' needs mysqlclient and Flask-MySQLdb "
+                                   "(pip install -r requirements.txt), or set DB_BACKEND = 'sqlite'")
+            backend = pool.PooledMySQL()
+        elif name == "sqlite":
+            from .sqlite_backend import SQLiteBackend
+            backend = SQLiteBackend()
+        else:
+            raise ValueError(f"Unknown DB_BACKEND {name!r}")
+        backend.init_app(app)
+        app.extensions["database"] = backend
+
+    @property
+    def backend(self):
+        return current_app.extensions["database"]
+
+    @property
+    def connection(self):
+        return self.backend.connection
+
+    def tuple_cursor(self):
+        """Cursor returning plain tuples (project/mapping.py)."""
+        return self.backend.tuple_cursor()
+
+    def stream_cursor(self):
+        """Cursor that fetches rows as they are read instead of buffering the result."""
+        return self.backend.stream_cursor()
+
+    def pools(self) -> dict:
+        return self.backend.pools()
+
+    def add_connect_hook(self, hook) -> None:
+        """Call hook(conn) on every connection the backend opens from now on."""
+        self.backend.add_connect_hook(hook)
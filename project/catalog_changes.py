@@ -0,0 +1,125 @@
+"""
+Cross-process catalog change feed.
+
+catalog_changed (project/signals.py) only reaches receivers in the process
+that made the change. Every change is therefore also appended to the
+catalog_changes table. In-memory catalog structures kept by each worker
+(e.g. the search suggestion index) follow that log from a per-process
+watcher thread, so requests never wait on MySQL to see other workers' edits.
+
+A follower registers an object with a sync() method; sync() is called
+every CATALOG_SYNC_SECONDS inside an app context and should read
+changes_since() from its own Watermark.
+"""
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from . import mysql
+
+_followers: List[object] = []
+_wake = threading.Event()
+_watcher: Optional[threading.Thread] = None
+_watcher_pid: Optional[int] = None
+_watcher_lock = threading.Lock()
+
+
+def log_changes(artwork_ids: Iterable[int]) -> None:
+    ids = sorted({int(a) for a in artwork_ids if a})
+    if not ids:
+        return
+    from .db import after_commit, transaction   # db imports this module (via catalog_snapshot)
+    now = datetime.now()
+    with transaction() as cur:   # joins the catalog write's unit of work
+        cur.executemany("INSERT INTO catalog_changes (artwork_id, changedAt) VALUES (%s, %s)",
+                        [(a, now) for a in ids])
+        # This worker catches up as soon as the write commits; others on their next poll
+        after_commit(_wake.set)
+
+
+# Longest a catalog write may keep its change row uncommitted and still be followed
+GAP_SECONDS = 60
+
+
+class Watermark:
+    """
+    How far a follower has read the log. change_id is assigned on insert but
+    the row only shows up on commit, so a lower id can appear after a higher
+    one. Ids above floor are therefore read again until they have been seen
+    for GAP_SECONDS (ids in seen are not applied twice), and floor only moves
+    past ids that old.
+    """
+
+    def __init__(self, floor: int = 0, seen: Optional[Dict[int, float]] = None):
+        self.floor = floor
+        self.seen = seen or {}   # change_id above floor -> monotonic time first read
+
+
+def start_watermark() -> Watermark:
+    """Watermark for a follower about to load the whole catalog; take it before loading."""
+    # Recent changes are read (and applied) once more, in case a lower id commits after the load
+    cur = mysql.connection.cursor()
+    cur.execute("SELECT COALESCE(MAX(change_id), 0) AS floor FROM catalog_changes WHERE changedAt < %s",
+                (datetime.now() - timedelta(seconds=GAP_SECONDS),))
+    floor = int(cur.fetchone()['floor'])
+    cur.close()
+    return Watermark(floor)
+
+
+def changes_since(mark: Watermark) -> Tuple[Watermark, Set[int]]:
+    """Return (new watermark, artwork ids changed since mark)."""
+    cur = mysql.connection.cursor()
+    cur.execute("SELECT change_id, artwork_id FROM catalog_changes WHERE change_id > %s ORDER BY change_id",
+                (mark.floor,))
+    rows = cur.fetchall()
+    cur.close()
+    now = time.monotonic()
+    seen = dict(mark.seen)
+    artwork_ids = set()
+    for r in rows:
+        if r['change_id'] not in seen:
+            seen[r['change_id']] = now
+            artwork_ids.add(r['artwork_id'])
+    floor = max((i for i, first in seen.items() if now - first >= GAP_SECONDS), default=mark.floor)
+    return Watermark(floor, {i: first for i, first in seen.items() if i > floor}), artwork_ids
+
+
+def purge_changes(older_than_hours: int = 24) -> int:
+    from .db import transaction
+    with transaction() as cur:
+        cur.execute("DELETE FROM catalog_changes WHERE changedAt < %s",
+                    (datetime.now() - timedelta(hours=older_than_hours),))
+        return cur.rowcount
+
+
+def follow(follower) -> None:
+    if follower not in _followers:
+        _followers.append(follower)
+
+
+def start_watcher(app) -> None:
+    """Start this process's watcher thread (once per pid; threads do not survive a fork)."""
+    global _watcher, _watcher_pid
+    if _watcher_pid == os.getpid() and _watcher.is_alive():
+        return
+    with _watcher_lock:
+        if _watcher is not None and _watcher_pid == os.getpid() and _watcher.is_alive():
+            return
+        _watcher = threading.Thread(target=_watch, args=(app,), name="catalog-watcher", daemon=True)
+        _watcher_pid = os.getpid()
+        _watcher.start()
+
+
+def _watch(app) -> None:
+    interval = app.config.get('CATALOG_SYNC_SECONDS', 5)
+    while True:
+        _wake.wait(interval)
+        _wake.clear()
+        for follower in list(_followers):
+            try:
+                with app.app_context():
+                    follower.sync()
+            except Exception:
+                app.logger.exception("catalog follower %r failed to sync", follower)
@@ -0,0 +1,178 @@
+"""
+Optional in-memory engine for filter_items (CATALOG_SNAPSHOT = True).
+
+Each worker keeps a columnar snapshot of every artwork: NumPy arrays of
+ids, prices in integer cents, category, vendor, status and a title sort
+rank. Next to the arrays sit the ready-made listing rows, in the shape
+filter_items returns from SQL. Filters become boolean masks and sorts
+become lexsorts over those arrays, so the homepage runs no catalog query.
+
+Changes arrive through the catalog_changes log (project/catalog_changes.py).
+Only the changed artworks are re-read; a new snapshot is built and swapped
+in with a single assignment. Free-text search (q), a disabled engine, or a
+failed load all fall back to SQL.
+"""
+import threading
+import time
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from flask import current_app
+
+from . import mysql
+from .catalog_changes import Watermark, changes_since, follow, start_watcher, start_watermark
+from .pool import in_read_your_writes_window
+from .server_timing import note_cache
+
+STATUSES = ('Listed', 'Leased', 'Unlisted')
+
+
+def _cents(price) -> int:
+    return int((Decimal(str(price or 0)) * 100).to_integral_value())
+
+
+class CatalogSnapshot:
+    """Immutable: updates build a new snapshot."""
+    __slots__ = ('records', 'ids', 'price_cents', 'category', 'vendor', 'status', 'title_rank')
+
+    def __init__(self, records: Iterable[dict]):
+        self.records: List[dict] = sorted(records, key=lambda r: r['artwork_id'])
+        n = len(self.records)
+        col = lambda name: (r[name] for r in self.records)
+        self.ids = np.fromiter(col('artwork_id'), dtype=np.int64, count=n)
+        self.price_cents = np.fromiter((_cents(p) for p in col('pricePerWeek')), dtype=np.int64, count=n)
+        self.category = np.fromiter((c or 0 for c in col('category_id')), dtype=np.int64, count=n)
+        self.vendor = np.fromiter((v or 0 for v in col('vendor_id')), dtype=np.int64, count=n)
+        self.status = np.fromiter((STATUSES.index(s) if s in STATUSES else -1 for s in col('availabilityStatus')),
+                                  dtype=np.int8, count=n)
+        # Case-insensitive title order, like MySQL's default collation
+        order = sorted(range(n), key=lambda i: (self.records[i]['title'] or '').casefold())
+        self.title_rank = np.empty(n, dtype=np.int64)
+        self.title_rank[order] = np.arange(n)
+
+    def __len__(self):
+        return len(self.records)
+
+    def with_changes(self, rows: Iterable[dict], removed: Iterable[int] = ()) -> 'CatalogSnapshot':
+        by_id: Dict[int, dict] = {r['artwork_id']: r for r in self.records}
+        for artwork_id in removed:
+            by_id.pop(artwork_id, None)
+        for r in rows:
+            by_id[r['artwork_id']] = r
+        return CatalogSnapshot(by_id.values())
+
+    def query(self, category_id=None, vendor_id=None, min_price=None, max_price=None,
+              availability=None, sort=None, limit=None) -> List[dict]:
+        mask = np.ones(len(self.records), dtype=bool)
+        if category_id is not None:
+            mask &= self.category == category_id
+        if vendor_id is not None:
+            mask &= self.vendor == vendor_id
+        if min_price is not None:
+            mask &= self.price_cents >= round(min_price * 100)
+        if max_price is not None:
+            mask &= self.price_cents <= round(max_price * 100)
+        if availability:
+            mask &= self.status == (STATUSES.index(availability) if availability in STATUSES else -2)
+        rows = np.flatnonzero(mask)
+
+        # Same orders as the SQL sort_map; np.lexsort sorts by its last key first
+        ids = self.ids[rows]
+        if sort == 'oldest':
+            order = np.argsort(ids, kind='stable')
+        elif sort == 'price_asc':
+            order = np.lexsort((-ids, self.price_cents[rows]))
+        elif sort == 'price_desc':
+            order = np.lexsort((-ids, -self.price_cents[rows]))
+        elif sort == 'title':
+            order = np.argsort(self.title_rank[rows], kind='stable')
+        else:
+            order = np.argsort(-ids, kind='stable')
+        rows = rows[order]
+        if limit:
+            rows = rows[:limit]
+        records = self.records
+        return [dict(records[i]) for i in rows]   # copies: callers may not mutate the snapshot
+
+
+class SnapshotEngine:
+    def __init__(self):
+        self.snapshot: Optional[CatalogSnapshot] = None
+        self.watermark: Optional[Watermark] = None
+        self.built_at = 0.0
+
+    @property
+    def ready(self) -> bool:
+        return self.snapshot is not None
+
+    def rebuild(self) -> None:
+        watermark = start_watermark()
+        snapshot = CatalogSnapshot(_load_records())
+        self.snapshot, self.watermark, self.built_at = snapshot, watermark, time.monotonic()
+
+    def sync(self) -> None:
+        if not self.ready:
+            return
+        if time.monotonic() - self.built_at > current_app.config.get('CATALOG_SNAPSHOT_REBUILD_SECONDS', 3600):
+            self.rebuild()  # picks up vendor/category renames too
+            return
+        watermark, artwork_ids = changes_since(self.watermark)
+        if artwork_ids:
+            rows = _load_records(artwork_ids)
+            self.snapshot = self.snapshot.with_changes(rows, artwork_ids - {r['artwork_id'] for r in rows})
+        self.watermark = watermark
+
+
+def _load_records(artwork_ids: Optional[Iterable[int]] = None) -> List[dict]:
+    from .db import DESCRIPTION_PREVIEW   # db imports this module
+    sql = f"""
+      SELECT a.artwork_id, a.vendor_id, a.category_id, a.title,
+             SUBSTRING(a.itemDescription, 1, {DESCRIPTION_PREVIEW}) AS itemDescription,
+             a.pricePerWeek, a.imageLink, a.availabilityStatus,
+             c.categoryName, v.artisticName
+      FROM artworks a
+      LEFT JOIN categories c ON c.category_id = a.category_id
+      LEFT JOIN vendors v ON v.vendor_id = a.vendor_id
+    """
+    params: tuple = ()
+    if artwork_ids is not None:
+        params = tuple(artwork_ids)
+        sql += f" WHERE a.artwork_id IN ({', '.join(['%s'] * len(params))})"
+    cur = mysql.connection.cursor()
+    cur.execute(sql, params)
+    rows = list(cur.fetchall())
+    cur.close()
+    return rows
+
+
+_engine = SnapshotEngine()
+_build_lock = threading.Lock()
+
+
+def snapshot_filter(**filters) -> Optional[List[dict]]:
+    """filter_items from the snapshot, or None when the caller should run SQL."""
+    if not current_app.config.get('CATALOG_SNAPSHOT'):
+        return None
+    if in_read_your_writes_window():
+        note_cache('catalog', False)
+        return None   # the snapshot may not have this user's edit yet
+    if not _engine.ready:
+        with _build_lock:
+            if not _engine.ready:
+                try:
+                    _engine.rebuild()
+                except Exception:
+                    current_app.logger.exception("catalog snapshot unavailable, using SQL")
+                    note_cache('catalog', False)
+                    return None
+                follow(_engine)
+    start_watcher(current_app._get_current_object())
+    note_cache('catalog', True)
+    return _engine.snapshot.query(**filters)
+
+
+def index_stats() -> dict:
+    """Entry counts for /metrics."""
+    snapshot = _engine.snapshot
+    return {"catalog_snapshot_rows": len(snapshot) if snapshot is not None else 0}
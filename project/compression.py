@@ -0,0 +1,129 @@
+"""
+Response compression as WSGI middleware (gzip, or brotli when the optional
+`brotli` package is installed and the client accepts it).
+
+Responses with a known Content-Length are compressed in one go and skipped
+below COMPRESS_MIN_SIZE bytes. Streamed responses (no Content-Length, see
+stream_page in project/streaming.py) are compressed chunk by chunk with a
+flush after each chunk, so whatever the view has already produced reaches
+the browser straight away.
+"""
+import zlib
+
+from werkzeug.datastructures import Headers
+from werkzeug.http import parse_accept_header
+
+try:
+    import brotli
+except ImportError:   # optional dependency
+    brotli = None
+
+COMPRESSIBLE = ('text/', 'application/json', 'application/javascript', 'application/xml', 'image/svg+xml')
+_SKIP_STATUS = ('1', '204', '206', '304')
+
+
+class _Gzip:
+    def __init__(self, level: int):
+        self._z = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._z.compress(data)
+
+    def flush(self) -> bytes:
+        return self._z.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._z.flush()
+
+
+class _Brotli:
+    def __init__(self, quality: int):
+        self._c = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._c.process(data)
+
+    def flush(self) -> bytes:
+        return self._c.flush()
+
+    def finish(self) -> bytes:
+        return self._c.finish()
+
+
+class CompressionMiddleware:
+    def __init__(self, app, min_size: int = 1024, level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.min_size = min_size
+        self.level = level
+        self.brotli_quality = brotli_quality
+
+    def _encoding(self, environ):
+        if environ.get('REQUEST_METHOD') == 'HEAD':
+            return None
+        accept = parse_accept_header(environ.get('HTTP_ACCEPT_ENCODING', ''))
+        if brotli is not None and accept.quality('br') > 0:
+            return 'br'
+        if accept.quality('gzip') > 0:
+            return 'gzip'
+        return None
+
+    @staticmethod
+    def _compressible(headers: Headers) -> bool:
+        return headers.get('Content-Type', '').startswith(COMPRESSIBLE)
+
+    def _should_compress(self, status: str, headers: Headers) -> bool:
+        if status.startswith(_SKIP_STATUS) or 'Content-Encoding' in headers or 'Content-Range' in headers:
+            return False
+        if 'no-transform' in headers.get('Cache-Control', ''):
+            return False
+        length = headers.get('Content-Length', type=int)
+        return length is None or length >= self.min_size
+
+    def __call__(self, environ, start_response):
+        encoding = self._encoding(environ)
+        if encoding is None:
+            return self.app(environ, start_response)
+
+        state = {}
+
+        def _start_response(status, response_headers, exc_info=None):
+            headers = Headers(response_headers)
+            if not self._compressible(headers):
+                return start_response(status, response_headers, exc_info)
+            # Vary even when this response is not compressed: others from the URL may be
+            vary = headers.get('Vary')
+            if not vary:
+                headers['Vary'] = 'Accept-Encoding'
+            elif 'accept-encoding' not in vary.lower():
+                headers['Vary'] = f"{vary}, Accept-Encoding"
+            if self._should_compress(status, headers):
+                state['streamed'] = 'Content-Length' not in headers
+                state['compressor'] = _Brotli(self.brotli_quality) if encoding == 'br' else _Gzip(self.level)
+                headers.remove('Content-Length')
+                headers['Content-Encoding'] = encoding
+                if headers.get('ETag', '').startswith('"'):
+                    headers['ETag'] = 'W/' + headers['ETag']   # bytes differ from the uncompressed body
+            return start_response(status, headers.to_wsgi_list(), exc_info)
+
+        body = self.app(environ, _start_response)
+        compressor = state.get('compressor')
+        if compressor is None:
+            return body
+        return self._compressed(body, compressor, state['streamed'])
+
+    @staticmethod
+    def _compressed(body, compressor, streamed: bool):
+        try:
+            for chunk in body:
+                if not chunk:
+                    continue
+                data = compressor.compress(chunk)
+                if streamed:
+                    data += compressor.flush()
+                if data:
+                    yield data
+            yield compressor.finish()
+        finally:
+            close = getattr(body, 'close', None)
+            if close is not None:
+                close()
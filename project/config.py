@@ -0,0 +1,130 @@
+"""
+Configuration profiles, selected with the APP_ENV environment variable
+(dev / test / prod; default dev).
+
+Any setting can be overridden from the environment with a FLASK_ prefix,
+e.g. FLASK_SECRET_KEY, FLASK_MYSQL_PASSWORD, FLASK_MYSQL_POOL_SIZE=30
+(values are parsed as JSON where possible, see Flask.config.from_prefixed_env).
+"""
+import os
+
+DEFAULT_SECRET_KEY = 'BetterSecretNeeded123'
+
+
+class Config:
+    DEBUG = False
+    TESTING = False
+    TEMPLATES_AUTO_RELOAD = False
+    SECRET_KEY = DEFAULT_SECRET_KEY
+
+    # Storage (project/backends.py): 'mysql', or 'sqlite' to run without a MySQL server
+    DB_BACKEND = 'mysql'
+    SQLITE_PATH = None       # defaults to <instance>/artlease.db; ':memory:' for a throwaway database
+    SQLITE_PRAGMAS = {}      # overrides for project/sqlite_backend.py PRAGMAS, e.g. {"synchronous": "FULL"}
+
+    # MySQL
+    MYSQL_USER = 'root'
+    MYSQL_PASSWORD = 'mysqlroot'   # <-- change to your local password (or set FLASK_MYSQL_PASSWORD)
+    MYSQL_DB = 'assessment3_group4'
+    MYSQL_HOST = 'localhost'
+    MYSQL_CURSORCLASS = 'DictCursor'
+    MYSQL_POOL_SIZE = 20     # per process; fan-out uses several per request
+    # Read replicas for @replica_read functions, e.g. FLASK_MYSQL_REPLICAS='["127.0.0.1:3307"]'
+    MYSQL_REPLICAS = []
+    MYSQL_READ_YOUR_WRITES = 5   # seconds a session reads from the primary after it writes
+
+    # Templates (project/startup.py); cache dir defaults to <instance>/jinja_cache
+    JINJA_BYTECODE_CACHE = True
+    JINJA_BYTECODE_CACHE_DIR = None
+    TEMPLATE_PRECOMPILE = False
+
+    # Parallel page queries (project/fanout.py)
+    FANOUT_MAX_WORKERS = 8
+    FANOUT_TIMEOUT = 10      # seconds per parallel query
+
+    # In-memory catalog indexes (project/catalog_changes.py, project/suggest.py)
+    CATALOG_SYNC_SECONDS = 5
+    SUGGEST_REBUILD_SECONDS = 3600   # full rebuild refreshes popularity
+    CATALOG_SNAPSHOT = False         # serve filter_items from memory (project/catalog_snapshot.py)
+    CATALOG_SNAPSHOT_REBUILD_SECONDS = 3600
+
+    # project/limits.py; 'sqlite:////tmp/artlease-limits.db' shares limits across workers
+    RATE_LIMITS_ENABLED = True
+    RATE_LIMIT_STORE = 'memory'
+    ADMISSION_CAPACITY = None        # in-flight requests per process; defaults to MYSQL_POOL_SIZE
+
+    # Response compression (project/compression.py); br needs the optional brotli package
+    COMPRESS_ENABLED = True
+    COMPRESS_MIN_SIZE = 1024         # bytes; streamed pages are always compressed
+    COMPRESS_LEVEL = 6
+    COMPRESS_BROTLI_QUALITY = 4
+    STREAM_CHUNK_SIZE = 16 * 1024    # characters per streamed chunk (project/streaming.py)
+
+    # Request profiler (project/profiling.py); output defaults to <instance>/profiles
+    PROFILE_SAMPLE_RATE = 0.0        # share of requests profiled without a token
+    PROFILE_INTERVAL = 0.005         # seconds between stack samples
+    PROFILE_TOKEN_MAX_AGE = 3600
+    PROFILE_DIR = None
+
+    # Allocation tracking per endpoint (project/memtrack.py); costly, enable to investigate
+    MEMTRACK_ENABLED = False
+    MEMTRACK_SAMPLE_EVERY = 50       # requests per endpoint between top-site snapshots
+    MEMTRACK_LEAK_EVERY = 500        # requests between leak checks
+    MEMTRACK_LOG = None              # e.g. '/tmp/artlease-memory.log'
+
+    # Prometheus metrics (project/metrics.py); METRICS_DIR shares them across workers
+    METRICS_DIR = None
+    METRICS_FLUSH_SECONDS = 1.0      # how often a worker rewrites its file
+    METRICS_TOKEN = None             # bearer token for scrapers; unset: loopback only
+
+    # Server-Timing header with SQL/template/session/cache times (project/server_timing.py)
+    SERVER_TIMING_ENABLED = False
+
+    # Uploaded images (project/images.py); the store defaults to <instance>/images
+    IMAGE_STORE_DIR = None
+    MAX_IMAGE_BYTES = 5 * 1024 * 1024
+    MAX_CONTENT_LENGTH = 8 * 1024 * 1024   # whole request, image included
+
+    # Closed orders older than this move to the archive tables (project/archive.py)
+    ORDER_ARCHIVE_MONTHS = 12
+
+
+class DevelopmentConfig(Config):
+    DEBUG = True
+    TEMPLATES_AUTO_RELOAD = True
+    SERVER_TIMING_ENABLED = True
+
+
+class TestingConfig(Config):
+    TESTING = True
+    WTF_CSRF_ENABLED = False
+    # A fresh seeded database per process; FLASK_DB_BACKEND=mysql uses MYSQL_DB instead
+    DB_BACKEND = 'sqlite'
+    SQLITE_PATH = ':memory:'
+    RATE_LIMITS_ENABLED = False
+
+
+class ProductionConfig(Config):
+    TEMPLATE_PRECOMPILE = True
+    SESSION_COOKIE_HTTPONLY = True
+    SESSION_COOKIE_SAMESITE = 'Lax'
+    RATE_LIMIT_STORE = 'sqlite:////tmp/artlease-limits.db'   # one set of limits for all gunicorn workers
+    METRICS_DIR = '/tmp/artlease-metrics'
+
+
+PROFILES = {
+    'dev': DevelopmentConfig,
+    'test': TestingConfig,
+    'prod': ProductionConfig,
+}
+
+
+def load_config(app, profile=None) -> str:
+    profile = (profile or os.environ.get('APP_ENV') or 'dev').lower()
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown APP_ENV '{profile}' (expected one of {', '.join(PROFILES)})")
+    app.config.from_object(PROFILES[profile])
+    app.config.from_prefixed_env()
+    if profile == 'prod' and app.config['SECRET_KEY'] == DEFAULT_SECRET_KEY:
+        raise RuntimeError("Set FLASK_SECRET_KEY before running with APP_ENV=prod")
+    return profile
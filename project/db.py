@@ -1,79 +1,217 @@
 from hashlib import sha256
 from datetime import datetime, date, timedelta
 from decimal import Decimal
+from contextlib import contextmanager
+from functools import lru_cache
 from typing import Optional, Tuple, List, Dict
 from uuid import uuid4
+from flask import current_app, g
 from . import mysql
 from project.models import Category, Artwork, Vendor, Order, OrderStatus
 from project.forms import ArtworkForm
+from project.rollups import mark_orders_dirty
+from project.archive import orders_source, order_items_source
+from project.mapping import RowMapper, query_model, query_models
+from project.pool import replica_read, primary_write, on_primary
+from project.signals import catalog_changed
+from project.catalog_snapshot import snapshot_filter
+from project.statements import Statement, statement
+
+# Tuple-row mappers; SELECT lists below follow the model field order
+CATEGORY = RowMapper(Category)
+ARTWORK = RowMapper(Artwork, image='imageLink')
+VENDOR = RowMapper(Vendor, image='profilePictureLink')
+
+# List pages show at most 220 characters of itemDescription; one extra tells
+# the template the text was cut. Full TEXT is only read on the details page.
+DESCRIPTION_PREVIEW = 221
+_DESCRIPTION_PREVIEW_SQL = f"SUBSTRING(a.itemDescription, 1, {DESCRIPTION_PREVIEW}) AS itemDescription"
+
+# Hot statements, built once (project/statements.py)
+GET_CATEGORIES = statement('get_categories', "SELECT category_id, categoryName FROM categories ORDER BY categoryName")
+GET_CATEGORY = statement('get_category', "SELECT category_id, categoryName FROM categories WHERE category_id=%s")
+# categoryName is carried on the Artwork so templates can use it
+GET_ARTWORK = statement('get_artwork', """
+    SELECT a.artwork_id, a.vendor_id, a.category_id, a.title, a.itemDescription,
+           a.pricePerWeek, a.imageLink, a.availabilityStartDate, a.availabilityEndDate,
+           a.maxQuantity, a.availabilityStatus, c.categoryName
+    FROM artworks a
+    LEFT JOIN categories c ON c.category_id = a.category_id
+    WHERE a.artwork_id = %s
+""")
+_VENDOR_SQL = """
+    SELECT vendor_id, email, phone, vendor_password, firstName, lastName,
+           address_id, artisticName, {bio}, profilePictureLink
+    FROM vendors WHERE vendor_id=%s
+"""
+GET_VENDOR = statement('get_vendor', _VENDOR_SQL.format(bio="bio"))
+# bio is TEXT; pages that only link to the vendor skip it (bio == '')
+GET_VENDOR_NO_BIO = statement('get_vendor_no_bio', _VENDOR_SQL.format(bio="'' AS bio"))
+ARTWORK_CONSTRAINTS = statement('artwork_constraints', """
+    SELECT maxQuantity, availabilityStartDate, availabilityEndDate, availabilityStatus
+      FROM artworks
+     WHERE artwork_id = %s
+     LIMIT 1
+""")
+
+
+@contextmanager
+def transaction(savepoint: bool = False):
+    """
+    Unit of work. Write functions below run their statements inside one; when
+    they are called inside another transaction() they join it, and only the
+    outermost scope commits (once). An exception rolls the whole unit back.
+
+    With savepoint=True a nested scope can fail on its own: its statements
+    are rolled back to a SAVEPOINT and the exception re-raised, so a caller
+    that catches it can carry on with the outer unit.
+
+    Callbacks registered with after_commit() run once the outermost scope
+    has committed, and are dropped with the work they belong to.
+
+        with transaction():
+            addr_id = ensure_address(...)
+            order_id = add_order(order)     # one commit for both
+    """
+    depth = g.get('tx_depth', 0)
+    name = f"uow_{depth}" if savepoint and depth else None
+    if depth == 0:
+        g.tx_after_commit = []
+    pending = len(g.tx_after_commit)
+    with on_primary():
+        conn = mysql.connection
+        cur = conn.cursor()
+        g.tx_depth = depth + 1
+        try:
+            if name:
+                cur.execute(f"SAVEPOINT {name}")
+            yield cur
+            if name:
+                cur.execute(f"RELEASE SAVEPOINT {name}")
+            elif depth == 0:
+                conn.commit()
+        except BaseException:
+            if name:
+                cur.execute(f"ROLLBACK TO SAVEPOINT {name}")
+                del g.tx_after_commit[pending:]
+            elif depth == 0:
+                conn.rollback()
+            raise
+        finally:
+            g.tx_depth = depth
+            cur.close()
+            if depth == 0:
+                callbacks = g.pop('tx_after_commit', [])
+    if depth == 0:
+        for callback in callbacks:
+            callback()
+
+
+def after_commit(callback) -> None:
+    """Run callback() when the current transaction() commits (at once outside one)."""
+    if in_transaction():
+        g.tx_after_commit.append(callback)
+    else:
+        callback()
+
 
+def in_transaction() -> bool:
+    return g.get('tx_depth', 0) > 0
 
 
-# Catalog
+# Catalog (reads marked @replica_read may be served by a read replica;
+# auth, uniqueness and stock checks stay on the primary)
+@replica_read
 def get_categories() -> List[Category]:
-    cur = mysql.connection.cursor()
-    cur.execute("SELECT category_id, categoryName FROM categories ORDER BY categoryName;")
-    rows = cur.fetchall()
-    cur.close()
-    return [Category(r['category_id'], r['categoryName']) for r in rows]
+    return query_models(CATEGORY, GET_CATEGORIES)
 
+@replica_read
 def get_category(category_id: int) -> Optional[Category]:
-    cur = mysql.connection.cursor()
-    cur.execute("SELECT category_id, categoryName FROM categories WHERE category_id=%s;", (category_id,))
-    row = cur.fetchone()
-    cur.close()
-    return Category(row['category_id'], row['categoryName']) if row else None
+    return query_model(CATEGORY, GET_CATEGORY, (category_id,))
 
+@replica_read
 def get_artworks_for_category(category_id: int):
-    cur = mysql.connection.cursor()
-    cur.execute("""
-        SELECT artwork_id, vendor_id, category_id, title, itemDescription,
-               pricePerWeek, imageLink, availabilityStartDate, availabilityEndDate,
-               maxQuantity, availabilityStatus
-        FROM artworks
-        WHERE category_id=%s AND availabilityStatus='Listed'
-        ORDER BY title;
+    return query_models(ARTWORK, f"""
+        SELECT a.artwork_id, a.vendor_id, a.category_id, a.title, {_DESCRIPTION_PREVIEW_SQL},
+               a.pricePerWeek, a.imageLink, a.availabilityStartDate, a.availabilityEndDate,
+               a.maxQuantity, a.availabilityStatus
+        FROM artworks a
+        WHERE a.category_id=%s AND a.availabilityStatus='Listed'
+        ORDER BY a.title;
     """, (category_id,))
-    rows = cur.fetchall()
-    cur.close()
-    return [Artwork(
-        artwork_id=r['artwork_id'], vendor_id=r['vendor_id'], category_id=r['category_id'],
-        title=r['title'], itemDescription=r['itemDescription'],
-        pricePerWeek=Decimal(str(r['pricePerWeek'])), image=r['imageLink'],
-        availabilityStartDate=r['availabilityStartDate'], availabilityEndDate=r['availabilityEndDate'],
-        maxQuantity=r['maxQuantity'], availabilityStatus=r['availabilityStatus']
-    ) for r in rows]
 
 
+@replica_read
 def get_artwork(artwork_id: int) -> Optional[Artwork]:
-    cur = mysql.connection.cursor()
-    cur.execute("""
+    return query_model(ARTWORK, GET_ARTWORK, (artwork_id,))
+
+
+@replica_read
+def get_artworks_by_ids(artwork_ids, with_description: bool = False) -> Dict[int, Artwork]:
+    """
+    Batch-load artworks in one query (e.g. to hydrate a cart).
+    Unless with_description, itemDescription is left as '' and never leaves MySQL.
+    """
+    ids = sorted({int(i) for i in artwork_ids})
+    if not ids:
+        return {}
+    description = "a.itemDescription" if with_description else "'' AS itemDescription"
+    placeholders = ", ".join(["%s"] * len(ids))
+    items = query_models(ARTWORK, f"""
         SELECT
-            a.artwork_id, a.vendor_id, a.category_id, a.title, a.itemDescription,
+            a.artwork_id, a.vendor_id, a.category_id, a.title, {description},
             a.pricePerWeek, a.imageLink, a.availabilityStartDate, a.availabilityEndDate,
             a.maxQuantity, a.availabilityStatus,
-            c.categoryName                          
+            c.categoryName
         FROM artworks a
-        LEFT JOIN categories c ON c.category_id = a.category_id   
-        WHERE a.artwork_id = %s;
-    """, (artwork_id,))
-    r = cur.fetchone()
-    cur.close()
-    if not r:
-        return None
-
-    aw = Artwork(
-        artwork_id=r['artwork_id'], vendor_id=r['vendor_id'], category_id=r['category_id'],
-        title=r['title'], itemDescription=r['itemDescription'],
-        pricePerWeek=Decimal(str(r['pricePerWeek'])), image=r['imageLink'],
-        availabilityStartDate=r['availabilityStartDate'], availabilityEndDate=r['availabilityEndDate'],
-        maxQuantity=r['maxQuantity'], availabilityStatus=r['availabilityStatus']
-    )
-    # Attach the readable name so templates can use it
-    setattr(aw, 'categoryName', r.get('categoryName'))
-    return aw
+        LEFT JOIN categories c ON c.category_id = a.category_id
+        WHERE a.artwork_id IN ({placeholders});
+    """, tuple(ids))
+    return {a.artwork_id: a for a in items}
+
+
+_FILTER_SORTS = {
+    "latest": "a.artwork_id DESC",
+    "oldest": "a.artwork_id ASC",
+    "price_asc": "a.pricePerWeek ASC, a.artwork_id DESC",
+    "price_desc": "a.pricePerWeek DESC, a.artwork_id DESC",
+    "title": "a.title ASC"
+}
+
+
+@lru_cache(maxsize=None)   # a few hundred shapes at most
+def _filter_items_statement(category: bool, vendor: bool, min_price: bool, max_price: bool,
+                            availability: bool, q: bool, sort: str, limit: bool) -> Statement:
+    # Only what the listing cards show; descriptions are cut to a preview
+    sql = f"""
+      SELECT a.artwork_id, a.vendor_id, a.category_id, a.title, {_DESCRIPTION_PREVIEW_SQL},
+             a.pricePerWeek, a.imageLink, a.availabilityStatus,
+             c.categoryName, v.artisticName
+      FROM artworks a
+      LEFT JOIN categories c ON c.category_id = a.category_id
+      LEFT JOIN vendors v ON v.vendor_id = a.vendor_id
+      WHERE 1=1
+    """
+    shape = []
+    if category:
+        sql += " AND a.category_id=%s"; shape.append("category")
+    if vendor:
+        sql += " AND a.vendor_id=%s"; shape.append("vendor")
+    if min_price:
+        sql += " AND a.pricePerWeek >= %s"; shape.append("min_price")
+    if max_price:
+        sql += " AND a.pricePerWeek <= %s"; shape.append("max_price")
+    if availability:
+        sql += " AND a.availabilityStatus=%s"; shape.append("availability")
+    if q:
+        sql += " AND (a.title LIKE %s OR a.itemDescription LIKE %s OR c.categoryName LIKE %s OR v.artisticName LIKE %s)"; shape.append("q")
+    sql += f" ORDER BY {_FILTER_SORTS[sort]}"; shape.append(f"sort={sort}")
+    if limit:
+        sql += " LIMIT %s"; shape.append("limit")
+    return statement(f"filter_items({','.join(shape)})", sql)
 
 
+@replica_read
 def filter_items(
     category_id: int | None = None,
     min_price: float | None = None,
@@ -84,64 +222,41 @@ def filter_items(
     sort: str | None = None,
     limit: int | None = None
 ) -> list[dict]:
-    sql = """
-      SELECT a.artwork_id, a.vendor_id, a.category_id, a.title, a.itemDescription, a.pricePerWeek, a.imageLink,
-             a.availabilityStartDate, a.availabilityEndDate, a.maxQuantity, a.availabilityStatus,
-             c.categoryName, v.artisticName
-      FROM artworks a
-      LEFT JOIN categories c ON c.category_id = a.category_id
-      LEFT JOIN vendors v ON v.vendor_id = a.vendor_id
-      WHERE 1=1
-    """
+    # In-memory engine when enabled (project/catalog_snapshot.py); it has no text search
+    if not q:
+        rows = snapshot_filter(category_id=category_id, vendor_id=vendor_id, min_price=min_price,
+                               max_price=max_price, availability=availability, sort=sort, limit=limit)
+        if rows is not None:
+            return rows
+
     params = []
     if category_id is not None:
-        sql += " AND a.category_id=%s"; params.append(category_id)
+        params.append(category_id)
     if vendor_id is not None:
-        sql += " AND a.vendor_id=%s"; params.append(vendor_id)
+        params.append(vendor_id)
     if min_price is not None:
-        sql += " AND a.pricePerWeek >= %s"; params.append(min_price)
+        params.append(min_price)
     if max_price is not None:
-        sql += " AND a.pricePerWeek <= %s"; params.append(max_price)
+        params.append(max_price)
     if availability:
-        sql += " AND a.availabilityStatus=%s"; params.append(availability)
+        params.append(availability)
     if q:
         like = f"%{q}%"
-        sql += " AND (a.title LIKE %s OR a.itemDescription LIKE %s OR c.categoryName LIKE %s OR v.artisticName LIKE %s)"; params.extend([like, like, like, like])
-    order_by = "a.artwork_id DESC"
-    sort_map = {
-        "latest": "a.artwork_id DESC",
-        "oldest": "a.artwork_id ASC",
-        "price_asc": "a.pricePerWeek ASC, a.artwork_id DESC",
-        "price_desc": "a.pricePerWeek DESC, a.artwork_id DESC",
-        "title": "a.title ASC"
-    }
-    if sort in sort_map:
-        order_by = sort_map[sort]
-    sql += f" ORDER BY {order_by}"
+        params.extend([like, like, like, like])
     if limit:
-        sql += " LIMIT %s"; params.append(limit)
-    cur = mysql.connection.cursor(); cur.execute(sql, tuple(params))
+        params.append(limit)
+    stmt = _filter_items_statement(category_id is not None, vendor_id is not None, min_price is not None,
+                                   max_price is not None, bool(availability), bool(q),
+                                   sort if sort in _FILTER_SORTS else "latest", bool(limit))
+    cur = mysql.connection.cursor(); stmt.execute(cur, tuple(params))
     rows = cur.fetchall(); cur.close()
     return rows
     
-def get_vendor(vendor_id: int) -> Optional[Vendor]:
-    cur = mysql.connection.cursor()
-    cur.execute("""
-        SELECT vendor_id, email, phone, vendor_password, firstName, lastName,
-               address_id, artisticName, bio, profilePictureLink
-        FROM vendors WHERE vendor_id=%s;
-    """, (vendor_id,))
-    r = cur.fetchone()
-    cur.close()
-    if not r:
-        return None
-    return Vendor(
-        vendor_id=r['vendor_id'], email=r['email'], phone=r['phone'],
-        vendor_password=r['vendor_password'], firstName=r['firstName'], lastName=r['lastName'],
-        address_id=r['address_id'], artisticName=r['artisticName'], bio=r['bio'],
-        image=r['profilePictureLink']
-    )
+@replica_read
+def get_vendor(vendor_id: int, with_bio: bool = True) -> Optional[Vendor]:
+    return query_model(VENDOR, GET_VENDOR if with_bio else GET_VENDOR_NO_BIO, (vendor_id,))
 
+@replica_read
 def get_vendor_items(vendor_id: int):
     cur = mysql.connection.cursor()
     cur.execute("""
@@ -225,35 +340,34 @@ def check_for_user_with_hint(credential: str, password_plain: str, hint: str) ->
 
 
 # Orders
-def add_order(order: Order):
-    cur = mysql.connection.cursor()
-    cur.execute("""
-        INSERT INTO orders (customer_id, orderStatus, orderDate, billingAddressID, deliveryAddressID)
-        VALUES (%s, %s, %s, %s, %s)
-    """, (
-        order.customer_id,
-        order.orderStatus.value if hasattr(order.orderStatus, "value") else str(order.orderStatus),
-        order.orderDate or datetime.now(),
-        order.billingAddressID,
-        order.deliveryAddressID,
-        
-    ))
-    order_id = cur.lastrowid
-
-    # Snapshot price from artworks into order_item.unitPrice
-    for li in order.items:
-        cur.execute("SELECT pricePerWeek FROM artworks WHERE artwork_id=%s;", (li.artwork_id,))
-        r = cur.fetchone()
-        unit = Decimal(str(r['pricePerWeek'])) if r else Decimal("0.00")
+@primary_write
+def add_order(order: Order) -> int:
+    with transaction() as cur:
         cur.execute("""
-            INSERT INTO order_item (order_id, artwork_id, quantity, rentalDuration, unitPrice)
+            INSERT INTO orders (customer_id, orderStatus, orderDate, billingAddressID, deliveryAddressID)
             VALUES (%s, %s, %s, %s, %s)
-        """, (order_id, li.artwork_id, li.quantity, li.rentalDuration, unit))
+        """, (
+            order.customer_id,
+            order.orderStatus.value if hasattr(order.orderStatus, "value") else str(order.orderStatus),
+            order.orderDate or datetime.now(),
+            order.billingAddressID,
+            order.deliveryAddressID,
+        ))
+        order_id = cur.lastrowid
 
-    mysql.connection.commit()
-    cur.close()
+        # Snapshot price from artworks into order_item.unitPrice
+        for li in order.items:
+            cur.execute("SELECT pricePerWeek FROM artworks WHERE artwork_id=%s;", (li.artwork_id,))
+            r = cur.fetchone()
+            unit = Decimal(str(r['pricePerWeek'])) if r else Decimal("0.00")
+            cur.execute("""
+                INSERT INTO order_item (order_id, artwork_id, quantity, rentalDuration, unitPrice)
+                VALUES (%s, %s, %s, %s, %s)
+            """, (order_id, li.artwork_id, li.quantity, li.rentalDuration, unit))
+    return order_id
 
 
+@replica_read
 def get_all_vendors(limit: Optional[int] = None) -> List[dict]:
     cur = mysql.connection.cursor()
     sql = """
@@ -270,6 +384,7 @@ def get_all_vendors(limit: Optional[int] = None) -> List[dict]:
     cur.close()
     return rows
 
+@replica_read
 def get_latest_artworks(limit: Optional[int] = None, category_id: Optional[int] = None) -> List[dict]:
     cur = mysql.connection.cursor()
     sql = """
@@ -293,22 +408,26 @@ def get_latest_artworks(limit: Optional[int] = None, category_id: Optional[int]
 
 
 
+@primary_write
 def publish_artwork(artwork_id: int) -> None:
-    cur = mysql.connection.cursor()
-    cur.execute("UPDATE artworks SET availabilityStatus='Listed' WHERE artwork_id=%s;", (artwork_id,))
-    mysql.connection.commit(); cur.close()
+    with transaction() as cur:
+        cur.execute("UPDATE artworks SET availabilityStatus='Listed' WHERE artwork_id=%s;", (artwork_id,))
+        catalog_changed.send(current_app._get_current_object(), artwork_ids=[artwork_id])
 
+@primary_write
 def delete_artwork(artwork_id: int, vendor_id: int) -> None:
-    cur = mysql.connection.cursor()
-    cur.execute("DELETE FROM artworks WHERE artwork_id=%s AND vendor_id=%s;", (artwork_id, vendor_id,))
-    mysql.connection.commit(); cur.close()
+    with transaction() as cur:
+        cur.execute("DELETE FROM artworks WHERE artwork_id=%s AND vendor_id=%s;", (artwork_id, vendor_id,))
+        catalog_changed.send(current_app._get_current_object(), artwork_ids=[artwork_id])
 
 
+@primary_write
 def archive_artwork(artwork_id: int) -> None:
-    cur = mysql.connection.cursor()
-    cur.execute("UPDATE artworks SET availabilityStatus='Unlisted' WHERE artwork_id=%s;", (artwork_id,))
-    mysql.connection.commit(); cur.close()
+    with transaction() as cur:
+        cur.execute("UPDATE artworks SET availabilityStatus='Unlisted' WHERE artwork_id=%s;", (artwork_id,))
+        catalog_changed.send(current_app._get_current_object(), artwork_ids=[artwork_id])
 
+@replica_read
 def generate_kpi(vendor_id: int) -> dict:
     cur = mysql.connection.cursor()
 
@@ -322,16 +441,16 @@ def generate_kpi(vendor_id: int) -> dict:
     """, (vendor_id,))
     inv = cur.fetchone() or {"totalItems": 0, "activeItems": 0}
 
-    # Sales KPIs (Confirmed orders only) and distinct customers
-    cur.execute("""
+    # Sales KPIs (Confirmed orders only) and distinct customers, over the archive too
+    cur.execute(f"""
         SELECT
             COUNT(DISTINCT oi.order_id) AS ordersCnt,
             COUNT(DISTINCT o.customer_id) AS customersCnt,
             COALESCE(SUM(oi.quantity), 0) AS itemsLeased,
             COALESCE(SUM(oi.unitPrice * oi.quantity * COALESCE(oi.rentalDuration, 1)), 0) AS revenue
-        FROM order_item oi
+        FROM {order_items_source()} oi
         JOIN artworks a ON a.artwork_id = oi.artwork_id
-        JOIN orders   o ON o.order_id    = oi.order_id
+        JOIN {orders_source()} o ON o.order_id = oi.order_id
         WHERE a.vendor_id = %s
           AND o.orderStatus = 'Confirmed'
           AND o.customer_id IS NOT NULL
@@ -349,6 +468,7 @@ def generate_kpi(vendor_id: int) -> dict:
     }
 
 
+@primary_write
 def ensure_address(
     streetNumber: str,
     streetName: str,
@@ -360,80 +480,72 @@ def ensure_address(
     country = (country or "Australia").strip()
     p = lambda s: (s or "").strip().lower()
 
-    cur = mysql.connection.cursor()
-    cur.execute("""
-        SELECT address_id
-          FROM addresses
-         WHERE LOWER(TRIM(streetNumber))=%s
-           AND LOWER(TRIM(streetName))=%s
-           AND LOWER(TRIM(city))=%s
-           AND LOWER(TRIM(state))=%s
-           AND LOWER(TRIM(postcode))=%s
-           AND LOWER(TRIM(country))=%s
-         LIMIT 1
-    """, (p(streetNumber), p(streetName), p(city), p(state), p(postcode), p(country)))
-    row = cur.fetchone()
-    if row:
-        cur.close()
-        return row["address_id"]
+    with transaction() as cur:
+        cur.execute("""
+            SELECT address_id
+              FROM addresses
+             WHERE LOWER(TRIM(streetNumber))=%s
+               AND LOWER(TRIM(streetName))=%s
+               AND LOWER(TRIM(city))=%s
+               AND LOWER(TRIM(state))=%s
+               AND LOWER(TRIM(postcode))=%s
+               AND LOWER(TRIM(country))=%s
+             LIMIT 1
+        """, (p(streetNumber), p(streetName), p(city), p(state), p(postcode), p(country)))
+        row = cur.fetchone()
+        if row:
+            return row["address_id"]
 
-    cur.execute("""
-        INSERT INTO addresses (streetNumber, streetName, city, state, postcode, country)
-        VALUES (%s,%s,%s,%s,%s,%s)
-    """, (streetNumber.strip(), streetName.strip(), city.strip(), state.strip(), postcode.strip(), country.strip()))
-    mysql.connection.commit()
-    addr_id = cur.lastrowid
-    cur.close()
-    return addr_id
+        cur.execute("""
+            INSERT INTO addresses (streetNumber, streetName, city, state, postcode, country)
+            VALUES (%s,%s,%s,%s,%s,%s)
+        """, (streetNumber.strip(), streetName.strip(), city.strip(), state.strip(), postcode.strip(), country.strip()))
+        return cur.lastrowid
 
 
-def register_account(form) -> int:
+@primary_write
+def register_account(form, picture_link: Optional[str] = None) -> int:
+    # picture_link: vendors' uploaded profile picture, already in the image store
     role = (form.account_type.data or "customer").strip().lower()
     if role not in ("customer", "vendor"):
         raise ValueError("Invalid account type")
 
-    # 1) Address (required)
-    addr_id = ensure_address(
-        form.streetNumber.data.strip(),
-        form.streetName.data.strip(),
-        form.city.data.strip(),
-        form.state.data.strip(),
-        form.postcode.data.strip(),
-        form.country.data.strip()
-    )
-    ...
-
-
-    # 2) Person row
-    cur = mysql.connection.cursor()
     pw = _hash(form.password.data)
 
-    if role == "customer":
-        cur.execute("""
-            INSERT INTO customers (email, phone, customer_password, firstName, lastName, address_id, newsletterSubscription)
-            VALUES (%s,%s,%s,%s,%s,%s,%s)
-        """, (
-            form.email.data.strip(), form.phone.data.strip(), pw,
-            form.firstname.data.strip(), form.surname.data.strip(), addr_id,
-            1 if getattr(form, "newsletterSubscription", None) and form.newsletterSubscription.data else 0
-        ))
-        new_id = cur.lastrowid
-    else:
-        # Vendor requires artisticName, bio, profilePictureLink (validated in form)
-        cur.execute("""
-            INSERT INTO vendors (email, phone, vendor_password, firstName, lastName, address_id,
-                                 artisticName, bio, profilePictureLink)
-            VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s)
-        """, (
-            form.email.data.strip(), form.phone.data.strip(), pw,
-            form.firstname.data.strip(), form.surname.data.strip(), addr_id,
-            form.artisticName.data.strip(), form.bio.data.strip(), form.profilePictureLink.data.strip()
-        ))
-        new_id = cur.lastrowid
-
-    mysql.connection.commit()
-    cur.close()
-    return new_id
+    # Address and account commit together: no orphan address if the insert fails
+    with transaction() as cur:
+        # 1) Address (required)
+        addr_id = ensure_address(
+            form.streetNumber.data.strip(),
+            form.streetName.data.strip(),
+            form.city.data.strip(),
+            form.state.data.strip(),
+            form.postcode.data.strip(),
+            form.country.data.strip()
+        )
+
+        # 2) Person row
+        if role == "customer":
+            cur.execute("""
+                INSERT INTO customers (email, phone, customer_password, firstName, lastName, address_id, newsletterSubscription)
+                VALUES (%s,%s,%s,%s,%s,%s,%s)
+            """, (
+                form.email.data.strip(), form.phone.data.strip(), pw,
+                form.firstname.data.strip(), form.surname.data.strip(), addr_id,
+                1 if getattr(form, "newsletterSubscription", None) and form.newsletterSubscription.data else 0
+            ))
+        else:
+            # Vendor requires artisticName, bio, a profile picture (validated in form)
+            cur.execute("""
+                INSERT INTO vendors (email, phone, vendor_password, firstName, lastName, address_id,
+                                     artisticName, bio, profilePictureLink)
+                VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s)
+            """, (
+                form.email.data.strip(), form.phone.data.strip(), pw,
+                form.firstname.data.strip(), form.surname.data.strip(), addr_id,
+                form.artisticName.data.strip(), form.bio.data.strip(), picture_link
+            ))
+        return cur.lastrowid
 
 
 def email_phone_in_use(role: str, email: str, phone: str) -> Tuple[bool, bool]:
@@ -461,14 +573,15 @@ def email_phone_in_use(role: str, email: str, phone: str) -> Tuple[bool, bool]:
 
 
 
+@replica_read
 def get_listed_artworks_for_category_with_details(category_id: int) -> List[dict]:
     
     cur = mysql.connection.cursor()
-    cur.execute("""
+    cur.execute(f"""
         SELECT
             a.artwork_id,
             a.title,
-            a.itemDescription,
+            {_DESCRIPTION_PREVIEW_SQL},
             a.pricePerWeek,
             a.vendor_id,
             a.category_id,
@@ -487,6 +600,7 @@ def get_listed_artworks_for_category_with_details(category_id: int) -> List[dict
     cur.close()
     return items
 
+@replica_read
 def get_customer_postcode(customer_id: int) -> Optional[str]:
     
     cur = mysql.connection.cursor()
@@ -503,6 +617,7 @@ def get_customer_postcode(customer_id: int) -> Optional[str]:
         return row.get('postcode')
     return None
 
+@replica_read
 def get_customer_address_details(customer_id: int) -> Optional[dict]:
     
     cur = mysql.connection.cursor()
@@ -517,11 +632,13 @@ def get_customer_address_details(customer_id: int) -> Optional[dict]:
     cur.close()
     return row
 
+@replica_read
 def get_artworks_for_vendor_gallery(vendor_id: int) -> List[dict]:
   
     cur = mysql.connection.cursor()
-    cur.execute("""
-        SELECT a.*, c.categoryName
+    cur.execute(f"""
+        SELECT a.artwork_id, a.vendor_id, a.category_id, a.title, {_DESCRIPTION_PREVIEW_SQL},
+               a.pricePerWeek, a.imageLink, a.availabilityStatus, c.categoryName
           FROM artworks a
           LEFT JOIN categories c ON c.category_id = a.category_id
          WHERE a.vendor_id = %s
@@ -537,27 +654,30 @@ def get_artworks_for_vendor_gallery(vendor_id: int) -> List[dict]:
     cur.close()
     return items
 
-def add_artwork_from_form(form: ArtworkForm) -> None:
-    
+@primary_write
+def add_artwork_from_form(form: ArtworkForm, image_link: str) -> None:
+    # image_link: the uploaded image's link in the image store (project/images.py)
     category_id = form.category_id.data if form.category_id.data != 0 else None
-    cur = mysql.connection.cursor()
-    cur.execute("""
-        INSERT INTO artworks (
-            vendor_id, category_id, title, itemDescription, pricePerWeek,
-            imageLink, availabilityStartDate, availabilityEndDate,
-            maxQuantity, availabilityStatus
-        ) VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
-    """, (
-        form.vendor_id.data, category_id, form.title.data, form.itemDescription.data,
-        str(form.pricePerWeek.data), form.imageLink.data,
-        form.availabilityStartDate.data, form.availabilityEndDate.data,
-        form.maxQuantity.data, form.availabilityStatus.data
-    ))
-    mysql.connection.commit()
-    cur.close()
+    with transaction() as cur:
+        cur.execute("""
+            INSERT INTO artworks (
+                vendor_id, category_id, title, itemDescription, pricePerWeek,
+                imageLink, availabilityStartDate, availabilityEndDate,
+                maxQuantity, availabilityStatus
+            ) VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
+        """, (
+            form.vendor_id.data, category_id, form.title.data, form.itemDescription.data,
+            str(form.pricePerWeek.data), image_link,
+            form.availabilityStartDate.data, form.availabilityEndDate.data,
+            form.maxQuantity.data, form.availabilityStatus.data
+        ))
+        artwork_id = cur.lastrowid
+        catalog_changed.send(current_app._get_current_object(), artwork_ids=[artwork_id])
 
-def admin_get_orders(order_id: Optional[int] = None) -> List[dict]:
-    
+@replica_read
+def admin_get_orders(order_id: Optional[int] = None, archived: bool = False) -> List[dict]:
+    # Hot table by default; archived=True lists the (read-only) archive instead
+    source = "orders_archive" if archived else "orders"
     where = "WHERE o.order_id=%s" if order_id else ""
     params = (order_id,) if order_id else ()
     
@@ -566,7 +686,7 @@ def admin_get_orders(order_id: Optional[int] = None) -> List[dict]:
         SELECT o.order_id, o.customer_id, o.orderStatus, o.orderDate,
                o.billingAddressID, o.deliveryAddressID,
                c.firstName, c.lastName, c.email, c.phone
-          FROM orders o
+          FROM {source} o
           LEFT JOIN customers c ON c.customer_id = o.customer_id
           {where}
          ORDER BY o.orderDate DESC, o.order_id DESC
@@ -575,8 +695,10 @@ def admin_get_orders(order_id: Optional[int] = None) -> List[dict]:
     cur.close()
     return orders
 
-def admin_get_order_items(order_id: Optional[int] = None) -> List[dict]:
+@replica_read
+def admin_get_order_items(order_id: Optional[int] = None, archived: bool = False) -> List[dict]:
     
+    source = "order_item_archive" if archived else "order_item"
     where_items = "WHERE oi.order_id=%s" if order_id else ""
     params = (order_id,) if order_id else ()
 
@@ -590,7 +712,7 @@ def admin_get_order_items(order_id: Optional[int] = None) -> List[dict]:
           oi.rentalDuration,
           oi.unitPrice,
           a.title AS artworkTitle
-        FROM order_item oi
+        FROM {source} oi
         LEFT JOIN artworks a ON a.artwork_id = oi.artwork_id
         {where_items}
         ORDER BY oi.order_id DESC, oi.orderItem_id ASC
@@ -599,6 +721,7 @@ def admin_get_order_items(order_id: Optional[int] = None) -> List[dict]:
     cur.close()
     return order_items
 
+@replica_read
 def admin_get_order_statuses() -> List[str]:
     
     cur = mysql.connection.cursor()
@@ -607,6 +730,7 @@ def admin_get_order_statuses() -> List[str]:
     cur.close()
     return statuses
 
+@primary_write
 def admin_update_order(order_id: int, cols: dict) -> None:
     
     sets, params = [], []
@@ -616,11 +740,13 @@ def admin_update_order(order_id: int, cols: dict) -> None:
             params.append(v)
     if sets:
         params.append(order_id)
-        cur = mysql.connection.cursor()
-        cur.execute(f"UPDATE orders SET {', '.join(sets)} WHERE order_id=%s", tuple(params))
-        mysql.connection.commit()
-        cur.close()
+        with transaction() as cur:
+            # Rebuild the sales rollup for the old and (if the date moved) new day
+            mark_orders_dirty(cur, [order_id])
+            cur.execute(f"UPDATE orders SET {', '.join(sets)} WHERE order_id=%s", tuple(params))
+            mark_orders_dirty(cur, [order_id])
 
+@primary_write
 def admin_update_order_item(order_item_id: int, cols: dict) -> None:
     
     sets, params = [], []
@@ -630,11 +756,13 @@ def admin_update_order_item(order_item_id: int, cols: dict) -> None:
             params.append(v)
     if sets:
         params.append(order_item_id)
-        cur = mysql.connection.cursor()
-        cur.execute(f"UPDATE order_item SET {', '.join(sets)} WHERE orderItem_id=%s", tuple(params))
-        mysql.connection.commit()
-        cur.close()
+        with transaction() as cur:
+            cur.execute("SELECT order_id FROM order_item WHERE orderItem_id=%s", (order_item_id,))
+            row = cur.fetchone()
+            cur.execute(f"UPDATE order_item SET {', '.join(sets)} WHERE orderItem_id=%s", tuple(params))
+            mark_orders_dirty(cur, [row['order_id'] if row else None, cols.get('order_id')])
 
+@replica_read
 def get_vendor_artwork(artwork_id: int, vendor_id: int) -> Optional[dict]:
     
     cur = mysql.connection.cursor()
@@ -649,46 +777,42 @@ def get_vendor_artwork(artwork_id: int, vendor_id: int) -> Optional[dict]:
     cur.close()
     return row
 
-def update_artwork_from_form(form: ArtworkForm, artwork_id: int, vendor_id: int) -> None:
-    
+@primary_write
+def update_artwork_from_form(form: ArtworkForm, artwork_id: int, vendor_id: int,
+                             image_link: Optional[str] = None) -> None:
+    # image_link None keeps the current image
     category_id = form.category_id.data if form.category_id.data != 0 else None
-    cur = mysql.connection.cursor()
-    cur.execute("""
-        UPDATE artworks
-           SET category_id=%s,
-               title=%s,
-               itemDescription=%s,
-               pricePerWeek=%s,
-               imageLink=%s,
-               availabilityStartDate=%s,
-               availabilityEndDate=%s,
-               maxQuantity=%s,
-               availabilityStatus=%s
-         WHERE artwork_id=%s AND vendor_id=%s
-    """, (
-        category_id,
-        form.title.data,
-        form.itemDescription.data,
-        str(form.pricePerWeek.data),
-        form.imageLink.data,
-        form.availabilityStartDate.data,
-        form.availabilityEndDate.data,
-        form.maxQuantity.data,
-        form.availabilityStatus.data,
-        artwork_id, vendor_id
-    ))
-    mysql.connection.commit()
-    cur.close()
+    with transaction() as cur:
+        cur.execute("""
+            UPDATE artworks
+               SET category_id=%s,
+                   title=%s,
+                   itemDescription=%s,
+                   pricePerWeek=%s,
+                   imageLink=COALESCE(%s, imageLink),
+                   availabilityStartDate=%s,
+                   availabilityEndDate=%s,
+                   maxQuantity=%s,
+                   availabilityStatus=%s
+             WHERE artwork_id=%s AND vendor_id=%s
+        """, (
+            category_id,
+            form.title.data,
+            form.itemDescription.data,
+            str(form.pricePerWeek.data),
+            image_link,
+            form.availabilityStartDate.data,
+            form.availabilityEndDate.data,
+            form.maxQuantity.data,
+            form.availabilityStatus.data,
+            artwork_id, vendor_id
+        ))
+        catalog_changed.send(current_app._get_current_object(), artwork_ids=[artwork_id])
 
 def _get_artwork_constraints(artwork_id: int) -> Optional[dict]:
     """Fetch maxQuantity + availability window + status for a single artwork."""
     cur = mysql.connection.cursor()
-    cur.execute("""
-        SELECT maxQuantity, availabilityStartDate, availabilityEndDate, availabilityStatus
-          FROM artworks
-         WHERE artwork_id = %s
-         LIMIT 1
-    """, (artwork_id,))
+    ARTWORK_CONSTRAINTS.execute(cur, (artwork_id,))
     row = cur.fetchone()
     cur.close()
     return row or None
@@ -0,0 +1,221 @@
+"""
+Facet counts for the homepage filters, from bitmaps held in memory.
+
+Every artwork has a row; each category, status and price bucket has a
+packed bitmap (uint64 words, bit r = row r). The count for a facet value
+under the current filters is a bitwise AND of the other filters' bitmaps
+with the value's bitmap, followed by a popcount. No SQL runs per page.
+
+Like the search suggestions, each worker builds the bitmaps on first use.
+It then follows the catalog_changes log (project/catalog_changes.py) and
+flips only the bits of changed artworks. Updates copy the bitmaps and swap
+in a new snapshot, so readers always see a consistent one.
+"""
+import threading
+from bisect import bisect_right
+from decimal import Decimal
+from functools import reduce
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from flask import current_app
+
+from . import mysql
+from .catalog_changes import Watermark, changes_since, follow, start_watcher, start_watermark
+
+STATUSES = ('Listed', 'Leased', 'Unlisted')
+PRICE_BUCKETS = (0, 25, 50, 100, 200)   # AUD lower bounds; the last bucket is open-ended
+_BUCKET_CENTS = tuple(b * 100 for b in PRICE_BUCKETS)
+
+Key = Tuple[str, int]                   # ('category', id) | ('status', index) | ('bucket', index)
+
+
+def _cents(price) -> int:
+    return int((Decimal(str(price or 0)) * 100).to_integral_value())
+
+
+def _popcount(bitmap: np.ndarray) -> int:
+    return int(np.bitwise_count(bitmap).sum())
+
+
+def price_buckets() -> List[dict]:
+    bounds = PRICE_BUCKETS + (None,)
+    return [{"index": i, "min": lo, "max": hi} for i, (lo, hi) in enumerate(zip(bounds, bounds[1:]))]
+
+
+class _Snapshot:
+    """Row columns plus one bitmap per facet value. Treated as immutable once published."""
+    __slots__ = ('size', 'row_of', 'price_cents', 'bitmaps', 'row_keys')
+
+    def __init__(self, capacity: int):
+        self.size = 0
+        self.row_of: Dict[int, int] = {}
+        self.price_cents = np.zeros(capacity, dtype=np.int64)
+        self.bitmaps: Dict[Key, np.ndarray] = {}
+        self.row_keys: List[Tuple[Key, ...]] = []     # bitmaps each row is set in
+
+    @property
+    def words(self) -> int:
+        return len(self.price_cents) // 64
+
+    def copy(self, capacity: Optional[int] = None) -> '_Snapshot':
+        capacity = capacity or len(self.price_cents)
+        new = _Snapshot(capacity)
+        new.size = self.size
+        new.row_of = dict(self.row_of)
+        new.price_cents[:self.size] = self.price_cents[:self.size]
+        words = capacity // 64
+        for key, bitmap in self.bitmaps.items():
+            grown = np.zeros(words, dtype=np.uint64)
+            grown[:len(bitmap)] = bitmap
+            new.bitmaps[key] = grown
+        new.row_keys = list(self.row_keys)
+        return new
+
+    def set_row(self, artwork_id: int, price, category_id: Optional[int], status: Optional[str]) -> None:
+        """Insert or update one artwork; status None removes it from every bitmap."""
+        row = self.row_of.get(artwork_id)
+        if row is None:
+            row = self.size
+            self.row_of[artwork_id] = row
+            self.row_keys.append(())
+            self.size += 1
+        word, bit = row >> 6, np.uint64(1 << (row & 63))
+
+        for key in self.row_keys[row]:
+            self.bitmaps[key][word] &= ~bit
+        keys: Tuple[Key, ...] = ()
+        if status in STATUSES:
+            cents = _cents(price)
+            self.price_cents[row] = cents
+            keys = (('status', STATUSES.index(status)),
+                    ('bucket', bisect_right(_BUCKET_CENTS, cents) - 1))
+            if category_id:
+                keys += (('category', int(category_id)),)
+        for key in keys:
+            bitmap = self.bitmaps.get(key)
+            if bitmap is None:
+                bitmap = self.bitmaps[key] = np.zeros(self.words, dtype=np.uint64)
+            bitmap[word] |= bit
+        self.row_keys[row] = keys
+
+    def price_mask(self, min_price: Optional[float], max_price: Optional[float]) -> np.ndarray:
+        prices = self.price_cents
+        mask = np.ones(len(prices), dtype=bool)
+        if min_price is not None:
+            mask &= prices >= round(min_price * 100)
+        if max_price is not None:
+            mask &= prices <= round(max_price * 100)
+        return np.packbits(mask, bitorder='little').view('<u8')
+
+
+class FacetIndex:
+    def __init__(self):
+        self._snap = _Snapshot(64)
+        self._lock = threading.Lock()
+        self.watermark: Optional[Watermark] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.watermark is not None
+
+    def apply(self, rows: Iterable[tuple], removed: Iterable[int] = ()) -> None:
+        """rows: (artwork_id, price, category_id, status). Publishes a new snapshot."""
+        rows, removed = list(rows), list(removed)
+        with self._lock:
+            snap = self._snap
+            needed = snap.size + len(rows)
+            capacity = len(snap.price_cents)
+            while capacity < needed:
+                capacity *= 2
+            new = snap.copy(capacity)
+            for artwork_id, price, category_id, status in rows:
+                new.set_row(int(artwork_id), price, category_id, status)
+            for artwork_id in removed:
+                if artwork_id in new.row_of:
+                    new.set_row(artwork_id, None, None, None)
+            self._snap = new
+
+    def rebuild(self) -> None:
+        watermark = start_watermark()
+        rows = _load_rows()
+        with self._lock:
+            self._snap = _Snapshot(64)
+        self.apply(rows)
+        self.watermark = watermark
+
+    def sync(self) -> None:
+        if not self.ready:
+            return
+        watermark, artwork_ids = changes_since(self.watermark)
+        if artwork_ids:
+            rows = _load_rows(artwork_ids)
+            self.apply(rows, removed=artwork_ids - {r[0] for r in rows})
+        self.watermark = watermark
+
+    def counts(self, category_id: Optional[int] = None, min_price: Optional[float] = None,
+               max_price: Optional[float] = None, status: Optional[str] = 'Listed') -> dict:
+        """
+        Counts per category, price bucket and status. Each facet is counted
+        under every filter except its own, so the numbers show what picking
+        that value would return.
+        """
+        snap = self._snap
+        empty = np.zeros(snap.words, dtype=np.uint64)
+        filters = {
+            'status': snap.bitmaps.get(('status', STATUSES.index(status)), empty) if status else None,
+            'category': snap.bitmaps.get(('category', category_id), empty) if category_id else None,
+            'bucket': snap.price_mask(min_price, max_price) if (min_price is not None or max_price is not None) else None,
+        }
+
+        def base(without: str) -> Optional[np.ndarray]:
+            active = [b for name, b in filters.items() if name != without and b is not None]
+            return reduce(np.bitwise_and, active) if active else None
+
+        def count(facet: str) -> Dict[int, int]:
+            mask = base(facet)
+            return {value: _popcount(bitmap if mask is None else bitmap & mask)
+                    for (name, value), bitmap in snap.bitmaps.items() if name == facet}
+
+        everything = base('')
+        # Rows never set (or removed) are in no status bitmap
+        in_catalog = reduce(np.bitwise_or, (snap.bitmaps.get(('status', i), empty) for i in range(len(STATUSES))))
+        return {
+            "total": _popcount(in_catalog if everything is None else everything & in_catalog),
+            "category": count('category'),
+            "bucket": count('bucket'),
+            "status": {STATUSES[i]: n for i, n in count('status').items()},
+        }
+
+
+def _load_rows(artwork_ids: Optional[Iterable[int]] = None) -> List[tuple]:
+    sql = "SELECT artwork_id, pricePerWeek, category_id, availabilityStatus FROM artworks"
+    params: tuple = ()
+    if artwork_ids is not None:
+        params = tuple(artwork_ids)
+        sql += f" WHERE artwork_id IN ({', '.join(['%s'] * len(params))})"
+    cur = mysql.connection.cursor()
+    cur.execute(sql, params)
+    rows = [(r['artwork_id'], r['pricePerWeek'], r['category_id'], r['availabilityStatus']) for r in cur.fetchall()]
+    cur.close()
+    return rows
+
+
+_index = FacetIndex()
+_build_lock = threading.Lock()
+
+
+def facet_counts(category_id: Optional[int] = None, min_price: Optional[float] = None,
+                 max_price: Optional[float] = None, status: Optional[str] = 'Listed') -> dict:
+    if not _index.ready:
+        with _build_lock:
+            if not _index.ready:
+                _index.rebuild()
+                follow(_index)
+    start_watcher(current_app._get_current_object())
+    return _index.counts(category_id, min_price, max_price, status)
+
+
+def index_stats() -> dict:
+    """Entry counts for /metrics."""
+    return {"facet_rows": _index._snap.size, "facet_bitmaps": len(_index._snap.bitmaps)}
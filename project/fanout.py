@@ -0,0 +1,81 @@
+"""
+Run independent db.py calls concurrently.
+
+    results = run_parallel({
+        'vendors': partial(get_all_vendors, limit=12),
+        'categories': get_categories,
+    })
+
+Each call runs on a worker thread inside a copy of the current request (or
+app) context, so it gets its own `g` and therefore its own pooled MySQL
+connection. Page latency becomes the slowest query instead of the sum.
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError   # not the builtin before Python 3.11
+from typing import Callable, Dict, Optional, Union
+
+from flask import current_app, copy_current_request_context, has_request_context
+
+from .profiling import current_profiler
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_pid: Optional[int] = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor, _executor_pid
+    # Threads do not survive a fork; build a fresh pool in each worker process
+    if _executor is None or _executor_pid != os.getpid():
+        _executor = ThreadPoolExecutor(
+            max_workers=current_app.config.get("FANOUT_MAX_WORKERS", 8),
+            thread_name_prefix="fanout",
+        )
+        _executor_pid = os.getpid()
+    return _executor
+
+
+def _in_context(func: Callable) -> Callable:
+    if has_request_context():
+        func = copy_current_request_context(func)
+        profiler = current_profiler()
+        # A profiled request's samples include its fan-out threads (project/profiling.py)
+        return profiler.track(func) if profiler is not None else func
+    app = current_app._get_current_object()
+
+    def wrapper():
+        with app.app_context():
+            return func()
+    return wrapper
+
+
+def run_parallel(calls: Dict[str, Callable], timeout: Union[float, Dict[str, float], None] = None) -> dict:
+    """
+    Run each zero-argument callable in `calls` concurrently and return
+    {name: result}. `timeout` (seconds) is either one value for every call or
+    a per-name dict; a call that overruns raises TimeoutError. Exceptions
+    raised by a call are re-raised here, and calls that have not started yet
+    are cancelled.
+    """
+    if timeout is None:
+        timeout = current_app.config.get("FANOUT_TIMEOUT", 10)
+
+    executor = _get_executor()
+    started = time.monotonic()
+    futures = {name: executor.submit(_in_context(func)) for name, func in calls.items()}
+
+    results = {}
+    try:
+        for name, future in futures.items():
+            limit = timeout.get(name) if isinstance(timeout, dict) else timeout
+            remaining = None if limit is None else max(0.0, started + limit - time.monotonic())
+            try:
+                results[name] = future.result(timeout=remaining)
+            except TimeoutError:
+                raise TimeoutError(f"Parallel call '{name}' exceeded {limit}s") from None
+    except BaseException:
+        # The request has failed: free the queued calls' slots (running ones cannot be stopped)
+        for future in futures.values():
+            future.cancel()
+        raise
+    return results
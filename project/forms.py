@@ -1,6 +1,8 @@
 import re
 
+from flask import current_app
 from flask_wtf import FlaskForm
+from flask_wtf.file import FileField, FileRequired
 from wtforms import (
     StringField, PasswordField, TextAreaField, SubmitField, RadioField,
     SelectField, IntegerField, DecimalField, DateField, BooleanField,
@@ -11,6 +13,25 @@ from wtforms.validators import (
     EqualTo, AnyOf, ValidationError
 )
 
+from project.images import sniff
+
+
+def image_file(form, field):
+    # Checked by content, not by file name; the store strips metadata (project/images.py)
+    upload = field.data
+    if not upload:
+        return
+    stream = upload.stream
+    head = stream.read(16)
+    stream.seek(0, 2)
+    size = stream.tell()
+    stream.seek(0)
+    if sniff(head) is None:
+        raise ValidationError("Upload a JPEG, PNG or WebP image.")
+    limit = current_app.config.get('MAX_IMAGE_BYTES', 5 * 1024 * 1024)
+    if size > limit:
+        raise ValidationError(f"Images can be at most {limit // (1024 * 1024)} MB.")
+
 
 
 class CheckoutForm(FlaskForm):
@@ -119,7 +140,7 @@ class RegisterForm(FlaskForm):
     # Vendor-only fields (required for vendors)
     artisticName       = StringField("Artistic / Studio name", validators=[Length(max=100)])
     bio                = TextAreaField("Short bio")
-    profilePictureLink = StringField("Profile picture", validators=[Length(max=255)])
+    profilePictureLink = FileField("Profile picture", validators=[image_file])
 
     submit = SubmitField("Create account")
 
@@ -170,7 +191,7 @@ class ArtworkForm(FlaskForm):
     title       = StringField("Title", validators=[DataRequired(), Length(max=100)])
     itemDescription = TextAreaField("Description", validators=[DataRequired()])
     pricePerWeek    = DecimalField("Price per week (AUD)", places=2, validators=[DataRequired(), NumberRange(min=0)])
-    imageLink       = StringField("Image", validators=[DataRequired(), Length(max=255)])
+    imageLink       = FileField("Image", validators=[image_file])   # optional when editing
     availabilityStartDate = DateField("Available from", validators=[Optional()], format="%Y-%m-%d",
                                       render_kw={"type": "date"})
     availabilityEndDate   = DateField("Available until", validators=[Optional()], format="%Y-%m-%d",
@@ -188,4 +209,8 @@ class ArtworkForm(FlaskForm):
             end   = field.data
             # Only validate if both dates are present
             if start and end and end < start:
-                raise ValidationError("Available until must be on or after 'Available from'.")
\ No newline at end of file
+                raise ValidationError("Available until must be on or after 'Available from'.")
+
+
+class NewArtworkForm(ArtworkForm):
+    imageLink = FileField("Image", validators=[FileRequired("Choose an image."), image_file])
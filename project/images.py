@@ -0,0 +1,227 @@
+"""
+Content-addressed image store for artwork and vendor pictures.
+
+Uploads are checked by their magic bytes (JPEG, PNG or WebP only), have
+their metadata removed (EXIF/XMP/IPTC, comments, PNG text chunks) and are
+saved under IMAGE_STORE_DIR as <sha256>.<ext> of the cleaned bytes. The same
+picture uploaded twice, even with different EXIF, is stored once.
+
+The database keeps 'media/<sha256>.<ext>' in imageLink/profilePictureLink.
+Older rows still hold paths under static/; templates resolve both with
+image_url(). Files never change once written, so the /media/ route lets
+browsers and proxies cache them for a year. `flask --app project
+ingest-images` moves the existing static images into the store.
+"""
+import hashlib
+import os
+import re
+import tempfile
+from typing import Optional, Tuple
+
+from flask import current_app, url_for
+from werkzeug.security import safe_join
+
+from . import mysql
+
+MIME_TYPES = {'jpg': 'image/jpeg', 'png': 'image/png', 'webp': 'image/webp'}
+MEDIA_PREFIX = 'media/'
+MEDIA_NAME = re.compile(r'^([0-9a-f]{64})\.(jpg|png|webp)$')
+
+# APP1 (EXIF/XMP), APP3-APP13 (vendor data, IPTC), APP15 and comments; APP0 (JFIF),
+# APP2 (ICC colour profile) and APP14 (Adobe colour transform) affect rendering
+_JPEG_DROP = {0xE1, *range(0xE3, 0xEE), 0xEF, 0xFE}
+_PNG_DROP = {b'tEXt', b'zTXt', b'iTXt', b'eXIf', b'tIME'}
+_WEBP_DROP = {b'EXIF', b'XMP '}
+
+
+class ImageError(ValueError):
+    pass
+
+
+def sniff(head: bytes) -> Optional[str]:
+    """File extension for the image format in `head` (first 12+ bytes), or None."""
+    if head.startswith(b'\xff\xd8\xff'):
+        return 'jpg'
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'png'
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+
+# Metadata stripping: walk the container's segments and copy all but metadata
+
+def _strip_jpeg(data: bytes) -> bytes:
+    out = bytearray(data[:2])            # SOI
+    i = 2
+    while i + 4 <= len(data):
+        if data[i] != 0xFF:
+            raise ImageError("Corrupt JPEG file.")
+        marker = data[i + 1]
+        if marker == 0xFF:               # fill byte
+            i += 1
+            continue
+        if marker == 0xDA:               # start of scan: the rest is image data
+            out += data[i:]
+            return bytes(out)
+        if 0xD0 <= marker <= 0xD7 or marker == 0x01:
+            out += data[i:i + 2]
+            i += 2
+            continue
+        length = int.from_bytes(data[i + 2:i + 4], 'big')
+        if length < 2:                   # the length counts its own two bytes
+            raise ImageError("Corrupt JPEG file.")
+        end = i + 2 + length
+        if marker not in _JPEG_DROP:
+            out += data[i:end]
+        i = end
+    raise ImageError("Truncated JPEG file.")
+
+
+def _strip_png(data: bytes) -> bytes:
+    out = bytearray(data[:8])            # signature
+    i = 8
+    while i + 12 <= len(data):
+        length = int.from_bytes(data[i:i + 4], 'big')
+        kind = data[i + 4:i + 8]
+        end = i + 12 + length            # length, type, data, CRC
+        if end > len(data):
+            break
+        if kind not in _PNG_DROP:
+            out += data[i:end]
+        if kind == b'IEND':
+            return bytes(out)
+        i = end
+    raise ImageError("Truncated PNG file.")
+
+
+def _strip_webp(data: bytes) -> bytes:
+    out = bytearray(data[:12])           # RIFF, size, WEBP
+    i = 12
+    while i + 8 <= len(data):
+        kind = data[i:i + 4]
+        size = int.from_bytes(data[i + 4:i + 8], 'little')
+        end = i + 8 + size
+        end += end & 1                   # chunks are padded to even sizes
+        if end > len(data) + 1:
+            raise ImageError("Truncated WebP file.")
+        if kind == b'VP8X':
+            if size < 10:                # flags, reserved, canvas width and height
+                raise ImageError("Corrupt WebP file.")
+            chunk = bytearray(data[i:end])
+            chunk[8] &= ~0x0C & 0xFF     # no EXIF / XMP flags
+            out += chunk
+        elif kind not in _WEBP_DROP:
+            out += data[i:end]
+        i = end
+    if len(out) <= 12:
+        raise ImageError("Truncated WebP file.")
+    out[4:8] = (len(out) - 8).to_bytes(4, 'little')
+    return bytes(out)
+
+
+_STRIP = {'jpg': _strip_jpeg, 'png': _strip_png, 'webp': _strip_webp}
+
+
+def clean_image(data: bytes) -> Tuple[bytes, str]:
+    """Validate and strip metadata. Returns (clean bytes, extension)."""
+    ext = sniff(data[:16])
+    if ext is None:
+        raise ImageError("Upload a JPEG, PNG or WebP image.")
+    return _STRIP[ext](data), ext
+
+
+# Store
+
+def store_root() -> str:
+    return current_app.config.get('IMAGE_STORE_DIR') or os.path.join(current_app.instance_path, 'images')
+
+
+def media_path(name: str) -> Optional[str]:
+    """Filesystem path for a stored file name, or None if the name is not one of ours."""
+    m = MEDIA_NAME.match(name)
+    if not m:
+        return None
+    return os.path.join(store_root(), m.group(1)[:2], name)
+
+
+def store_image(data: bytes) -> Tuple[str, bool]:
+    """Store an image by content. Returns (link for the database, True if the file is new)."""
+    clean, ext = clean_image(data)
+    name = f"{hashlib.sha256(clean).hexdigest()}.{ext}"
+    path = media_path(name)
+    if os.path.exists(path):
+        return MEDIA_PREFIX + name, False
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write beside the target and rename, so readers never see a partial file
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(clean)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+    return MEDIA_PREFIX + name, True
+
+
+def save_upload(file) -> str:
+    """Store an uploaded FileStorage; returns its link."""
+    limit = current_app.config.get('MAX_IMAGE_BYTES', 5 * 1024 * 1024)
+    data = file.stream.read(limit + 1)
+    if len(data) > limit:
+        raise ImageError(f"Images can be at most {limit // (1024 * 1024)} MB.")
+    return store_image(data)[0]
+
+
+def image_url(link: Optional[str]) -> str:
+    """URL for an imageLink/profilePictureLink value (store or legacy static path)."""
+    link = link or ''
+    if link.startswith(MEDIA_PREFIX):
+        return url_for('main.media', name=link[len(MEDIA_PREFIX):])
+    return url_for('static', filename=link.lstrip('/'))
+
+
+# Moving legacy static/ images into the store
+
+def ingest_static_images() -> dict:
+    """Store every image still referenced by a static/ path and point the rows at it."""
+    from .db import transaction          # db imports forms, which imports this module
+    from .signals import catalog_changed
+
+    stored = (MEDIA_PREFIX + '%',)
+    cur = mysql.connection.cursor()
+    cur.execute("SELECT artwork_id AS id, imageLink AS link FROM artworks WHERE imageLink NOT LIKE %s", stored)
+    artworks = cur.fetchall()
+    cur.execute("SELECT vendor_id AS id, profilePictureLink AS link FROM vendors "
+                "WHERE profilePictureLink NOT LIKE %s", stored)
+    vendors = cur.fetchall()
+    cur.close()
+
+    stats = {"files": 0, "stored": 0, "duplicates": 0, "skipped": 0}
+    links = {}
+    for old in {r['link'] for r in artworks + vendors if r['link']}:
+        path = safe_join(current_app.static_folder, old.lstrip('/'))
+        if path is None or not os.path.isfile(path):
+            stats["skipped"] += 1
+            continue
+        with open(path, 'rb') as f:
+            data = f.read()
+        try:
+            links[old], created = store_image(data)
+        except ImageError:
+            stats["skipped"] += 1
+            continue
+        stats["files"] += 1
+        stats["stored" if created else "duplicates"] += 1
+
+    changed = [r['id'] for r in artworks if r['link'] in links]
+    with transaction() as cur:
+        for old, new in links.items():
+            cur.execute("UPDATE artworks SET imageLink=%s WHERE imageLink=%s", (new, old))
+            cur.execute("UPDATE vendors SET profilePictureLink=%s WHERE profilePictureLink=%s", (new, old))
+        if changed:
+            catalog_changed.send(current_app._get_current_object(), artwork_ids=changed)
+    return stats
@@ -0,0 +1,170 @@
+"""
+Durable background jobs stored in the `jobs` table.
+
+    @job('order_placed')
+    def order_placed(order_id): ...
+
+    enqueue('order_placed', {'order_id': 42}, key='order_placed:42')
+
+Workers (see worker.py) claim queued jobs with an optimistic UPDATE, so any
+number of worker processes can share the table. Failed jobs are retried with
+exponential backoff until maxAttempts, then left as 'Failed' for inspection.
+An idempotency key makes enqueue() a no-op if that key was already queued.
+"""
+import json
+import os
+import random
+import socket
+import time
+import traceback
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+
+from . import mysql
+from .db import transaction
+
+JOBS: Dict[str, Callable] = {}
+
+BACKOFF_BASE = 5        # seconds; retry n waits BACKOFF_BASE * 2**(n-1)
+BACKOFF_MAX = 3600
+LEASE_SECONDS = 600     # a 'Running' job older than this is assumed orphaned
+
+
+def job(name: str):
+    # Register a function as a job handler under `name`.
+    def decorator(func):
+        JOBS[name] = func
+        return func
+    return decorator
+
+
+def enqueue(name: str, payload: Optional[dict] = None, key: Optional[str] = None,
+            delay: int = 0, max_attempts: int = 5) -> Optional[int]:
+    """
+    Queue a job and return its id. If `key` was used before, nothing is
+    queued and the existing job id is returned. Inside a db.transaction()
+    the job commits with the caller's writes (and is dropped if they roll back).
+    """
+    now = datetime.now()
+    with transaction() as cur:
+        if key:
+            cur.execute("SELECT job_id FROM jobs WHERE idempotencyKey=%s", (key,))
+            row = cur.fetchone()
+            if row:
+                return row['job_id']
+        try:
+            with transaction(savepoint=True) as sp:
+                sp.execute("""
+                    INSERT INTO jobs (jobName, payload, idempotencyKey, jobStatus, attempts, maxAttempts,
+                                      runAfter, createdAt, updatedAt)
+                    VALUES (%s, %s, %s, 'Queued', 0, %s, %s, %s, %s)
+                """, (name, json.dumps(payload or {}), key, max_attempts,
+                      now + timedelta(seconds=delay), now, now))
+                return sp.lastrowid
+        except mysql.connection.IntegrityError:
+            # Lost a race with another request using the same key; only the insert is undone
+            cur.execute("SELECT job_id FROM jobs WHERE idempotencyKey=%s", (key,))
+            row = cur.fetchone()
+            return row['job_id'] if row else None
+
+
+def _backoff(attempts: int) -> int:
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** max(0, attempts - 1))
+    return int(delay * random.uniform(0.8, 1.2))
+
+
+def _worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _requeue_orphans(cur) -> None:
+    cur.execute("""
+        UPDATE jobs SET jobStatus='Queued', lockedBy=NULL, lockedAt=NULL, updatedAt=%s
+         WHERE jobStatus='Running' AND lockedAt < %s
+    """, (datetime.now(), datetime.now() - timedelta(seconds=LEASE_SECONDS)))
+
+
+def claim_next() -> Optional[dict]:
+    """Atomically take one due job for this worker, or return None."""
+    with transaction() as cur:
+        _requeue_orphans(cur)
+        now = datetime.now()
+        cur.execute("""
+            SELECT job_id FROM jobs
+             WHERE jobStatus='Queued' AND runAfter <= %s
+             ORDER BY runAfter, job_id
+             LIMIT 10
+        """, (now,))
+        candidates = [r['job_id'] for r in cur.fetchall()]
+
+        for job_id in candidates:
+            # Only one worker can flip a given row from Queued to Running
+            cur.execute("""
+                UPDATE jobs SET jobStatus='Running', lockedBy=%s, lockedAt=%s,
+                       attempts=attempts+1, updatedAt=%s
+                 WHERE job_id=%s AND jobStatus='Queued'
+            """, (_worker_id(), now, now, job_id))
+            if cur.rowcount == 1:
+                cur.execute("SELECT job_id, jobName, payload, attempts, maxAttempts FROM jobs WHERE job_id=%s",
+                            (job_id,))
+                return cur.fetchone()
+    return None
+
+
+def _finish(job_id: int, status: str, error: Optional[str] = None, retry_in: int = 0) -> None:
+    now = datetime.now()
+    with transaction() as cur:
+        cur.execute("""
+            UPDATE jobs SET jobStatus=%s, lastError=%s, runAfter=%s,
+                   lockedBy=NULL, lockedAt=NULL, updatedAt=%s
+             WHERE job_id=%s
+        """, (status, error, now + timedelta(seconds=retry_in), now, job_id))
+
+
+def run_job(row: dict) -> bool:
+    """Execute a claimed job. Returns True on success."""
+    handler = JOBS.get(row['jobName'])
+    try:
+        if handler is None:
+            raise LookupError(f"No handler registered for job '{row['jobName']}'")
+        handler(**json.loads(row['payload'] or '{}'))
+    except Exception:
+        try:
+            mysql.connection.rollback()
+        except Exception:
+            pass
+        error = traceback.format_exc(limit=5)
+        if row['attempts'] < row['maxAttempts']:
+            _finish(row['job_id'], 'Queued', error, retry_in=_backoff(row['attempts']))
+        else:
+            _finish(row['job_id'], 'Failed', error)
+        return False
+    _finish(row['job_id'], 'Done')
+    return True
+
+
+def work(app, poll_interval: float = 1.0, once: bool = False, should_stop=lambda: False) -> int:
+    """
+    Worker loop: claim and run jobs until should_stop() (or the queue is
+    empty when once=True). Each poll uses a fresh app context so the DB
+    connection is returned between jobs. Returns the number of jobs run.
+    """
+    done = 0
+    while not should_stop():
+        with app.app_context():
+            row = claim_next()
+            if row:
+                run_job(row)
+                done += 1
+                continue
+        if once:
+            break
+        time.sleep(poll_interval)
+    return done
+
+
+def purge_finished(older_than_days: int = 30) -> int:
+    with transaction() as cur:
+        cur.execute("DELETE FROM jobs WHERE jobStatus='Done' AND updatedAt < %s",
+                    (datetime.now() - timedelta(days=older_than_days),))
+        return cur.rowcount
@@ -0,0 +1,206 @@
+"""
+Rate limiting and admission control.
+
+@rate_limit: a token bucket per (name, client) where the client is the IP,
+the session's user, or the route as a whole. Buckets live in a pluggable
+store selected by RATE_LIMIT_STORE:
+    'memory'                   per process (limits multiply with workers)
+    'sqlite:////path/to/file'  shared by every worker on the host
+An empty bucket answers 429 with Retry-After.
+
+Admission control: every request takes a slot in its lane. When in-flight
+requests in this process reach a lane's share of ADMISSION_CAPACITY, the
+request is shed with 503. Capacity defaults to MYSQL_POOL_SIZE, the
+connections this process can hold. Lower lanes give up first, so checkout
+(the 'priority' lane) keeps connections while bulk traffic is turned away.
+Slots are per process because the connection budget is.
+"""
+import math
+import os
+import sqlite3
+import threading
+import time
+from functools import wraps
+from typing import Callable, Dict, Optional, Tuple, Union
+
+from flask import abort, current_app, g, request, session
+
+LANES = {'priority': 1.0, 'default': 0.8, 'bulk': 0.5}   # share of capacity each lane may fill
+
+_PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+
+def parse_rate(rate: str) -> Tuple[float, int]:
+    """'10/minute' -> (tokens per second, burst)."""
+    count, _, period = rate.partition('/')
+    return int(count) / _PERIODS[period.strip().rstrip('s')], int(count)
+
+
+# Bucket stores
+
+class MemoryStore:
+    def __init__(self):
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def take(self, key: str, rate: float, burst: int, cost: float = 1.0) -> Tuple[bool, float]:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > 50_000:
+                self._prune(now, rate)
+        return allowed, 0.0 if allowed else (cost - tokens) / rate
+
+    def _prune(self, now: float, rate: float):
+        # Drop buckets idle long enough to have refilled; they behave like new ones
+        self._buckets = {k: v for k, v in self._buckets.items() if now - v[1] < 3600}
+
+
+class SQLiteStore:
+    """Token buckets in a local SQLite file (WAL), shared by all worker processes."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.execute("CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL, updated REAL)")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def take(self, key: str, rate: float, burst: int, cost: float = 1.0) -> Tuple[bool, float]:
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated FROM buckets WHERE key=?", (key,)).fetchone()
+            tokens = burst if row is None else min(burst, row[0] + (now - row[1]) * rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            conn.execute("INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)",
+                         (key, tokens, now))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return allowed, 0.0 if allowed else (cost - tokens) / rate
+
+
+def make_store(spec: str):
+    if spec.startswith('sqlite:///'):
+        return SQLiteStore(spec[len('sqlite:///'):])
+    if spec == 'memory':
+        return MemoryStore()
+    raise ValueError(f"Unknown RATE_LIMIT_STORE {spec!r}")
+
+
+# Rate limiting
+
+def _client_key(by: str) -> str:
+    if by == 'route':
+        return 'all'
+    if by == 'user':
+        user = session.get('user') or {}
+        if user.get('id'):
+            return f"{user.get('role')}:{user['id']}"
+    return request.remote_addr or 'unknown'
+
+
+def rate_limit(name: str, rate: str, by: str = 'ip', methods: Tuple[str, ...] = (),
+               when: Optional[Callable[[], bool]] = None):
+    """
+    Limit a view to `rate` ('N/second|minute|hour|day') per client. `by` is
+    'ip', 'user' (falls back to ip for guests) or 'route'. Only `methods`
+    count when given; `when` can skip the limit for cheap requests.
+    """
+    per_second, burst = parse_rate(rate)
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if (current_app.config.get('RATE_LIMITS_ENABLED', True)
+                    and (not methods or request.method in methods)
+                    and (when is None or when())):
+                key = f"{name}:{_client_key(by)}"
+                try:
+                    allowed, retry_after = current_app.extensions['rate_limit_store'].take(key, per_second, burst)
+                except Exception:
+                    # A broken store must not take the site down: fail open
+                    current_app.logger.exception("rate limit store failed")
+                    allowed, retry_after = True, 0.0
+                if not allowed:
+                    abort(429, retry_after=math.ceil(retry_after))
+            return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# Admission control
+
+def lane(name_or_func: Union[str, None, Callable[[], str]]):
+    """
+    Put a view in an admission lane ('priority', 'default', 'bulk'), or pick
+    one per request. None exempts views that never touch the database.
+    """
+    def decorator(func):
+        func._admission_lane = name_or_func
+        return func
+    return decorator
+
+
+class Admission:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.shed = 0
+
+    def enter(self, limit: int) -> bool:
+        with self._lock:
+            if self.in_flight >= limit:
+                self.shed += 1
+                return False
+            self.in_flight += 1
+            return True
+
+    def leave(self):
+        with self._lock:
+            self.in_flight -= 1
+
+
+def init_app(app) -> None:
+    app.config.setdefault('RATE_LIMITS_ENABLED', True)
+    app.config.setdefault('RATE_LIMIT_STORE', 'memory')
+    app.config.setdefault('ADMISSION_CAPACITY', None)
+    app.extensions['rate_limit_store'] = make_store(app.config['RATE_LIMIT_STORE'])
+    admission = app.extensions['admission'] = Admission()
+
+    @app.before_request
+    def _admit():
+        view = app.view_functions.get(request.endpoint)
+        if view is None or request.endpoint == 'static':
+            return
+        chosen = getattr(view, '_admission_lane', 'default')
+        chosen = chosen() if callable(chosen) else chosen
+        if chosen is None:
+            return
+        capacity = app.config['ADMISSION_CAPACITY'] or app.config.get('MYSQL_POOL_SIZE', 10)
+        limit = max(1, int(capacity * LANES.get(chosen, LANES['default'])))
+        if not admission.enter(limit):
+            abort(503, retry_after=1)
+        g.admitted = True
+
+    @app.teardown_request
+    def _release(exc):
+        if g.pop('admitted', False):
+            admission.leave()
@@ -0,0 +1,79 @@
+"""
+Row -> model mapping for tuple cursors.
+
+DictCursor builds a dict per row and the model constructor then looks every
+column up by name. RowMapper instead resolves column positions once per
+query shape (the cursor description) and feeds the tuple straight into the
+dataclass, positionally when the selected columns line up with the model's
+leading fields.
+
+    ARTWORK = RowMapper(Artwork, image='imageLink')
+    artworks = query_models(ARTWORK, "SELECT artwork_id, vendor_id, ... FROM artworks")
+"""
+from dataclasses import fields
+from operator import itemgetter
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from . import mysql
+from .statements import Statement, execute
+
+
+class RowMapper:
+    def __init__(self, model, **columns: str):
+        # columns: model field -> column name, for fields whose column is named differently
+        self.model = model
+        self.field_names = [f.name for f in fields(model)]
+        self.columns = columns
+        self._plans: Dict[Tuple[str, ...], Callable] = {}
+
+    def _plan(self, description) -> Callable:
+        names = tuple(d[0] for d in description)
+        build = self._plans.get(names)
+        if build is not None:
+            return build
+
+        index = {n: i for i, n in enumerate(names)}
+        wanted = [(f, index[self.columns.get(f, f)]) for f in self.field_names
+                  if self.columns.get(f, f) in index]
+        model = self.model
+        positions = [p for _, p in wanted]
+        leading = [f for f, _ in wanted] == self.field_names[:len(wanted)]
+
+        if leading and positions == list(range(len(names))):
+            build = lambda row: model(*row)                   # row is already in field order
+        elif leading:
+            get = itemgetter(*positions) if len(positions) > 1 else (lambda r, p=positions[0]: (r[p],))
+            build = lambda row: model(*get(row))
+        else:
+            keys = [f for f, _ in wanted]
+            build = lambda row: model(**{k: row[p] for k, p in zip(keys, positions)})
+
+        self._plans[names] = build
+        return build
+
+    def map_rows(self, description, rows) -> list:
+        build = self._plan(description)
+        return [build(r) for r in rows]
+
+    def map_row(self, description, row):
+        return self._plan(description)(row) if row is not None else None
+
+
+def tuple_cursor():
+    return mysql.tuple_cursor()
+
+
+def query_models(mapper: RowMapper, sql: Union[str, Statement], params: tuple = ()) -> List:
+    cur = tuple_cursor()
+    execute(cur, sql, params)
+    items = mapper.map_rows(cur.description, cur.fetchall())
+    cur.close()
+    return items
+
+
+def query_model(mapper: RowMapper, sql: Union[str, Statement], params: tuple = ()) -> Optional[object]:
+    cur = tuple_cursor()
+    execute(cur, sql, params)
+    item = mapper.map_row(cur.description, cur.fetchone())
+    cur.close()
+    return item
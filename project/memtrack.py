@@ -0,0 +1,191 @@
+"""
+Opt-in memory allocation tracking per endpoint (MEMTRACK_ENABLED = True).
+
+tracemalloc traces every allocation in the process while enabled, which
+costs noticeable CPU and memory: turn it on for an investigation, not for
+normal serving. For each endpoint it records:
+
+    peak       highest traced memory during a request, above its start
+    retained   traced memory at the end of a request minus at the start
+    top_sites  for one request in every MEMTRACK_SAMPLE_EVERY, the lines
+               holding the most new memory when the template starts to
+               render (the view's rows are all loaded by then), or at the
+               end of the request for views without a template
+
+Every MEMTRACK_LEAK_EVERY requests the process's allocations are compared
+with the previous check; lines that keep growing are leak suspects. Reports
+are at /manage/memory.json and, with MEMTRACK_LOG set, appended to that
+file as one JSON line per leak check.
+
+tracemalloc is process-wide: with threaded workers, concurrent requests
+add to each other's numbers, so run one thread per worker for exact peaks.
+"""
+import json
+import logging
+import os
+import threading
+import tracemalloc
+from typing import Dict, List, Optional, Tuple
+
+from flask import before_render_template, g, request
+
+log = logging.getLogger(__name__)
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+)
+
+Site = Tuple[str, int]
+
+
+def _site_label(site: Site) -> str:
+    filename, lineno = site
+    if filename.startswith(_ROOT):
+        filename = os.path.relpath(filename, _ROOT)
+    else:
+        filename = '/'.join(filename.split(os.sep)[-2:])    # e.g. flask/app.py
+    return f"{filename}:{lineno}"
+
+
+def _by_line(snapshot: tracemalloc.Snapshot) -> Dict[Site, Tuple[int, int]]:
+    # Keep only per-line totals: a full snapshot holds every live trace
+    stats = snapshot.filter_traces(_FILTERS).statistics('lineno')
+    return {(s.traceback[0].filename, s.traceback[0].lineno): (s.size, s.count) for s in stats}
+
+
+def _growth(before: Dict[Site, Tuple[int, int]], after: Dict[Site, Tuple[int, int]], top: int) -> List[dict]:
+    diffs = []
+    for site, (size, count) in after.items():
+        old_size, old_count = before.get(site, (0, 0))
+        if size > old_size:
+            diffs.append((size - old_size, count - old_count, site))
+    diffs.sort(reverse=True)
+    return [{"site": _site_label(site), "kb": round(size / 1024, 1), "blocks": count}
+            for size, count, site in diffs[:top]]
+
+
+class EndpointMemory:
+    __slots__ = ('requests', 'peak_max', 'peak_total', 'retained_total', 'top_sites')
+
+    def __init__(self):
+        self.requests = 0
+        self.peak_max = 0
+        self.peak_total = 0
+        self.retained_total = 0
+        self.top_sites: List[dict] = []
+
+    def report(self) -> dict:
+        n = self.requests or 1
+        return {
+            "requests": self.requests,
+            "peak_max_kb": round(self.peak_max / 1024, 1),
+            "peak_avg_kb": round(self.peak_total / n / 1024, 1),
+            "retained_avg_kb": round(self.retained_total / n / 1024, 1),
+            "top_sites": self.top_sites,
+        }
+
+
+class MemoryTracker:
+    def __init__(self, top: int = 10, sample_every: int = 50, leak_every: int = 500):
+        self.top = top
+        self.sample_every = sample_every
+        self.leak_every = leak_every
+        self.endpoints: Dict[str, EndpointMemory] = {}
+        self.requests = 0
+        self.leak_suspects: List[dict] = []
+        self._baseline: Optional[Dict[Site, Tuple[int, int]]] = None
+        self._lock = threading.Lock()
+
+    def begin(self, endpoint: str) -> dict:
+        with self._lock:
+            stats = self.endpoints.setdefault(endpoint, EndpointMemory())
+            sample = stats.requests % self.sample_every == 0
+        tracemalloc.reset_peak()
+        current, _ = tracemalloc.get_traced_memory()
+        return {"start": current, "snapshot": _by_line(tracemalloc.take_snapshot()) if sample else None,
+                "top_sites": None}
+
+    def take_sites(self, state: dict) -> None:
+        if state["snapshot"] is not None and state["top_sites"] is None:
+            state["top_sites"] = _growth(state["snapshot"], _by_line(tracemalloc.take_snapshot()), self.top)
+
+    def end(self, endpoint: str, state: dict) -> None:
+        current, peak = tracemalloc.get_traced_memory()
+        self.take_sites(state)
+        top_sites = state["top_sites"]
+        with self._lock:
+            stats = self.endpoints[endpoint]
+            stats.requests += 1
+            stats.peak_max = max(stats.peak_max, peak - state["start"])
+            stats.peak_total += peak - state["start"]
+            stats.retained_total += current - state["start"]
+            if top_sites is not None:
+                stats.top_sites = top_sites
+            self.requests += 1
+            check = self.requests % self.leak_every == 0
+        if check:
+            self.check_leaks()
+
+    def check_leaks(self) -> None:
+        """Compare allocations with the previous check and log what grew."""
+        now = _by_line(tracemalloc.take_snapshot())
+        baseline, self._baseline = self._baseline, now
+        if baseline is None:
+            return
+        self.leak_suspects = _growth(baseline, now, self.top)
+        log.info(json.dumps({"pid": os.getpid(), "requests": self.requests,
+                             "traced_kb": round(tracemalloc.get_traced_memory()[0] / 1024, 1),
+                             "growth": self.leak_suspects,
+                             "endpoints": {e: s.report() for e, s in self.endpoints.items()}}))
+
+    def report(self) -> dict:
+        current, _ = tracemalloc.get_traced_memory()
+        with self._lock:
+            endpoints = {e: s.report() for e, s in sorted(self.endpoints.items(),
+                                                          key=lambda kv: -kv[1].peak_max)}
+        return {
+            "pid": os.getpid(),
+            "requests": self.requests,
+            "traced_kb": round(current / 1024, 1),
+            "leak_check_every": self.leak_every,
+            "leak_suspects": self.leak_suspects,
+            "endpoints": endpoints,
+        }
+
+
+def init_app(app) -> None:
+    app.config.setdefault('MEMTRACK_ENABLED', False)
+    if not app.config['MEMTRACK_ENABLED']:
+        return
+    tracemalloc.start(app.config.get('MEMTRACK_FRAMES', 1))
+    tracker = app.extensions['memtrack'] = MemoryTracker(
+        top=app.config.get('MEMTRACK_TOP', 10),
+        sample_every=app.config.get('MEMTRACK_SAMPLE_EVERY', 50),
+        leak_every=app.config.get('MEMTRACK_LEAK_EVERY', 500),
+    )
+    if app.config.get('MEMTRACK_LOG'):
+        handler = logging.FileHandler(app.config['MEMTRACK_LOG'])
+        handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+        log.addHandler(handler)
+        log.setLevel(logging.INFO)
+
+    @app.before_request
+    def _memtrack_begin():
+        if request.endpoint not in (None, 'static'):
+            g.memtrack = tracker.begin(request.endpoint)
+
+    @before_render_template.connect_via(app, weak=False)
+    def _memtrack_render(sender, template, context, **extra):
+        state = g.get('memtrack')
+        if state is not None:
+            tracker.take_sites(state)
+
+    @app.teardown_request
+    def _memtrack_end(exc):
+        state = g.pop('memtrack', None)
+        if state is not None:
+            tracker.end(request.endpoint, state)
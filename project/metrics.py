@@ -0,0 +1,277 @@
+"""
+Request metrics and runtime stats at /metrics, in Prometheus text format.
+
+Each process counts its requests (by endpoint, method and status), a
+latency histogram per endpoint and the requests in flight. Runtime stats
+are read when metrics are flushed: MySQL pool usage, the statement
+registry (project/statements.py), the in-memory catalog caches and
+load shedding.
+
+With METRICS_DIR set (production), every worker writes its numbers to
+<METRICS_DIR>/<pid>.json at most every METRICS_FLUSH_SECONDS, and /metrics
+adds up the files of all workers: counters from every worker that ever
+ran (files of exited workers are folded into dead.json), gauges only from
+workers still alive. Without METRICS_DIR only this process is reported.
+
+/metrics answers loopback clients, or anyone sending
+"Authorization: Bearer <METRICS_TOKEN>" when a token is configured.
+"""
+import glob
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Tuple
+
+from flask import Response, abort, current_app, g, request
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+_METHODS = {'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'}
+
+FAMILIES = {
+    'http_requests_total': ('counter', 'HTTP requests by endpoint, method and status.'),
+    'http_request_duration_seconds': ('histogram', 'HTTP request latency by endpoint, including streamed bodies.'),
+    'http_requests_in_flight': ('gauge', 'HTTP requests being handled.'),
+    'http_requests_shed_total': ('counter', 'Requests turned away by admission control.'),
+    'mysql_pool_connections': ('gauge', 'Pooled MySQL connections by state.'),
+    'mysql_pool_max_size': ('gauge', 'Connections each worker may open per pool.'),
+    'mysql_pool_connections_created_total': ('counter', 'MySQL connections opened.'),
+    'mysql_pool_waits_total': ('counter', 'Connection checkouts that had to wait.'),
+    'mysql_pool_timeouts_total': ('counter', 'Connection checkouts that timed out.'),
+    'sql_statement_executions_total': ('counter', 'Executions per registered SQL statement.'),
+    'sql_statement_seconds_total': ('counter', 'Time spent per registered SQL statement.'),
+    'cache_entries': ('gauge', 'Entries held by in-process caches and indexes.'),
+    'cache_hits_total': ('counter', 'Cache hits.'),
+    'cache_misses_total': ('counter', 'Cache misses.'),
+}
+
+
+def _series(name: str, **labels) -> str:
+    if not labels:
+        return name
+    def esc(v):
+        return str(v).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+    return name + '{' + ','.join(f'{k}="{esc(v)}"' for k, v in labels.items()) + '}'
+
+
+class Metrics:
+    def __init__(self):
+        self.counters: Dict[str, float] = defaultdict(float)
+        self.in_flight = 0
+        self._buckets: Dict[str, Tuple[Tuple[float, str], ...]] = {}
+        self._lock = threading.Lock()
+        self._flushed = 0.0
+
+    def observe(self, endpoint: str, method: str, status: int, seconds: float) -> None:
+        counters = self.counters
+        with self._lock:
+            buckets = self._buckets.get(endpoint)
+            if buckets is None:
+                buckets = self._buckets[endpoint] = tuple(
+                    (le, _series('http_request_duration_seconds_bucket', endpoint=endpoint,
+                                 le='+Inf' if le == float('inf') else le))
+                    for le in BUCKETS + (float('inf'),))
+                for _, series in buckets:
+                    counters[series] = 0          # every bucket is exported, even when empty
+            counters[_series('http_requests_total', endpoint=endpoint, method=method, status=status)] += 1
+            for le, series in buckets:
+                if seconds <= le:
+                    counters[series] += 1
+            counters[_series('http_request_duration_seconds_sum', endpoint=endpoint)] += seconds
+            counters[_series('http_request_duration_seconds_count', endpoint=endpoint)] += 1
+
+    def sample(self) -> dict:
+        """This process's counters and gauges, runtime stats included."""
+        counters, gauges = _runtime_stats()
+        with self._lock:
+            counters.update(self.counters)
+            gauges['http_requests_in_flight'] = self.in_flight
+        return {"counters": counters, "gauges": gauges}
+
+    def flush(self, directory: str, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self._flushed < current_app.config['METRICS_FLUSH_SECONDS']:
+            return
+        self._flushed = now
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{os.getpid()}.json")
+        with open(path + '.tmp', 'w') as f:
+            json.dump(self.sample(), f)
+        os.replace(path + '.tmp', path)   # readers never see a partial file
+
+
+def _runtime_stats() -> Tuple[Dict[str, float], Dict[str, float]]:
+    from . import mysql, suggest, facets, catalog_snapshot   # avoid import cycles with db
+    from .db import _filter_items_statement
+    from .statements import statement_stats
+
+    counters: Dict[str, float] = {}
+    gauges: Dict[str, float] = {}
+    for name, pool in mysql.pools().items():
+        s = pool.stats()
+        gauges[_series('mysql_pool_connections', pool=name, state='idle')] = s['idle']
+        gauges[_series('mysql_pool_connections', pool=name, state='in_use')] = s['in_use']
+        gauges[_series('mysql_pool_max_size', pool=name)] = s['max_size']
+        counters[_series('mysql_pool_connections_created_total', pool=name)] = s['created']
+        counters[_series('mysql_pool_waits_total', pool=name)] = s['waits']
+        counters[_series('mysql_pool_timeouts_total', pool=name)] = s['timeouts']
+
+    for s in statement_stats():
+        counters[_series('sql_statement_executions_total', statement=s['name'])] = s['calls']
+        counters[_series('sql_statement_seconds_total', statement=s['name'])] = s['total_ms'] / 1000
+
+    info = _filter_items_statement.cache_info()
+    gauges[_series('cache_entries', cache='filter_items_sql')] = info.currsize
+    counters[_series('cache_hits_total', cache='filter_items_sql')] = info.hits
+    counters[_series('cache_misses_total', cache='filter_items_sql')] = info.misses
+    for cache, entries in {**suggest.index_stats(), **facets.index_stats(),
+                           **catalog_snapshot.index_stats()}.items():
+        gauges[_series('cache_entries', cache=cache)] = entries
+
+    admission = current_app.extensions.get('admission')
+    if admission is not None:
+        counters['http_requests_shed_total'] = admission.shed
+    return counters, gauges
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _read(path: str) -> dict:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def fold_exited(directory: str, everyone: bool = False) -> None:
+    """Add the counters of exited workers (or all, at server start) to dead.json and drop their files."""
+    import fcntl   # POSIX only; METRICS_DIR is for prefork servers
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, '.lock'), 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        dead_path = os.path.join(directory, 'dead.json')
+        dead = None
+        for path in glob.glob(os.path.join(directory, '[0-9]*.json')):
+            if not everyone and _alive(int(os.path.basename(path).split('.')[0])):
+                continue
+            dead = dead or defaultdict(float, _read(dead_path).get('counters', {}))
+            for series, value in _read(path).get('counters', {}).items():
+                dead[series] += value
+            os.unlink(path)
+        if dead is not None:
+            with open(dead_path + '.tmp', 'w') as f:
+                json.dump({"counters": dead}, f)
+            os.replace(dead_path + '.tmp', dead_path)
+
+
+def collect() -> Tuple[Dict[str, float], Dict[str, float]]:
+    """(counters, gauges) summed over every worker."""
+    metrics: Metrics = current_app.extensions['metrics']
+    directory = current_app.config['METRICS_DIR']
+    if not directory:
+        sample = metrics.sample()
+        return sample['counters'], sample['gauges']
+
+    metrics.flush(directory, force=True)
+    fold_exited(directory)
+    counters: Dict[str, float] = defaultdict(float)
+    gauges: Dict[str, float] = defaultdict(float)
+    for path in glob.glob(os.path.join(directory, '*.json')):
+        data = _read(path)
+        for series, value in data.get('counters', {}).items():
+            counters[series] += value
+        for series, value in data.get('gauges', {}).items():
+            gauges[series] += value
+    return counters, gauges
+
+
+def _family(series: str) -> str:
+    name = series.split('{', 1)[0]
+    for suffix in ('_bucket', '_sum', '_count'):
+        if name.endswith(suffix) and name[:-len(suffix)] in FAMILIES:
+            return name[:-len(suffix)]
+    return name
+
+
+def _order(series: str):
+    # Group a histogram's series by labels: buckets in ascending le, then _count and _sum
+    name, _, labels = series.partition('{')
+    labels = labels.rstrip('}')
+    le = float('inf')
+    if 'le="' in labels:
+        labels, _, rest = labels.partition('le="')
+        le = float(rest.split('"', 1)[0])
+        labels = labels.rstrip(',')
+    return labels, not name.endswith('_bucket'), le, name
+
+
+def render(counters: Dict[str, float], gauges: Dict[str, float]) -> str:
+    by_family = defaultdict(list)
+    for series, value in list(counters.items()) + list(gauges.items()):
+        by_family[_family(series)].append((series, value))
+    lines = []
+    for family, (kind, help_text) in FAMILIES.items():
+        samples = by_family.get(family)
+        if not samples:
+            continue
+        lines.append(f"# HELP {family} {help_text}")
+        lines.append(f"# TYPE {family} {kind}")
+        for series, value in sorted(samples, key=lambda s: _order(s[0])):
+            lines.append(f"{series} {int(value) if float(value).is_integer() else value}")
+    return '\n'.join(lines) + '\n'
+
+
+def init_app(app) -> None:
+    app.config.setdefault('METRICS_DIR', None)
+    app.config.setdefault('METRICS_FLUSH_SECONDS', 1.0)
+    app.config.setdefault('METRICS_TOKEN', None)
+    metrics = app.extensions['metrics'] = Metrics()
+
+    @app.before_request
+    def _metrics_start():
+        g.metrics_started = time.perf_counter()
+        with metrics._lock:
+            metrics.in_flight += 1
+
+    @app.after_request
+    def _metrics_status(response):
+        g.metrics_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def _metrics_finish(exc):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return
+        with metrics._lock:
+            metrics.in_flight -= 1
+        method = request.method if request.method in _METHODS else 'other'
+        status = g.pop('metrics_status', 500 if exc is not None else 200)
+        metrics.observe(request.endpoint or 'unmatched', method, status, time.perf_counter() - started)
+        if app.config['METRICS_DIR']:
+            try:
+                metrics.flush(app.config['METRICS_DIR'])
+            except OSError:
+                app.logger.exception("could not write metrics")
+
+    def metrics_view():
+        token = app.config['METRICS_TOKEN']
+        if token:
+            if request.headers.get('Authorization') != f"Bearer {token}":
+                abort(403)
+        elif request.remote_addr not in ('127.0.0.1', '::1'):
+            abort(403)
+        return Response(render(*collect()), mimetype='text/plain; version=0.0.4')
+
+    metrics_view._admission_lane = None   # scrapes must work under load (project/limits.py)
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
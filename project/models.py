@@ -21,7 +21,7 @@ class OrderStatus(str, Enum):
     CONFIRMED = "Confirmed"
     CANCELLED = "Cancelled"
 
-@dataclass
+@dataclass(slots=True)
 class Address:
     address_id: Optional[int]
     streetNumber: str
@@ -31,12 +31,12 @@ class Address:
     postcode: str
     country: str
 
-@dataclass
+@dataclass(slots=True)
 class Category:
     category_id: Optional[int]
     categoryName: str
 
-@dataclass
+@dataclass(slots=True)
 class Customer:
     customer_id: Optional[int]
     email: str
@@ -47,7 +47,7 @@ class Customer:
     address_id: Optional[int] = None
     address: Optional[Address] = None
 
-@dataclass
+@dataclass(slots=True)
 class Vendor:
     vendor_id: Optional[int]
     email: str
@@ -61,7 +61,7 @@ class Vendor:
     image: str = 'foobar.png'
     address: Optional[Address] = None
 
-@dataclass
+@dataclass(slots=True)
 class Artwork:
     artwork_id: Optional[int]
     vendor_id: int
@@ -74,11 +74,12 @@ class Artwork:
     availabilityEndDate: Optional[date] = None
     maxQuantity: int = 1
     availabilityStatus: AvailabilityStatus = AvailabilityStatus.UNLISTED
+    categoryName: Optional[str] = None
     vendor: Optional[Vendor] = None
     category: Optional[Category] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class Cart:
     cart_id: Optional[int]
     cartToken: int
@@ -109,7 +110,7 @@ class Cart:
         return (total + delivery).quantize(Decimal("0.01"))
 
 
-@dataclass
+@dataclass(slots=True)
 class CartItem:
     cartItem_id: Optional[int]
     cart_id: int
@@ -119,7 +120,7 @@ class CartItem:
     cart: Optional[Cart] = None
     artwork: Optional[Artwork] = None
 
-@dataclass
+@dataclass(slots=True)
 class Order:
     order_id: Optional[int]
     customer_id: int
@@ -140,7 +141,7 @@ class Order:
             total += li.line_total()
         return total.quantize(Decimal("0.01"))
     
-@dataclass
+@dataclass(slots=True)
 class OrderItem:
     orderItem_id: Optional[int]
     order_id: int
@@ -0,0 +1,280 @@
+"""
+Connection pooling and read/write splitting for Flask-MySQLdb.
+
+Stock Flask-MySQLdb opens a new MySQL connection for every app context and
+closes it on teardown. PooledMySQL keeps idle connections per process and
+hands them out instead, which also lets several threads of one request
+(see project/fanout.py) each hold their own connection cheaply.
+
+With MYSQL_REPLICAS configured, functions decorated with @replica_read run
+on a replica connection and everything else on the primary. After a
+@primary_write the session reads from the primary for
+MYSQL_READ_YOUR_WRITES seconds, so users always see their own changes.
+"""
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from queue import LifoQueue, Empty
+
+from flask import current_app, g, has_request_context, session
+
+try:
+    import MySQLdb
+    from MySQLdb import cursors
+    from flask_mysqldb import MySQL
+except ImportError:   # mysqlclient is only needed with DB_BACKEND = 'mysql' (project/backends.py)
+    MySQLdb = cursors = None
+    MySQL = object
+
+_replica_ok: ContextVar[bool] = ContextVar("replica_ok", default=False)
+
+RYW_SESSION_KEY = "_rw_until"
+
+
+def replica_read(func):
+    """Mark a read-only db function as safe to run on a read replica."""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        token = _replica_ok.set(True)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _replica_ok.reset(token)
+    return wrapper
+
+
+def primary_write(func):
+    """Mark a db function that writes; opens this session's read-your-writes window."""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        token = _replica_ok.set(False)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _replica_ok.reset(token)
+            g.mysql_wrote = True
+            if has_request_context():
+                window = current_app.config.get("MYSQL_READ_YOUR_WRITES", 5)
+                session[RYW_SESSION_KEY] = time.time() + window
+    return wrapper
+
+
+@contextmanager
+def on_primary():
+    """Run the block on the primary, even inside @replica_read functions."""
+    token = _replica_ok.set(False)
+    try:
+        yield
+    finally:
+        _replica_ok.reset(token)
+
+
+def in_read_your_writes_window() -> bool:
+    """True if this request or session wrote recently and must read fresh data."""
+    if g.get("mysql_wrote"):
+        return True
+    return has_request_context() and session.get(RYW_SESSION_KEY, 0) > time.time()
+
+
+class PoolExhausted(RuntimeError):
+    pass
+
+
+class ConnectionPool:
+    def __init__(self, connect, max_size: int = 10, timeout: float = 5.0, ping_after: float = 30.0):
+        self._connect = connect
+        self.max_size = max_size
+        self.timeout = timeout
+        self.ping_after = ping_after
+        self.connect_hooks = []   # called with each new connection
+        self._reset()
+
+    def _reset(self):
+        # Called on first use and after a fork: never share sockets across processes
+        self._pid = os.getpid()
+        self._idle = LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.max_size)
+        self._lock = threading.Lock()
+        self.created = 0
+        self.in_use = 0
+        self.waits = 0
+        self.timeouts = 0
+
+    def acquire(self):
+        if self._pid != os.getpid():
+            self._reset()
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.waits += 1
+            if not self._slots.acquire(timeout=self.timeout):
+                with self._lock:
+                    self.timeouts += 1
+                raise PoolExhausted(f"No database connection available within {self.timeout}s")
+        try:
+            conn = self._take_idle() or self._new()
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self.in_use += 1
+        return conn
+
+    def _take_idle(self):
+        while True:
+            try:
+                conn, idle_since = self._idle.get_nowait()
+            except Empty:
+                return None
+            if time.monotonic() - idle_since < self.ping_after:
+                return conn
+            try:
+                conn.ping()
+                return conn
+            except Exception:
+                self._close(conn)
+
+    def _new(self):
+        conn = self._connect()
+        for hook in self.connect_hooks:
+            hook(conn)
+        with self._lock:
+            self.created += 1
+        return conn
+
+    def _close(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def release(self, conn, discard: bool = False):
+        if self._pid != os.getpid():
+            return  # connection belongs to the parent process
+        with self._lock:
+            self.in_use -= 1
+        try:
+            if discard:
+                self._close(conn)
+            else:
+                # End any open transaction so the next borrower starts clean
+                conn.rollback()
+                self._idle.put((conn, time.monotonic()))
+        except Exception:
+            self._close(conn)
+        finally:
+            self._slots.release()
+
+    def stats(self) -> dict:
+        return {
+            "max_size": self.max_size,
+            "idle": self._idle.qsize(),
+            "in_use": self.in_use,
+            "created": self.created,
+            "waits": self.waits,
+            "timeouts": self.timeouts,
+        }
+
+
+class PooledMySQL(MySQL):
+    """Drop-in replacement for flask_mysqldb.MySQL backed by ConnectionPool."""
+
+    def init_app(self, app):
+        app.config.setdefault("MYSQL_POOL_SIZE", 10)
+        app.config.setdefault("MYSQL_POOL_TIMEOUT", 5)
+        # ["host", "host:port", {"host": ..., "port": ..., "user": ..., "password": ...}]
+        app.config.setdefault("MYSQL_REPLICAS", [])
+        app.config.setdefault("MYSQL_READ_YOUR_WRITES", 5)
+        super().init_app(app)
+
+        def make_pool(connect):
+            return ConnectionPool(connect, max_size=app.config["MYSQL_POOL_SIZE"],
+                                  timeout=app.config["MYSQL_POOL_TIMEOUT"])
+
+        app.extensions["mysql_pool"] = make_pool(lambda: self.connect)
+        app.extensions["mysql_replica_pools"] = [
+            make_pool(lambda r=replica: self._connect_replica(r))
+            for replica in (_parse_replica(r) for r in app.config["MYSQL_REPLICAS"])
+        ]
+
+    @property
+    def pool(self) -> ConnectionPool:
+        return current_app.extensions["mysql_pool"]
+
+    def pools(self) -> dict:
+        pools = {"primary": self.pool}
+        for i, p in enumerate(current_app.extensions["mysql_replica_pools"]):
+            pools[f"replica{i}"] = p
+        return pools
+
+    def add_connect_hook(self, hook) -> None:
+        """Call hook(conn) on every connection the pools open from now on."""
+        self.pool.connect_hooks.append(hook)
+        for p in current_app.extensions["mysql_replica_pools"]:
+            p.connect_hooks.append(hook)
+
+    def tuple_cursor(self):
+        return self.connection.cursor(cursors.Cursor)
+
+    def stream_cursor(self):
+        # Server-side cursor: rows are pulled over the wire as they are fetched
+        return self.connection.cursor(cursors.SSCursor)
+
+    def _connect_replica(self, replica: dict):
+        cfg = current_app.config
+        kwargs = {
+            "host": replica["host"],
+            "port": int(replica.get("port") or cfg["MYSQL_PORT"]),
+            "user": replica.get("user") or cfg["MYSQL_USER"],
+            "passwd": replica.get("password") or cfg["MYSQL_PASSWORD"],
+            "db": cfg["MYSQL_DB"],
+            "connect_timeout": cfg["MYSQL_CONNECT_TIMEOUT"],
+            "charset": cfg["MYSQL_CHARSET"],
+            "use_unicode": cfg["MYSQL_USE_UNICODE"],
+        }
+        if cfg["MYSQL_CURSORCLASS"]:
+            kwargs["cursorclass"] = getattr(cursors, cfg["MYSQL_CURSORCLASS"])
+        kwargs.update(cfg["MYSQL_CUSTOM_OPTIONS"] or {})
+        return MySQLdb.connect(**kwargs)
+
+    def _use_replica(self) -> bool:
+        if not _replica_ok.get() or not current_app.extensions["mysql_replica_pools"]:
+            return False
+        return not in_read_your_writes_window()
+
+    @property
+    def connection(self):
+        if self._use_replica():
+            if "mysql_replica_db" not in g:
+                pool = random.choice(current_app.extensions["mysql_replica_pools"])
+                try:
+                    g.mysql_replica_db = (pool.acquire(), pool)
+                except Exception:
+                    # Replica down or exhausted: serve the read from the primary
+                    current_app.logger.warning("read replica unavailable, using primary", exc_info=True)
+                    g.mysql_replica_db = None
+            if g.mysql_replica_db is not None:
+                return g.mysql_replica_db[0]
+
+        if not hasattr(g, "mysql_db"):
+            g.mysql_db = self.pool.acquire()
+        return g.mysql_db
+
+    def teardown(self, exception):
+        conn = g.pop("mysql_db", None)
+        if conn is not None:
+            self.pool.release(conn)
+        replica = g.pop("mysql_replica_db", None)
+        if replica:
+            conn, pool = replica
+            pool.release(conn)
+
+
+def _parse_replica(value) -> dict:
+    if isinstance(value, dict):
+        return value
+    host, _, port = str(value).partition(":")
+    return {"host": host, "port": int(port) if port else None}
@@ -0,0 +1,158 @@
+"""
+On-demand sampling profiler for single requests.
+
+A request is profiled when it carries a valid profile token (X-Profile
+header or ?_profile=...), or at random with probability PROFILE_SAMPLE_RATE.
+Admins get a token from /manage/profile-token; it is signed with the
+SECRET_KEY and expires after PROFILE_TOKEN_MAX_AGE seconds, so it can be
+handed to curl or a load test without a session.
+
+While a request is profiled, a sampler thread reads the request thread's
+stack (and the stacks of its fan-out threads, see project/fanout.py) every
+PROFILE_INTERVAL seconds. When the request ends the samples are written to
+PROFILE_DIR as collapsed stacks, one "frame;frame;frame count" line per
+stack, ready for flamegraph.pl or speedscope:
+
+    20250101T120000-main.index-412ms-1234.folded
+
+Requests that are not profiled pay for one header lookup.
+"""
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from functools import wraps
+from typing import Callable, Dict, Optional
+
+from flask import current_app, g, request
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+
+HEADER = 'X-Profile'
+PARAM = '_profile'
+_SALT = 'request-profile'
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _label(code) -> str:
+    path = code.co_filename
+    if path.startswith(_ROOT):
+        path = os.path.relpath(path, _ROOT)
+    else:
+        path = '/'.join(path.split(os.sep)[-2:])    # e.g. jinja2/environment.py
+    return f"{code.co_name} ({path}:{code.co_firstlineno})"
+
+
+class Profiler:
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.threads = {threading.get_ident()}
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.started = time.perf_counter()
+        self._done = threading.Event()
+        self._sampler = threading.Thread(target=self._run, name='profiler', daemon=True)
+        self._sampler.start()
+
+    def _run(self) -> None:
+        labels: Dict[object, str] = {}
+        while not self._done.wait(self.interval):
+            frames = sys._current_frames()
+            for ident in list(self.threads):
+                frame = frames.get(ident)
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    label = labels.get(code)
+                    if label is None:
+                        label = labels[code] = _label(code)
+                    stack.append(label)
+                    frame = frame.f_back
+                if stack:
+                    self.stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+
+    def track(self, func: Callable) -> Callable:
+        """Wrap a call that another thread runs for this request, so it is sampled too."""
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            ident = threading.get_ident()
+            self.threads.add(ident)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.threads.discard(ident)
+        return wrapper
+
+    def stop(self) -> float:
+        """Stop sampling; returns the profiled time in seconds."""
+        self._done.set()
+        self._sampler.join()
+        return time.perf_counter() - self.started
+
+    def write(self, directory: str, endpoint: str, elapsed: float) -> str:
+        os.makedirs(directory, exist_ok=True)
+        name = f"{datetime.now():%Y%m%dT%H%M%S}-{endpoint}-{elapsed * 1000:.0f}ms-{os.getpid()}.folded"
+        path = os.path.join(directory, name)
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
+
+
+def _serializer() -> URLSafeTimedSerializer:
+    return URLSafeTimedSerializer(current_app.secret_key, salt=_SALT)
+
+
+def make_profile_token() -> str:
+    return _serializer().dumps('profile')
+
+
+def _token_ok(token: str) -> bool:
+    try:
+        _serializer().loads(token, max_age=current_app.config['PROFILE_TOKEN_MAX_AGE'])
+        return True
+    except BadSignature:
+        return False
+
+
+def current_profiler() -> Optional[Profiler]:
+    return g.get('profiler')
+
+
+def init_app(app) -> None:
+    app.config.setdefault('PROFILE_SAMPLE_RATE', 0.0)
+    app.config.setdefault('PROFILE_INTERVAL', 0.005)
+    app.config.setdefault('PROFILE_TOKEN_MAX_AGE', 3600)
+    app.config.setdefault('PROFILE_DIR', None)
+
+    @app.before_request
+    def _start_profile():
+        token = request.headers.get(HEADER) or request.args.get(PARAM)
+        if token:
+            if not _token_ok(token):
+                return
+        else:
+            rate = app.config['PROFILE_SAMPLE_RATE']
+            if not rate or random.random() >= rate:
+                return
+        if request.endpoint in (None, 'static'):
+            return
+        g.profiler = Profiler(app.config['PROFILE_INTERVAL'])
+
+    @app.teardown_request
+    def _finish_profile(exc):
+        # Teardown runs after a streamed body has been sent, so it is included
+        profiler = g.pop('profiler', None)
+        if profiler is None:
+            return
+        elapsed = profiler.stop()
+        directory = app.config['PROFILE_DIR'] or os.path.join(app.instance_path, 'profiles')
+        try:
+            path = profiler.write(directory, request.endpoint, elapsed)
+            app.logger.info("profiled %s %s in %.0fms (%d samples): %s",
+                            request.method, request.path, elapsed * 1000, profiler.samples, path)
+        except OSError:
+            app.logger.exception("could not write request profile")
@@ -0,0 +1,189 @@
+"""
+"Similar artworks" recommendations.
+
+An offline job builds TF-IDF vectors over each artwork's title (weighted
+twice), description and category name with NumPy. It stores the TOP_K most
+similar listed artworks per artwork in artwork_similar. The item details
+page then reads that table by primary key; nothing is computed per request.
+
+rebuild_similar(ids) updates only the artworks affected by a change: the
+changed ones, those whose list points at them, and those a changed artwork
+now beats. Scores of other pairs ignore the small IDF drift until the next
+full rebuild (rebuild_similar() with no ids).
+
+The term matrix is dense float32 (artworks x at most MAX_FEATURES terms),
+which is fine for catalogs up to a few thousand artworks.
+"""
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from . import mysql
+from .db import transaction
+from .mapping import tuple_cursor
+from .pool import replica_read
+
+TOP_K = 6
+MAX_FEATURES = 4096
+_BLOCK = 512    # rows per similarity block, bounds the block x n score matrix
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+STOP_WORDS = frozenset("""
+    a an and are as at be by for from has in is it its of on or that the this to
+    was were with your you our we i my me his her their they them these those
+""".split())
+
+
+def _tokens(text: Optional[str]) -> List[str]:
+    return [t for t in _TOKEN.findall((text or '').lower()) if len(t) > 1 and t not in STOP_WORDS]
+
+
+def _load_catalog() -> Tuple[np.ndarray, List[List[str]], np.ndarray]:
+    cur = tuple_cursor()
+    cur.execute("""
+        SELECT a.artwork_id, a.title, a.itemDescription, c.categoryName, a.availabilityStatus
+          FROM artworks a
+          LEFT JOIN categories c ON c.category_id = a.category_id
+         ORDER BY a.artwork_id
+    """)
+    rows = cur.fetchall()
+    cur.close()
+    ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+    docs = [_tokens(r[1]) * 2 + _tokens(r[2]) + _tokens(r[3]) for r in rows]
+    listed = np.fromiter((r[4] == 'Listed' for r in rows), dtype=bool, count=len(rows))
+    return ids, docs, listed
+
+
+def tfidf_matrix(docs: Sequence[List[str]], max_features: int = MAX_FEATURES) -> np.ndarray:
+    """Rows are L2-normalised TF-IDF vectors, so row dot products are cosine similarities."""
+    n = len(docs)
+    df: Dict[str, int] = {}
+    for doc in docs:
+        for term in set(doc):
+            df[term] = df.get(term, 0) + 1
+    # A term found in a single artwork can never make two artworks similar
+    shared = sorted((t for t, c in df.items() if c > 1), key=lambda t: (-df[t], t))[:max_features]
+    vocab = {t: i for i, t in enumerate(shared)}
+
+    matrix = np.zeros((n, len(vocab)), dtype=np.float32)
+    if not vocab:
+        return matrix
+    rows, cols = [], []
+    for r, doc in enumerate(docs):
+        for term in doc:
+            c = vocab.get(term)
+            if c is not None:
+                rows.append(r); cols.append(c)
+    np.add.at(matrix, (np.array(rows, dtype=np.intp), np.array(cols, dtype=np.intp)), 1.0)
+
+    idf = np.log((1.0 + n) / (1.0 + np.array([df[t] for t in shared], dtype=np.float32))) + 1.0
+    np.log1p(matrix, out=matrix)
+    matrix *= idf
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix
+
+
+def top_k(matrix: np.ndarray, rows: np.ndarray, candidates: np.ndarray, k: int = TOP_K):
+    """Yield (row, neighbour_rows, scores) for each of `rows`, best first, scores > 0 only."""
+    n = matrix.shape[0]
+    k = min(k, n - 1)
+    if k <= 0:
+        return
+    for start in range(0, len(rows), _BLOCK):
+        block = rows[start:start + _BLOCK]
+        sims = matrix[block] @ matrix.T
+        sims[:, ~candidates] = -1.0
+        sims[np.arange(len(block)), block] = -1.0      # never recommend the artwork itself
+        best = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        for i, row in enumerate(block):
+            idx = best[i][np.argsort(-sims[i, best[i]], kind='stable')]
+            scores = sims[i, idx]
+            keep = scores > 0
+            yield int(row), idx[keep], scores[keep]
+
+
+def _in_chunks(values: List[int], size: int = 500):
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def _affected_rows(cur, matrix, ids, listed, pos, artwork_ids) -> np.ndarray:
+    changed = [pos[a] for a in artwork_ids if a in pos]
+    affected = set(changed)
+
+    # Lists that currently point at a changed (or deleted) artwork
+    for chunk in _in_chunks(list(artwork_ids)):
+        marks = ", ".join(["%s"] * len(chunk))
+        cur.execute(f"SELECT DISTINCT artwork_id FROM artwork_similar WHERE similar_id IN ({marks})", tuple(chunk))
+        affected.update(pos[r[0]] for r in cur.fetchall() if r[0] in pos)
+
+    # Lists a changed, listed artwork may now enter: it beats their weakest entry
+    entering = [r for r in changed if listed[r]]
+    if entering:
+        cur.execute("SELECT artwork_id, MIN(score), COUNT(*) FROM artwork_similar GROUP BY artwork_id")
+        threshold = np.zeros(len(ids), dtype=np.float32)
+        for artwork_id, weakest, count in cur.fetchall():
+            if artwork_id in pos and count >= TOP_K:
+                threshold[pos[artwork_id]] = weakest
+        best = (matrix[entering] @ matrix.T).max(axis=0)
+        best[entering] = 0.0
+        affected.update(np.flatnonzero(best > threshold).tolist())
+
+    return np.array(sorted(affected), dtype=np.intp)
+
+
+def rebuild_similar(artwork_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Recompute artwork_similar: fully, or only what changing `artwork_ids`
+    can affect. Returns the number of artworks whose list was rewritten.
+    """
+    ids, docs, listed = _load_catalog()
+    matrix = tfidf_matrix(docs)
+    pos = {int(a): i for i, a in enumerate(ids)}
+
+    with transaction():
+        cur = tuple_cursor()
+        if artwork_ids is None:
+            rows = np.arange(len(ids), dtype=np.intp)
+            cur.execute("DELETE FROM artwork_similar")
+            stale: List[int] = []
+        else:
+            artwork_ids = sorted({int(a) for a in artwork_ids})
+            rows = _affected_rows(cur, matrix, ids, listed, pos, artwork_ids)
+            # Deleted artworks lose their own list too
+            stale = sorted({int(ids[r]) for r in rows} | {a for a in artwork_ids if a not in pos})
+            for chunk in _in_chunks(stale):
+                marks = ", ".join(["%s"] * len(chunk))
+                cur.execute(f"DELETE FROM artwork_similar WHERE artwork_id IN ({marks})", tuple(chunk))
+
+        values = []
+        for row, neighbours, scores in top_k(matrix, rows, listed):
+            artwork_id = int(ids[row])
+            values.extend((artwork_id, position, int(ids[nb]), round(float(score), 4))
+                          for position, (nb, score) in enumerate(zip(neighbours, scores), start=1))
+        if values:
+            cur.executemany(
+                "INSERT INTO artwork_similar (artwork_id, position, similar_id, score) VALUES (%s, %s, %s, %s)",
+                values)
+        cur.close()
+    return len(rows)
+
+
+@replica_read
+def similar_artworks(artwork_id: int, limit: int = TOP_K) -> List[dict]:
+    """Precomputed neighbours of one artwork that are still listed, best first."""
+    cur = mysql.connection.cursor()
+    cur.execute("""
+        SELECT a.artwork_id, a.title, a.imageLink AS image, a.pricePerWeek, v.artisticName
+          FROM artwork_similar s
+          JOIN artworks a ON a.artwork_id = s.similar_id
+          JOIN vendors  v ON v.vendor_id  = a.vendor_id
+         WHERE s.artwork_id = %s AND a.availabilityStatus = 'Listed'
+         ORDER BY s.position
+         LIMIT %s
+    """, (artwork_id, limit))
+    rows = cur.fetchall()
+    cur.close()
+    return rows
@@ -0,0 +1,177 @@
+"""
+Platform-wide revenue reporting for admins.
+
+Order lines are streamed from MySQL in chunks into integer-cent NumPy
+arrays, so grouping by category / month / vendor is a handful of vectorised
+passes instead of a Decimal loop over every OrderItem.
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from . import mysql
+from .archive import orders_source, order_items_source
+from .pool import replica_read
+
+CHUNK_SIZE = 5000
+PERCENTILES = (50, 90)
+
+# Column order of the streamed rows (see _ORDER_LINES_SQL)
+_COLUMNS = ("order_id", "artwork_id", "vendor_id", "category_id", "month",
+            "unit_cents", "quantity", "weeks")
+
+_ORDER_LINES_SQL = """
+    SELECT oi.order_id, oi.artwork_id, a.vendor_id, COALESCE(a.category_id, 0),
+           o.orderDate, ROUND(oi.unitPrice * 100), COALESCE(oi.quantity, 1),
+           COALESCE(oi.rentalDuration, 1)
+      FROM {items} oi
+      JOIN {orders} o ON o.order_id   = oi.order_id
+      JOIN artworks a ON a.artwork_id = oi.artwork_id
+     WHERE o.orderStatus = 'Confirmed'
+       AND oi.unitPrice IS NOT NULL
+"""
+
+
+def _stream_rows(sql: str, params: tuple = (), chunk_size: int = CHUNK_SIZE):
+    # Unbuffered cursor: rows are pulled chunk by chunk, not all at once
+    cur = mysql.stream_cursor()
+    try:
+        cur.execute(sql, params)
+        while True:
+            rows = cur.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        cur.close()
+
+
+def _chunk_to_arrays(rows) -> Dict[str, np.ndarray]:
+    n = len(rows)
+    col = lambda i: (r[i] for r in rows)
+    return {
+        "order_id":    np.fromiter(col(0), dtype=np.int64, count=n),
+        "artwork_id":  np.fromiter(col(1), dtype=np.int64, count=n),
+        "vendor_id":   np.fromiter(col(2), dtype=np.int64, count=n),
+        "category_id": np.fromiter(col(3), dtype=np.int64, count=n),
+        # orderDate -> YYYYMM so months group as plain integers
+        "month":       np.fromiter(((d.year * 100 + d.month) if d else 0 for d in col(4)),
+                                   dtype=np.int64, count=n),
+        "unit_cents":  np.fromiter((int(c) for c in col(5)), dtype=np.int64, count=n),
+        "quantity":    np.fromiter(col(6), dtype=np.int64, count=n),
+        "weeks":       np.fromiter(col(7), dtype=np.int64, count=n),
+    }
+
+
+def load_order_lines(start: Optional[date] = None, end: Optional[date] = None) -> Dict[str, np.ndarray]:
+    """
+    Load confirmed order lines (optionally limited to start <= orderDate <= end)
+    as a dict of equal-length int64 arrays, plus the derived line_cents column.
+    """
+    # Ranges that start after the newest archived order skip the archive tables
+    sql = _ORDER_LINES_SQL.format(items=order_items_source(start), orders=orders_source(start))
+    params = []
+    if start:
+        sql += " AND o.orderDate >= %s"; params.append(start)
+    if end and end < date.max:   # the day after date.max does not exist; nothing lies beyond it
+        sql += " AND o.orderDate < %s"; params.append(end + timedelta(days=1))
+
+    chunks = [_chunk_to_arrays(rows) for rows in _stream_rows(sql, tuple(params))]
+    if chunks:
+        lines = {c: np.concatenate([ch[c] for ch in chunks]) for c in _COLUMNS}
+    else:
+        lines = {c: np.empty(0, dtype=np.int64) for c in _COLUMNS}
+    lines["line_cents"] = lines["unit_cents"] * lines["quantity"] * lines["weeks"]
+    return lines
+
+
+def group_by(lines: Dict[str, np.ndarray], key: str) -> List[dict]:
+    """
+    Aggregate revenue, line count, items and rental duration percentiles per
+    distinct value of lines[key]. Sorting once lets every sum be a reduceat.
+    """
+    keys = lines[key]
+    if keys.size == 0:
+        return []
+
+    order = np.lexsort((lines["weeks"], keys))  # by key, then weeks within key
+    k = keys[order]
+    weeks = lines["weeks"][order]
+    starts = np.flatnonzero(np.r_[True, k[1:] != k[:-1]])
+    ends = np.r_[starts[1:], k.size]
+
+    revenue = np.add.reduceat(lines["line_cents"][order], starts)
+    items = np.add.reduceat(lines["quantity"][order], starts)
+    counts = ends - starts
+
+    groups = []
+    for i, s in enumerate(starts):
+        # weeks are already sorted inside each group
+        pct = np.percentile(weeks[s:ends[i]], PERCENTILES)
+        groups.append({
+            key: int(k[s]),
+            "revenue_cents": int(revenue[i]),
+            "lines": int(counts[i]),
+            "items": int(items[i]),
+            **{f"weeks_p{p}": float(v) for p, v in zip(PERCENTILES, pct)},
+        })
+    return groups
+
+
+def _category_names() -> Dict[int, str]:
+    cur = mysql.connection.cursor()
+    cur.execute("SELECT category_id, categoryName FROM categories")
+    rows = cur.fetchall()
+    cur.close()
+    return {r["category_id"]: r["categoryName"] for r in rows}
+
+
+def _vendor_names() -> Dict[int, str]:
+    cur = mysql.connection.cursor()
+    cur.execute("SELECT vendor_id, artisticName, firstName, lastName FROM vendors")
+    rows = cur.fetchall()
+    cur.close()
+    return {r["vendor_id"]: r["artisticName"] or f"{r['firstName']} {r['lastName']}" for r in rows}
+
+
+def _money(cents: int) -> Decimal:
+    return (Decimal(int(cents)) / 100).quantize(Decimal("0.01"))
+
+
+@replica_read
+def revenue_report(start: Optional[date] = None, end: Optional[date] = None) -> dict:
+    lines = load_order_lines(start, end)
+
+    categories = _category_names()
+    vendors = _vendor_names()
+
+    def label(rows, key, names, fallback):
+        for r in rows:
+            r["name"] = names.get(r[key], fallback)
+            r["revenue"] = _money(r.pop("revenue_cents"))
+        return rows
+
+    by_category = label(group_by(lines, "category_id"), "category_id", categories, "Uncategorised")
+    by_vendor = label(group_by(lines, "vendor_id"), "vendor_id", vendors, "Unknown vendor")
+    by_month = label(group_by(lines, "month"), "month", {}, "")
+    for r in by_month:
+        r["name"] = f"{r['month'] // 100:04d}-{r['month'] % 100:02d}"
+
+    by_category.sort(key=lambda r: r["revenue"], reverse=True)
+    by_vendor.sort(key=lambda r: r["revenue"], reverse=True)
+
+    return {
+        "start": start.isoformat() if start else None,
+        "end": end.isoformat() if end else None,
+        "totals": {
+            "revenue": _money(lines["line_cents"].sum()),
+            "orders": int(np.unique(lines["order_id"]).size),
+            "lines": int(lines["line_cents"].size),
+            "items": int(lines["quantity"].sum()),
+        },
+        "by_category": by_category,
+        "by_month": by_month,
+        "by_vendor": by_vendor,
+    }
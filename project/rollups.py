@@ -0,0 +1,182 @@
+"""
+vendor_daily_sales rollup: one row per (vendor, day, artwork) with the
+confirmed leases, items and revenue of that day.
+
+The rollup is refreshed incrementally: days queued in sales_rollup_dirty (by
+each placed order's order_placed job and by admin edits), plus days touched
+by orders newer than the stored watermark, are rebuilt from order_item.
+Dashboards only ever read the rollup.
+
+The watermark alone would miss orders: order ids are assigned on insert, so
+an order can commit after one with a higher id has already moved it.
+"""
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Iterable, List, Optional
+
+from . import mysql
+from .archive import orders_source, order_items_source
+from .pool import replica_read
+
+ROLLUP_NAME = 'vendor_daily_sales'
+GRAINS = ('day', 'week', 'month')
+# Longest range, in days, vendor_sales_series is asked for at each grain (~1100 points)
+MAX_SERIES_DAYS = {'day': 3 * 366, 'week': 21 * 366, 'month': 90 * 366}
+
+
+def _as_date(value) -> Optional[date]:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def mark_orders_dirty(cur, order_ids: Iterable[int]) -> None:
+    """Queue the current order day(s) for a rebuild; call BEFORE and AFTER edits that move dates."""
+    ids = [int(i) for i in order_ids if i]
+    if not ids:
+        return
+    placeholders = ", ".join(["%s"] * len(ids))
+    cur.execute(f"""
+        INSERT INTO sales_rollup_dirty (salesDate)
+        SELECT DISTINCT DATE(orderDate) FROM orders
+         WHERE order_id IN ({placeholders}) AND orderDate IS NOT NULL
+    """, tuple(ids))
+
+
+def _rebuild_day(cur, day: date) -> None:
+    cur.execute("DELETE FROM vendor_daily_sales WHERE salesDate=%s", (day,))
+    # Days that were archived are rebuilt from the archive tables as well
+    cur.execute(f"""
+        INSERT INTO vendor_daily_sales (vendor_id, salesDate, artwork_id, leases, itemsLeased, revenue)
+        SELECT a.vendor_id, %s, oi.artwork_id,
+               COUNT(*),
+               COALESCE(SUM(oi.quantity), 0),
+               COALESCE(SUM(oi.unitPrice * oi.quantity * COALESCE(oi.rentalDuration, 1)), 0)
+          FROM {order_items_source(day)} oi
+          JOIN {orders_source(day)} o ON o.order_id = oi.order_id
+          JOIN artworks a ON a.artwork_id = oi.artwork_id
+         WHERE o.orderStatus = 'Confirmed'
+           AND o.customer_id IS NOT NULL
+           AND o.orderDate >= %s AND o.orderDate < %s
+         GROUP BY a.vendor_id, oi.artwork_id
+    """, (day, day, day + timedelta(days=1)))
+
+
+def refresh_vendor_daily_sales() -> int:
+    """Bring the rollup up to date. Returns the number of days rebuilt."""
+    from .db import transaction   # db imports this module
+
+    with transaction() as cur:
+        cur.execute("SELECT lastOrderID FROM rollup_state WHERE rollupName=%s", (ROLLUP_NAME,))
+        row = cur.fetchone()
+        last_id = int(row['lastOrderID']) if row else 0
+        cur.execute("SELECT COALESCE(MAX(order_id), 0) AS maxID FROM orders")
+        # Never move the watermark back (the newest orders may have been archived)
+        max_id = max(last_id, int(cur.fetchone()['maxID']))
+
+        # 1) Days of orders placed since the watermark
+        cur.execute("""
+            SELECT DISTINCT DATE(orderDate) AS salesDate FROM orders
+             WHERE order_id > %s AND order_id <= %s AND orderDate IS NOT NULL
+        """, (last_id, max_id))
+        days = {_as_date(r['salesDate']) for r in cur.fetchall()}
+
+        # 2) Days queued by status/date/line edits
+        cur.execute("SELECT dirty_id, salesDate FROM sales_rollup_dirty")
+        dirty = cur.fetchall()
+        days.update(_as_date(r['salesDate']) for r in dirty)
+
+        for day in sorted(d for d in days if d):
+            _rebuild_day(cur, day)
+
+        if dirty:
+            # Only drop what we processed, by id: marks committed meanwhile stay
+            # queued, even those with a lower id
+            processed = [r['dirty_id'] for r in dirty]
+            marks = ", ".join(["%s"] * len(processed))
+            cur.execute(f"DELETE FROM sales_rollup_dirty WHERE dirty_id IN ({marks})", tuple(processed))
+        cur.execute("UPDATE rollup_state SET lastOrderID=%s WHERE rollupName=%s", (max_id, ROLLUP_NAME))
+        if cur.rowcount == 0 and not row:
+            cur.execute("INSERT INTO rollup_state (rollupName, lastOrderID) VALUES (%s, %s)", (ROLLUP_NAME, max_id))
+    return len(days)
+
+
+def _bucket(day: date, grain: str) -> date:
+    if grain == 'week':
+        return day - timedelta(days=day.weekday())  # Monday
+    if grain == 'month':
+        return day.replace(day=1)
+    return day
+
+
+@replica_read
+def vendor_sales_series(vendor_id: int, start: date, end: date,
+                        grain: str = 'day', artwork_id: Optional[int] = None) -> List[dict]:
+    """Revenue / lease series for a vendor between start and end (inclusive)."""
+    if grain not in GRAINS:
+        grain = 'day'
+    sql = """
+        SELECT salesDate, SUM(revenue) AS revenue, SUM(leases) AS leases, SUM(itemsLeased) AS itemsLeased
+          FROM vendor_daily_sales
+         WHERE vendor_id=%s AND salesDate BETWEEN %s AND %s
+    """
+    params = [vendor_id, start, end]
+    if artwork_id:
+        sql += " AND artwork_id=%s"; params.append(artwork_id)
+    sql += " GROUP BY salesDate ORDER BY salesDate"
+
+    cur = mysql.connection.cursor()
+    cur.execute(sql, tuple(params))
+    rows = cur.fetchall()
+    cur.close()
+
+    # Fold daily rows into the requested grain (at most a few hundred rows)
+    buckets = {}
+    for r in rows:
+        key = _bucket(_as_date(r['salesDate']), grain)
+        b = buckets.setdefault(key, {"period": key.isoformat(), "revenue": Decimal("0.00"),
+                                     "leases": 0, "items_leased": 0})
+        b["revenue"] += Decimal(str(r['revenue'] or 0))
+        b["leases"] += int(r['leases'] or 0)
+        b["items_leased"] += int(r['itemsLeased'] or 0)
+
+    # Emit empty periods too so charts have a continuous x-axis
+    series, key = [], _bucket(start, grain)
+    while key <= end:
+        series.append(buckets.get(key) or {"period": key.isoformat(), "revenue": Decimal("0.00"),
+                                           "leases": 0, "items_leased": 0})
+        try:
+            if grain == 'month':
+                key = (key + timedelta(days=32)).replace(day=1)
+            else:
+                key += timedelta(days=7 if grain == 'week' else 1)
+        except OverflowError:   # the last period reaches date.max
+            break
+    return series
+
+
+@replica_read
+def vendor_artwork_breakdown(vendor_id: int, start: date, end: date) -> List[dict]:
+    cur = mysql.connection.cursor()
+    cur.execute("""
+        SELECT s.artwork_id, a.title,
+               SUM(s.revenue) AS revenue, SUM(s.leases) AS leases, SUM(s.itemsLeased) AS itemsLeased
+          FROM vendor_daily_sales s
+          LEFT JOIN artworks a ON a.artwork_id = s.artwork_id
+         WHERE s.vendor_id=%s AND s.salesDate BETWEEN %s AND %s
+         GROUP BY s.artwork_id, a.title
+         ORDER BY revenue DESC
+    """, (vendor_id, start, end))
+    rows = cur.fetchall()
+    cur.close()
+    return [{
+        "artwork_id": r['artwork_id'],
+        "title": r['title'],
+        "revenue": Decimal(str(r['revenue'] or 0)),
+        "leases": int(r['leases'] or 0),
+        "items_leased": int(r['itemsLeased'] or 0),
+    } for r in rows]
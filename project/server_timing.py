@@ -0,0 +1,185 @@
+"""
+Server-Timing response header, for reading a request's cost in the
+browser's dev tools (Network > Timing):
+
+    Server-Timing: sql;dur=12.4;desc="5 queries", tpl;dur=8.1, session;dur=0.3,
+                   cache-suggest;desc="2 hit 1 miss", total;dur=23.9
+
+    sql       MySQL round trips of this request, fan-out threads included
+    tpl       render_template time
+    session   loading and saving the session cookie
+    cache-*   in-process cache lookups (project/suggest.py, project/catalog_snapshot.py)
+    total     from the request reaching the app to the response headers
+
+Streamed pages (project/streaming.py: / and /manage/) send their headers
+before the template renders, so their header has no tpl entry and covers
+only the work done before the first chunk (the page's queries included).
+
+Enabled with SERVER_TIMING_ENABLED (on in the dev profile). When off,
+init_app installs nothing: cursors, the session interface and the WSGI
+app are left as they are, and note_cache returns straight away.
+"""
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from flask import before_render_template, request, template_rendered, has_request_context
+from flask.sessions import SessionInterface
+
+ENVIRON_KEY = 'project.server_timing'
+
+_enabled = False
+
+
+class Timing:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sql_count = 0
+        self.sql = 0.0
+        self.template = 0.0
+        self.session = 0.0
+        self.caches: Dict[str, List[int]] = defaultdict(lambda: [0, 0])   # name -> [hits, misses]
+        self._rendering: List[float] = []
+        self._lock = threading.Lock()   # fan-out threads add to the same request
+
+    def add_sql(self, seconds: float) -> None:
+        with self._lock:
+            self.sql_count += 1
+            self.sql += seconds
+
+    def add_cache(self, name: str, hit: bool) -> None:
+        with self._lock:
+            self.caches[name][0 if hit else 1] += 1
+
+    def header(self) -> str:
+        ms = lambda seconds: f"{seconds * 1000:.1f}"
+        parts = [f'sql;dur={ms(self.sql)};desc="{self.sql_count} queries"']
+        if self.template:
+            parts.append(f"tpl;dur={ms(self.template)}")
+        parts.append(f"session;dur={ms(self.session)}")
+        for name, (hits, misses) in sorted(self.caches.items()):
+            parts.append(f'cache-{name};desc="{hits} hit {misses} miss"')
+        parts.append(f"total;dur={ms(time.perf_counter() - self.started)}")
+        return ', '.join(parts)
+
+
+def current_timing() -> Optional[Timing]:
+    if not _enabled or not has_request_context():
+        return None
+    return request.environ.get(ENVIRON_KEY)
+
+
+def note_cache(name: str, hit: bool) -> None:
+    """Record a cache lookup for this request's Server-Timing header."""
+    timing = current_timing()
+    if timing is not None:
+        timing.add_cache(name, hit)
+
+
+# SQL: every cursor class a pooled connection hands out is swapped for a timed subclass
+
+_cursor_classes: dict = {}
+
+
+def _timed_cursor(base):
+    cls = _cursor_classes.get(base)
+    if cls is None:
+        class TimedCursor(base):
+            # execute, executemany and callproc all send their SQL through _query
+            def _query(self, *args):
+                timing = current_timing()
+                if timing is None:
+                    return super()._query(*args)
+                started = time.perf_counter()
+                try:
+                    return super()._query(*args)
+                finally:
+                    timing.add_sql(time.perf_counter() - started)
+
+        TimedCursor.__name__ = TimedCursor.__qualname__ = f"Timed{base.__name__}"
+        cls = _cursor_classes[base] = TimedCursor
+    return cls
+
+
+def _time_cursors(conn) -> None:
+    # Covers cursor() and cursor(Cursor) / cursor(SSCursor) (project/mapping.py, project/reports.py)
+    cursor = conn.cursor
+    conn.cursor = lambda cursorclass=None: cursor(_timed_cursor(cursorclass or conn.cursorclass))
+
+
+class TimedSessionInterface(SessionInterface):
+    """Wraps the app's session interface to time opening and saving the session."""
+
+    def __init__(self, inner: SessionInterface):
+        self.inner = inner
+
+    def __getattr__(self, name):
+        return getattr(self.inner, name)
+
+    def open_session(self, app, request):
+        started = time.perf_counter()
+        try:
+            return self.inner.open_session(app, request)
+        finally:
+            timing = request.environ.get(ENVIRON_KEY)
+            if timing is not None:
+                timing.session += time.perf_counter() - started
+
+    def save_session(self, app, session, response):
+        started = time.perf_counter()
+        try:
+            return self.inner.save_session(app, session, response)
+        finally:
+            timing = request.environ.get(ENVIRON_KEY)
+            if timing is not None:
+                timing.session += time.perf_counter() - started
+
+    # Flask calls these on the interface itself, not through open/save_session
+    def make_null_session(self, app):
+        return self.inner.make_null_session(app)
+
+    def is_null_session(self, obj):
+        return self.inner.is_null_session(obj)
+
+
+class ServerTimingMiddleware:
+    """Starts each request's Timing and adds the header when the response starts."""
+
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+
+    def __call__(self, environ, start_response):
+        timing = environ[ENVIRON_KEY] = Timing()
+
+        def start(status, headers, exc_info=None):
+            headers.append(('Server-Timing', timing.header()))
+            return start_response(status, headers, exc_info)
+        return self.wsgi_app(environ, start)
+
+
+def init_app(app) -> None:
+    """Call after mysql.init_app and after any other WSGI middleware is applied."""
+    global _enabled
+    app.config.setdefault('SERVER_TIMING_ENABLED', False)
+    if not app.config['SERVER_TIMING_ENABLED']:
+        return
+    _enabled = True
+
+    from . import mysql
+    with app.app_context():   # the pools live in app.extensions
+        mysql.add_connect_hook(_time_cursors)
+    app.session_interface = TimedSessionInterface(app.session_interface)
+    app.wsgi_app = ServerTimingMiddleware(app.wsgi_app)
+
+    @before_render_template.connect_via(app, weak=False)
+    def _template_started(sender, template, context, **extra):
+        timing = current_timing()
+        if timing is not None:
+            timing._rendering.append(time.perf_counter())
+
+    @template_rendered.connect_via(app, weak=False)
+    def _template_finished(sender, template, context, **extra):
+        timing = current_timing()
+        if timing is not None and timing._rendering:
+            timing.template += time.perf_counter() - timing._rendering.pop()
@@ -1,5 +1,5 @@
 from flask import session
-from project.db import get_artwork, can_fulfill_request
+from project.db import get_artworks_by_ids, can_fulfill_request
 from project.models import Cart, CartItem, Order, OrderItem, OrderStatus
 from decimal import Decimal
 
@@ -10,11 +10,15 @@ def get_user_dict():
 def get_cart() -> Cart:
     data = session.get('cart') or {'items': []}
     cart = Cart(cart_id=None, cartToken=0, customer_id=None)
+    # One query for every line instead of one per line (descriptions not needed here)
+    artworks = get_artworks_by_ids(
+        row.get('artwork_id') for row in data.get('items', []) if row.get('artwork_id') is not None
+    )
     for row in data.get('items', []):
         artwork_id = row.get('artwork_id')
         if artwork_id is None:
             continue
-        artwork = get_artwork(int(artwork_id))
+        artwork = artworks.get(int(artwork_id))
         if not artwork:
             continue
         cart.items.append(CartItem(
@@ -0,0 +1,14 @@
+"""
+App signals (blinker, as used by Flask itself).
+
+catalog_changed is sent when an artwork is added, edited, published,
+unpublished or deleted; receivers get `artwork_ids`. It is sent inside the
+write's db.transaction(), so rows a receiver writes commit (or roll back)
+together with the change. Receivers should queue work (see
+project/tasks.py) rather than do it inside the request.
+"""
+from blinker import Namespace
+
+_signals = Namespace()
+
+catalog_changed = _signals.signal('catalog-changed')
@@ -0,0 +1,248 @@
+"""
+Embedded SQLite storage (DB_BACKEND = 'sqlite') for single-node shops and
+fast throwaway databases, with no MySQL server to run.
+
+    SQLITE_PATH = None        # <instance>/artlease.db
+    SQLITE_PATH = ':memory:'  # a fresh database per app, gone when the process exits
+
+A database without tables gets database_sqlite.sql (the schema and seed
+data of database.sql, translated) when the app starts.
+
+Connections mimic MySQLdb so the SQL in project/db.py runs unchanged: %s
+placeholders become ?, rows are dicts by default (Cursor gives tuples),
+DECIMAL / DATE / DATETIME columns come back as Decimal / date / datetime,
+and duplicate keys raise IntegrityError.
+
+Pragmas (SQLITE_PRAGMAS overrides single entries):
+
+    journal_mode=WAL      readers never block the writer, nor the writer readers
+    synchronous=NORMAL    fsync at checkpoints only; a power cut may lose the
+                          last commits but never corrupts the file
+    busy_timeout          writers queue for the write lock instead of failing
+    cache_size, mmap_size keep the hot pages in memory
+
+SQLite takes one writer at a time, which is plenty for a shop's order rate;
+move to MySQL once writes start waiting on each other. MYSQL_REPLICAS is
+ignored: @replica_read functions read the same file.
+"""
+import os
+import re
+import sqlite3
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
+
+from flask import current_app, g
+
+from .pool import ConnectionPool
+
+SCHEMA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'database_sqlite.sql')
+
+PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'foreign_keys': 'ON',
+    'busy_timeout': 5000,          # ms
+    'cache_size': -32000,          # KiB per connection
+    'temp_store': 'MEMORY',
+    'mmap_size': 256 * 1024 * 1024,
+}
+
+# Values as MySQLdb returns them. Every DECIMAL column in the schema has 2 places.
+_CENTS = Decimal('0.01')
+sqlite3.register_adapter(Decimal, str)
+sqlite3.register_adapter(date, date.isoformat)
+sqlite3.register_adapter(datetime, lambda d: d.isoformat(' ', 'seconds'))
+sqlite3.register_converter('DECIMAL', lambda b: Decimal(b.decode()).quantize(_CENTS))
+sqlite3.register_converter('DATE', lambda b: date.fromisoformat(b.decode()[:10]))
+sqlite3.register_converter('DATETIME', lambda b: datetime.fromisoformat(b.decode()))
+
+_PARAM = re.compile(r'%[s%]')
+
+
+@lru_cache(maxsize=512)
+def _translate(sql: str) -> str:
+    # MySQLdb paramstyle: %s is a parameter, %% a literal percent sign
+    return _PARAM.sub(lambda m: '?' if m.group() == '%s' else '%', sql)
+
+
+class Cursor:
+    """Tuple rows, like MySQLdb.cursors.Cursor."""
+
+    def __init__(self, connection: 'Connection'):
+        self.connection = connection
+        self._cur = connection._conn.cursor()
+
+    def _query(self, sql: str, params=None, many: bool = False):
+        raw = self.connection._conn
+        if not raw.in_transaction and sql.lstrip()[:9].upper() == 'SAVEPOINT':
+            # A savepoint outside a transaction would commit on RELEASE; nest it in one
+            raw.execute('BEGIN')
+        if params is None:
+            self._cur.execute(sql)
+        elif many:
+            self._cur.executemany(_translate(sql), params)
+        else:
+            self._cur.execute(_translate(sql), params)
+
+    def execute(self, query: str, args=None) -> int:
+        if args is not None and not isinstance(args, dict):
+            args = tuple(args)
+        self._query(query, args)
+        return self._cur.rowcount
+
+    def executemany(self, query: str, args) -> int:
+        self._query(query, [tuple(a) for a in args], many=True)
+        return self._cur.rowcount
+
+    def _row(self, row):
+        return row
+
+    def fetchone(self):
+        row = self._cur.fetchone()
+        return None if row is None else self._row(row)
+
+    def fetchmany(self, size: int = None):
+        rows = self._cur.fetchmany(size or self._cur.arraysize)
+        return [self._row(r) for r in rows]
+
+    def fetchall(self):
+        return [self._row(r) for r in self._cur.fetchall()]
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    @property
+    def description(self):
+        return self._cur.description
+
+    @property
+    def rowcount(self) -> int:
+        return self._cur.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cur.lastrowid
+
+    def close(self) -> None:
+        self._cur.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class DictCursor(Cursor):
+    """Dict rows keyed by column name, like MySQLdb.cursors.DictCursor."""
+
+    def _row(self, row):
+        return dict(zip([d[0] for d in self._cur.description], row))
+
+    def fetchmany(self, size: int = None):
+        names = [d[0] for d in self._cur.description or ()]
+        return [dict(zip(names, r)) for r in self._cur.fetchmany(size or self._cur.arraysize)]
+
+    def fetchall(self):
+        names = [d[0] for d in self._cur.description or ()]
+        return [dict(zip(names, r)) for r in self._cur.fetchall()]
+
+
+# sqlite3 already steps through results as they are fetched
+SSCursor = Cursor
+
+
+class Connection:
+    """A sqlite3 connection with the MySQLdb methods the app uses."""
+
+    Error = sqlite3.Error
+    DatabaseError = sqlite3.DatabaseError
+    IntegrityError = sqlite3.IntegrityError
+    OperationalError = sqlite3.OperationalError
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+        self.cursorclass = DictCursor
+
+    def cursor(self, cursorclass=None):
+        return (cursorclass or self.cursorclass)(self)
+
+    def commit(self) -> None:
+        self._conn.commit()
+
+    def rollback(self) -> None:
+        self._conn.rollback()
+
+    def ping(self) -> None:
+        self._conn.execute('SELECT 1')
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class SQLiteBackend:
+    def init_app(self, app):
+        app.config.setdefault('SQLITE_PATH', None)
+        app.config.setdefault('SQLITE_PRAGMAS', {})
+        app.config.setdefault('MYSQL_POOL_SIZE', 10)
+        app.config.setdefault('MYSQL_POOL_TIMEOUT', 5)
+
+        path = app.config['SQLITE_PATH'] or os.path.join(app.instance_path, 'artlease.db')
+        if path == ':memory:':
+            # Named memdb database: every pooled connection sees the same data, with
+            # ordinary locking (busy_timeout applies, unlike cache=shared's table locks)
+            self._target, self._uri = f"file:/artlease-{id(app)}?vfs=memdb", True
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._target, self._uri = path, False
+        self._pragmas = {**PRAGMAS, **app.config['SQLITE_PRAGMAS']}
+
+        first = self._connect()
+        if first._conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='artworks'").fetchone() is None:
+            with open(SCHEMA, encoding='utf-8') as f:
+                first._conn.executescript(f.read())
+            first.commit()
+        if self._uri:
+            app.extensions['sqlite_keepalive'] = first   # the database lives while one connection is open
+        else:
+            first.close()
+
+        app.extensions['sqlite_pool'] = ConnectionPool(
+            self._connect, max_size=app.config['MYSQL_POOL_SIZE'],
+            timeout=app.config['MYSQL_POOL_TIMEOUT'], ping_after=float('inf'))
+        app.teardown_appcontext(self.teardown)
+
+    def _connect(self) -> Connection:
+        conn = sqlite3.connect(self._target, uri=self._uri, detect_types=sqlite3.PARSE_DECLTYPES,
+                               check_same_thread=False)   # the pool hands it to one thread at a time
+        for name, value in self._pragmas.items():
+            conn.execute(f"PRAGMA {name}={value}")
+        return Connection(conn)
+
+    @property
+    def pool(self) -> ConnectionPool:
+        return current_app.extensions['sqlite_pool']
+
+    def pools(self) -> dict:
+        return {"primary": self.pool}
+
+    def add_connect_hook(self, hook) -> None:
+        self.pool.connect_hooks.append(hook)
+
+    @property
+    def connection(self) -> Connection:
+        if 'sqlite_db' not in g:
+            g.sqlite_db = self.pool.acquire()
+        return g.sqlite_db
+
+    def tuple_cursor(self):
+        return self.connection.cursor(Cursor)
+
+    def stream_cursor(self):
+        return self.connection.cursor(SSCursor)
+
+    def teardown(self, exception):
+        conn = g.pop('sqlite_db', None)
+        if conn is not None:
+            self.pool.release(conn)
@@ -0,0 +1,76 @@
+"""
+Cold-start helpers: persistent Jinja bytecode cache, eager template
+compilation and startup timing.
+
+Timings are kept in app.extensions['cold_start'] and logged at INFO:
+    imports        importing the project package (Flask, extensions, ...)
+    create_app     building the app, including views and template compilation
+    precompile     compiling every template up front (if enabled)
+    first_render   the first template render in this process
+    first_request  process start -> first response
+"""
+import os
+import threading
+import time
+
+from flask import before_render_template, template_rendered
+from jinja2 import FileSystemBytecodeCache
+
+# Templates kept for reference only; never rendered
+SKIP_PREFIXES = ('Original HTML/',)
+
+
+def configure_bytecode_cache(app) -> None:
+    # Must run before app.jinja_env is first touched (extensions create it)
+    if not app.config.get('JINJA_BYTECODE_CACHE'):
+        return
+    cache_dir = app.config.get('JINJA_BYTECODE_CACHE_DIR') or os.path.join(app.instance_path, 'jinja_cache')
+    os.makedirs(cache_dir, exist_ok=True)
+    app.jinja_options = {**app.jinja_options, 'bytecode_cache': FileSystemBytecodeCache(cache_dir)}
+
+
+def precompile_templates(app) -> int:
+    """Compile the app's own templates now (filling the bytecode cache). Returns the count."""
+    compiled = 0
+    for name in app.jinja_loader.list_templates():
+        if name.startswith(SKIP_PREFIXES) or not name.endswith('.html'):
+            continue
+        try:
+            app.jinja_env.get_template(name)
+            compiled += 1
+        except Exception:
+            app.logger.exception("Could not precompile template %s", name)
+    return compiled
+
+
+def track_cold_start(app, process_started: float, imports_seconds: float, created_started: float) -> None:
+    timings = app.extensions.setdefault('cold_start', {})
+    timings['imports'] = round(imports_seconds, 4)
+    timings['create_app'] = round(time.perf_counter() - created_started, 4)
+    app.logger.info("cold start: imports %.3fs, create_app %.3fs", timings['imports'], timings['create_app'])
+
+    lock = threading.Lock()
+    render_started = {}
+
+    def on_before_render(sender, template, context, **extra):
+        with lock:
+            render_started.setdefault('t', time.perf_counter())
+
+    def on_rendered(sender, template, context, **extra):
+        with lock:
+            if 'first_render' in timings:
+                return
+            timings['first_render'] = round(time.perf_counter() - render_started.get('t', time.perf_counter()), 4)
+        app.logger.info("cold start: first render (%s) %.3fs", template.name, timings['first_render'])
+        before_render_template.disconnect(on_before_render, app)
+        template_rendered.disconnect(on_rendered, app)
+
+    before_render_template.connect(on_before_render, app, weak=False)
+    template_rendered.connect(on_rendered, app, weak=False)
+
+    @app.after_request
+    def _first_request(response):
+        if 'first_request' not in timings:
+            timings['first_request'] = round(time.perf_counter() - process_started, 4)
+            app.logger.info("cold start: first response %.3fs after process start", timings['first_request'])
+        return response
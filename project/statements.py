@@ -0,0 +1,82 @@
+"""
+Registry of hot SQL statements.
+
+A statement's text is built once (at import, or once per filter shape for
+filter_items) and run through Statement.execute, which counts executions
+and latency per statement in this process. Admins can read the numbers at
+/manage/statements.json.
+
+    GET_CATEGORY = statement('get_category', "SELECT ... WHERE category_id=%s")
+    query_model(CATEGORY, GET_CATEGORY, (category_id,))
+
+mysqlclient only speaks MySQL's text protocol, so there are no binary
+server-side prepared statements. SQL-level PREPARE/EXECUTE would add a
+SET @param round trip to every call, which costs more than MySQL parsing
+these short queries, so only the text is cached.
+"""
+import threading
+import time
+from typing import Dict, List
+
+
+class Statement:
+    __slots__ = ('name', 'sql', 'calls', 'total_seconds', 'max_seconds', '_lock')
+
+    def __init__(self, name: str, sql: str):
+        self.name = name
+        self.sql = sql
+        self.calls = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self._lock = threading.Lock()   # fan-out threads share statements
+
+    def execute(self, cur, params: tuple = ()):
+        start = time.perf_counter()
+        try:
+            return cur.execute(self.sql, params)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.calls += 1
+                self.total_seconds += elapsed
+                self.max_seconds = max(self.max_seconds, elapsed)
+
+    def stats(self) -> dict:
+        calls, total = self.calls, self.total_seconds
+        return {
+            "name": self.name,
+            "calls": calls,
+            "avg_ms": round(total / calls * 1000, 3) if calls else 0.0,
+            "max_ms": round(self.max_seconds * 1000, 3),
+            "total_ms": round(total * 1000, 1),
+        }
+
+    def __repr__(self):
+        return f"<Statement {self.name}>"
+
+
+_registry: Dict[str, Statement] = {}
+_registry_lock = threading.Lock()
+
+
+def statement(name: str, sql: str) -> Statement:
+    """Register a statement under `name`, or return the one already registered."""
+    with _registry_lock:
+        stmt = _registry.get(name)
+        if stmt is None:
+            stmt = _registry[name] = Statement(name, sql)
+        return stmt
+
+
+def execute(cur, sql, params: tuple = ()):
+    """cur.execute for either a registered Statement or plain SQL text."""
+    if isinstance(sql, Statement):
+        return sql.execute(cur, params)
+    return cur.execute(sql, params)
+
+
+def statement_stats() -> List[dict]:
+    """Per-statement numbers for this process, most total time first."""
+    with _registry_lock:
+        stmts = list(_registry.values())
+    return sorted((s.stats() for s in stmts), key=lambda s: -s["total_ms"])
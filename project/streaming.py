@@ -0,0 +1,43 @@
+"""
+Streamed page rendering for large pages (the homepage listing, /manage/).
+
+stream_page sends the page as Jinja renders it instead of building the
+whole HTML string first. Everything up to </head> goes out as the first
+chunk so the browser can start fetching CSS; after that, chunks of
+STREAM_CHUNK_SIZE characters keep the number of writes (and compression
+flushes) low.
+
+The session cookie is sent with the headers, before the body renders, so
+anything a template would store in the session must happen up front:
+flashed messages are popped and the CSRF token is generated here.
+"""
+from typing import Iterator
+
+from flask import Response, current_app, get_flashed_messages, stream_template
+from flask_wtf.csrf import generate_csrf
+
+STREAM_CHUNK_SIZE = 16 * 1024
+
+
+def _chunks(pieces: Iterator[str], size: int) -> Iterator[str]:
+    buf, length, head_sent = [], 0, False
+    try:
+        for piece in pieces:
+            buf.append(piece)
+            length += len(piece)
+            if length >= size or (not head_sent and '</head>' in piece):
+                head_sent = True
+                yield ''.join(buf)
+                buf, length = [], 0
+        if buf:
+            yield ''.join(buf)
+    finally:
+        pieces.close()   # ends the request context even if the client went away
+
+
+def stream_page(template_name: str, **context) -> Response:
+    get_flashed_messages(with_categories=True)    # cached on the request for the template
+    if current_app.config.get('WTF_CSRF_ENABLED', True):
+        generate_csrf()
+    size = current_app.config.get('STREAM_CHUNK_SIZE', STREAM_CHUNK_SIZE)
+    return Response(_chunks(stream_template(template_name, **context), size), mimetype='text/html')
@@ -0,0 +1,233 @@
+"""
+Typeahead suggestions for the site search box.
+
+Listed artwork titles, vendors' artisticName and category names are held in
+memory as one sorted array of (normalised key, entry) pairs. Every word of
+a label starts a key, so "ocean" finds "Blue Ocean Waves". A prefix lookup
+is two bisects plus a scan of the matching slice, ranked by popularity
+(order lines in the hot order tables). Short prefixes that match more than
+MAX_SCAN keys get their top entries precomputed when the index is built,
+so no keystroke scans more than MAX_SCAN keys. Answers are memoised per
+prefix until the next update.
+
+The index is built once per process, then kept current from the
+catalog_changes log (project/catalog_changes.py). Popularity is refreshed by
+a full rebuild every SUGGEST_REBUILD_SECONDS.
+"""
+import heapq
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from flask import current_app
+
+from . import mysql
+from .catalog_changes import Watermark, changes_since, follow, start_watcher, start_watermark
+from .server_timing import note_cache
+
+MAX_SCAN = 1000          # keys examined per uncached prefix
+HOT_PREFIX_CHARS = 6     # prefixes up to this long get precomputed when they match > MAX_SCAN keys
+TOP_N = 20               # entries kept per precomputed prefix (max limit)
+_CACHE_SIZE = 4096
+_END = '\x7f'             # sorts after every normalised character
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+class Suggestion(NamedTuple):
+    kind: str            # 'artwork' | 'vendor' | 'category'
+    id: int
+    label: str
+    score: int
+
+
+def _normalise(text: Optional[str]) -> str:
+    text = unicodedata.normalize('NFKD', text or '').encode('ascii', 'ignore').decode('ascii')
+    return _NON_WORD.sub(' ', text.lower()).strip()
+
+
+def _keys_for(entry_key: str, label: str) -> List[Tuple[str, str]]:
+    words = _normalise(label).split()
+    return [(' '.join(words[i:]), entry_key) for i in range(len(words))]
+
+
+def _rank(entries: Dict[str, Suggestion], keys, limit: int) -> List[Suggestion]:
+    return heapq.nsmallest(limit, (entries[k] for k in {k[1] for k in keys}),
+                           key=lambda s: (-s.score, s.label.lower()))
+
+
+def _hot_prefixes(keys, entries) -> Dict[str, List[Suggestion]]:
+    hot = {}
+    for length in range(1, HOT_PREFIX_CHARS + 1):
+        i, n = 0, len(keys)
+        while i < n:
+            prefix = keys[i][0][:length]
+            j = bisect_left(keys, (prefix + _END,), i)
+            if j - i > MAX_SCAN and len(prefix) == length:
+                hot[prefix] = _rank(entries, keys[i:j], TOP_N)
+            i = j
+    return hot
+
+
+class SuggestIndex:
+    def __init__(self):
+        self._keys: List[Tuple[str, str]] = []
+        self._entries: Dict[str, Suggestion] = {}
+        self._hot: Dict[str, List[Suggestion]] = {}
+        self._cache: Dict[Tuple[str, int], List[Suggestion]] = {}
+        self._lock = threading.Lock()      # serialises writers; readers never block
+        self.watermark: Optional[Watermark] = None
+        self.built_at = 0.0
+
+    @property
+    def ready(self) -> bool:
+        return self.watermark is not None
+
+    def __len__(self):
+        return len(self._entries)
+
+    # Reads
+
+    def suggest(self, prefix: str, limit: int = 8) -> List[Suggestion]:
+        q = _normalise(prefix)
+        if not q:
+            return []
+        cache = self._cache
+        hit = cache.get((q, limit))
+        note_cache('suggest', hit is not None)
+        if hit is not None:
+            return hit
+
+        keys, entries, hot = self._keys, self._entries, self._hot     # one consistent snapshot
+        if q in hot:
+            result = hot[q][:limit]
+        else:
+            i = bisect_left(keys, (q,))
+            j = bisect_left(keys, (q + _END,), i)
+            # Longer prefixes matching > MAX_SCAN keys are rare; rank the first MAX_SCAN
+            result = _rank(entries, keys[i:min(j, i + MAX_SCAN)], limit)
+
+        if len(cache) >= _CACHE_SIZE:
+            cache.clear()
+        cache[(q, limit)] = result
+        return result
+
+    # Writes: build new arrays, then swap them in
+
+    def _swap(self, keys, entries):
+        hot = _hot_prefixes(keys, entries)
+        self._keys, self._entries, self._hot, self._cache = keys, entries, hot, {}
+
+    def replace(self, suggestions: Iterable[Suggestion]) -> None:
+        entries = {f"{s.kind}:{s.id}": s for s in suggestions}
+        keys = sorted(k for key, s in entries.items() for k in _keys_for(key, s.label))
+        with self._lock:
+            self._swap(keys, entries)
+
+    def update(self, removed: Iterable[str], added: Iterable[Suggestion]) -> None:
+        with self._lock:
+            entries = dict(self._entries)
+            gone = set(removed)
+            for key in gone:
+                entries.pop(key, None)
+            new_keys = []
+            for s in added:
+                key = f"{s.kind}:{s.id}"
+                entries[key] = s
+                gone.add(key)
+                new_keys.extend(_keys_for(key, s.label))
+            keys = [k for k in self._keys if k[1] not in gone]
+            keys.extend(new_keys)
+            keys.sort()
+            self._swap(keys, entries)
+
+    # Loading from MySQL (never on the per-keystroke path)
+
+    def rebuild(self) -> None:
+        watermark = start_watermark()   # before loading, so no change slips between the two
+        suggestions = _load_artworks() + _load_vendors() + _load_categories()
+        self.replace(suggestions)
+        self.watermark = watermark
+        self.built_at = time.monotonic()
+
+    def sync(self) -> None:
+        if not self.ready:
+            return
+        if time.monotonic() - self.built_at > current_app.config.get('SUGGEST_REBUILD_SECONDS', 3600):
+            self.rebuild()
+            return
+        watermark, artwork_ids = changes_since(self.watermark)
+        if artwork_ids:
+            self.update((f"artwork:{a}" for a in artwork_ids), _load_artworks(artwork_ids))
+        self.watermark = watermark
+
+
+def _load_artworks(artwork_ids: Optional[Iterable[int]] = None) -> List[Suggestion]:
+    sql = """
+        SELECT a.artwork_id, a.title, COUNT(oi.orderItem_id) AS popularity
+          FROM artworks a
+          LEFT JOIN order_item oi ON oi.artwork_id = a.artwork_id
+         WHERE a.availabilityStatus = 'Listed'
+    """
+    params: tuple = ()
+    if artwork_ids is not None:
+        params = tuple(artwork_ids)
+        sql += f" AND a.artwork_id IN ({', '.join(['%s'] * len(params))})"
+    sql += " GROUP BY a.artwork_id, a.title"
+    cur = mysql.connection.cursor()
+    cur.execute(sql, params)
+    rows = cur.fetchall()
+    cur.close()
+    return [Suggestion('artwork', r['artwork_id'], r['title'], int(r['popularity'])) for r in rows if r['title']]
+
+
+def _load_vendors() -> List[Suggestion]:
+    cur = mysql.connection.cursor()
+    cur.execute("""
+        SELECT v.vendor_id, v.artisticName, COUNT(oi.orderItem_id) AS popularity
+          FROM vendors v
+          LEFT JOIN artworks   a  ON a.vendor_id   = v.vendor_id
+          LEFT JOIN order_item oi ON oi.artwork_id = a.artwork_id
+         GROUP BY v.vendor_id, v.artisticName
+    """)
+    rows = cur.fetchall()
+    cur.close()
+    return [Suggestion('vendor', r['vendor_id'], r['artisticName'], int(r['popularity']))
+            for r in rows if r['artisticName']]
+
+
+def _load_categories() -> List[Suggestion]:
+    cur = mysql.connection.cursor()
+    cur.execute("""
+        SELECT c.category_id, c.categoryName, COUNT(oi.orderItem_id) AS popularity
+          FROM categories c
+          LEFT JOIN artworks   a  ON a.category_id = c.category_id
+          LEFT JOIN order_item oi ON oi.artwork_id = a.artwork_id
+         GROUP BY c.category_id, c.categoryName
+    """)
+    rows = cur.fetchall()
+    cur.close()
+    return [Suggestion('category', r['category_id'], r['categoryName'], int(r['popularity']))
+            for r in rows if r['categoryName']]
+
+
+_index = SuggestIndex()
+_build_lock = threading.Lock()
+
+
+def suggest(prefix: str, limit: int = 8) -> List[Suggestion]:
+    if not _index.ready:
+        # First use in this process: build once, then follow the change log
+        with _build_lock:
+            if not _index.ready:
+                _index.rebuild()
+                follow(_index)
+    start_watcher(current_app._get_current_object())   # no-op once running in this process
+    return _index.suggest(prefix, limit)
+
+
+def index_stats() -> dict:
+    """Entry counts for /metrics."""
+    return {"suggest_entries": len(_index), "suggest_answers": len(_index._cache)}
@@ -0,0 +1,51 @@
+"""
+Job handlers run by worker.py (see project/jobs.py).
+Jobs may be retried, so every handler must be safe to run more than once.
+"""
+from project.archive import archive_closed_orders
+from project.catalog_changes import log_changes, purge_changes
+from project.db import transaction
+from project.jobs import enqueue, job
+from project.recommend import rebuild_similar
+from project.rollups import mark_orders_dirty, refresh_vendor_daily_sales
+from project.signals import catalog_changed
+
+
+@job('order_placed')
+def order_placed(order_id: int):
+    # Post-checkout follow-ups that should not hold up the customer's request.
+    # Queue the order's day by id: the rollup watermark skips an order that
+    # committed after a later one.
+    with transaction() as cur:
+        mark_orders_dirty(cur, [order_id])
+    refresh_vendor_daily_sales()
+
+
+@job('refresh_sales_rollup')
+def refresh_sales_rollup():
+    refresh_vendor_daily_sales()
+
+
+@job('archive_orders')
+def archive_orders(months: int = None):
+    # Roll up pending orders first so nothing is archived before it is counted
+    refresh_vendor_daily_sales()
+    archive_closed_orders(months)
+
+
+@job('refresh_similar')
+def refresh_similar(artwork_ids: list = None):
+    # None rebuilds every artwork's list; otherwise only what the change affects
+    rebuild_similar(artwork_ids)
+
+
+@job('purge_catalog_changes')
+def purge_catalog_changes(older_than_hours: int = 24):
+    purge_changes(older_than_hours)
+
+
+@catalog_changed.connect
+def _queue_catalog_jobs(sender, artwork_ids=(), **extra):
+    # In-memory indexes in every worker follow this log (search suggestions, ...)
+    log_changes(artwork_ids)
+    enqueue('refresh_similar', {'artwork_ids': list(artwork_ids)})
@@ -1,8 +1,11 @@
+import os
 import re
+from datetime import date, timedelta
+from functools import partial
 
 from flask import (
     Blueprint, render_template, request, redirect,
-    url_for, flash, session, abort
+    url_for, flash, session, abort, jsonify, send_file, current_app
 )
 
 from project.db import (
@@ -25,7 +28,8 @@ from project.db import (
     register_account,
     check_for_user_with_hint,
     add_order, 
-    ensure_address, can_fulfill_request
+    ensure_address, can_fulfill_request,
+    transaction
 )
 
 from project.session import (
@@ -35,9 +39,22 @@ from project.session import (
 )
 
 from project.forms import (
-    AddToCartForm, ArtworkForm, LoginForm, CheckoutForm, RegisterForm
+    AddToCartForm, ArtworkForm, NewArtworkForm, LoginForm, CheckoutForm, RegisterForm
 )
 
+from project.reports import revenue_report
+from project.recommend import similar_artworks
+from project.suggest import suggest
+from project.facets import facet_counts, price_buckets
+from project.rollups import vendor_sales_series, vendor_artwork_breakdown, GRAINS, MAX_SERIES_DAYS
+from project.jobs import enqueue
+from project.limits import lane, rate_limit
+from project.fanout import run_parallel
+from project.statements import statement_stats
+from project.streaming import stream_page
+from project.images import ImageError, MIME_TYPES, media_path, save_upload
+from project.profiling import HEADER as PROFILE_HEADER, make_profile_token
+
 from project.wrappers import (
     only_admins, only_vendors, only_guests_or_customers, only_guests, only_customers
 )
@@ -47,6 +64,8 @@ bp = Blueprint('main', __name__)
 
 
 @bp.route('/')
+@rate_limit('search', '30/minute', when=lambda: bool(request.args.get('q')))
+@lane(lambda: 'bulk' if request.args else 'default')  # filtered/searched listings are unpaginated
 def index():
     sort = request.args.get('sort', default='latest')
     min_price = request.args.get('min', type=float)
@@ -69,23 +88,34 @@ def index():
         sort != 'latest'
     ])
 
-    artworks = filter_items(
-        category_id=category_id,
-        min_price=min_price,
-        max_price=max_price,
-        q=q,
-        availability='Listed',
-        sort=sort,
-        limit=None 
-    )
-
-    vendors = get_all_vendors(limit=12)
-    categories = get_categories()
-    return render_template(
+    # Independent queries: run them side by side on separate connections
+    calls = {
+        'artworks': partial(
+            filter_items,
+            category_id=category_id,
+            min_price=min_price,
+            max_price=max_price,
+            q=q,
+            availability='Listed',
+            sort=sort,
+            limit=None
+        ),
+        'vendors': partial(get_all_vendors, limit=12),
+        'categories': get_categories,
+    }
+    if not q:
+        # Counts come from in-memory bitmaps (project/facets.py); free-text search has no bitmap
+        calls['facets'] = partial(facet_counts, category_id=category_id,
+                                  min_price=min_price, max_price=max_price)
+    page = run_parallel(calls)
+    # Unpaginated listings get large: stream them (project/streaming.py)
+    return stream_page(
         'index.html',
-        vendors=vendors,
-        artworks=artworks,
-        categories=categories,
+        vendors=page['vendors'],
+        artworks=page['artworks'],
+        categories=page['categories'],
+        facets=page.get('facets'),
+        price_buckets=price_buckets(),
         active_category=category_id,
         filters={
             'sort': sort,
@@ -97,6 +127,42 @@ def index():
         has_active_filters=has_active_filters
     )
 
+# Uploaded images, by content hash (project/images.py). Names never change
+# meaning, so they are cached for a year; send_file handles Range requests
+# and uses the server's sendfile when it offers one.
+@bp.route('/media/<name>')
+@lane(None)   # no database work: never shed
+def media(name):
+    path = media_path(name)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+    digest, ext = name.split('.')
+    response = send_file(path, mimetype=MIME_TYPES[ext], conditional=True, etag=digest,
+                         max_age=365 * 24 * 3600)
+    response.cache_control.immutable = True
+    return response
+
+# Search box typeahead, answered from the in-process index (project/suggest.py)
+SUGGEST_ENDPOINTS = {
+    'artwork':  ('main.item_details', 'artwork_id'),
+    'vendor':   ('main.vendor_gallery', 'vendor_id'),
+    'category': ('main.category_items', 'category_id'),
+}
+
+@bp.route('/search/suggest')
+def search_suggest():
+    q = request.args.get('q', default='')[:100]
+    limit = max(1, min(request.args.get('limit', default=8, type=int), 20))
+    suggestions = []
+    for s in suggest(q, limit):
+        endpoint, arg = SUGGEST_ENDPOINTS[s.kind]
+        suggestions.append({'label': s.label, 'type': s.kind, 'url': url_for(endpoint, **{arg: s.id})})
+    response = jsonify(query=q, suggestions=suggestions)
+    response.cache_control.public = True
+    response.cache_control.max_age = 30
+    return response
+
+
 # Category listing
 @bp.route('/category/<int:category_id>/')
 def category_items(category_id):
@@ -117,14 +183,16 @@ def category_items(category_id):
 
 # Item details (with AddToCart)
 @bp.route('/item/<int:artwork_id>/', methods=['GET', 'POST'])
+@rate_limit('cart', '60/minute', by='user', methods=('POST',))
 def item_details(artwork_id):
     item = get_artwork(artwork_id)
     if not item:
         flash("Item not found", "warning")
         return redirect(url_for('main.index'))
     
-    vendor = get_vendor(item.vendor_id)
+    vendor = get_vendor(item.vendor_id, with_bio=False)  # only linked to, bio not shown
     category = get_category(item.category_id) if item.category_id else None
+    similar = similar_artworks(artwork_id)  # precomputed by the refresh_similar job
     
     default_postcode = None
     u = session.get('user') or {}
@@ -165,7 +233,7 @@ def item_details(artwork_id):
             flash('Please correct the errors highlighted below.', 'error')
 
     return render_template('item_details.html', item=item, vendor=vendor, category=category, 
-                           form=form, default_postcode=default_postcode)
+                           form=form, default_postcode=default_postcode, similar=similar)
 
 
 #  Vendor gallery (public profile + items)
@@ -195,25 +263,34 @@ def vendor_manage():
     user = session.get('user') or {}
     vendor_id = int(user.get('id'))
 
-    vendor = get_vendor(vendor_id)
-    categories = get_categories() or []
-    items = get_vendor_items(vendor_id)  # keep unfiltered for management
-    form = ArtworkForm()
+    # Independent queries: run them side by side on separate connections
+    page = run_parallel({
+        'vendor': partial(get_vendor, vendor_id, with_bio=False),
+        'categories': get_categories,
+        'items': partial(get_vendor_items, vendor_id),  # keep unfiltered for management
+        'kpi': partial(generate_kpi, vendor_id),
+    })
+    vendor = page['vendor']
+    categories = page['categories'] or []
+    items = page['items']
+    form = NewArtworkForm()
 
     # Populate select choices (no blank option)
     form.vendor_id.choices = [(vendor_id, "Me")]
     form.category_id.choices = [(c.category_id, c.categoryName) for c in categories]
 
+    # A successful POST redirects, so items/kpi above are always current when rendered
     if request.method == 'POST' and form.validate_on_submit():
-        add_artwork_from_form(form)
-        flash('Artwork published.')
-        return redirect(url_for('main.vendor_manage'))
-
-    # Refresh items if POST modified anything (safe even on GET)
-    items = get_vendor_items(vendor_id)
+        try:
+            add_artwork_from_form(form, save_upload(form.imageLink.data))
+        except ImageError as e:
+            form.imageLink.errors.append(str(e))
+        else:
+            flash('Artwork published.')
+            return redirect(url_for('main.vendor_manage'))
 
     # Always compute KPI and pass it to the template
-    kpi = generate_kpi(vendor_id) or {
+    kpi = page['kpi'] or {
         "revenue": 0, "items_leased": 0,
         "inventory_total": 0, "inventory_active": 0,
         "orders_count": 0
@@ -228,6 +305,32 @@ def vendor_manage():
         kpi=kpi,                   
     )
 
+@bp.route('/vendor/manage/sales.json', methods=['GET'])
+@only_vendors
+def vendor_sales():
+    # Time series for the dashboard chart, read from the vendor_daily_sales rollup
+    user = session.get('user') or {}
+    vendor_id = int(user.get('id'))
+
+    end = request.args.get('end', type=date.fromisoformat) or date.today()
+    start = request.args.get('start', type=date.fromisoformat) or (end - timedelta(days=89))
+    if start > end:
+        start, end = end, start
+    grain = request.args.get('grain', default='day')
+    if grain not in GRAINS:
+        grain = 'day'
+    if (end - start).days > MAX_SERIES_DAYS[grain]:
+        abort(400, f"At most {MAX_SERIES_DAYS[grain]} days at {grain} grain.")
+    artwork_id = request.args.get('artwork_id', type=int)
+
+    return jsonify({
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'grain': grain,
+        'series': vendor_sales_series(vendor_id, start, end, grain, artwork_id),
+        'artworks': vendor_artwork_breakdown(vendor_id, start, end),
+    })
+
 # Cart
 @bp.route('/cart/', methods=['GET'])
 @only_guests_or_customers
@@ -258,6 +361,7 @@ def cart():
 
 @bp.post('/cart/add/<int:artwork_id>/')
 @only_guests_or_customers
+@rate_limit('cart', '60/minute', by='user')
 def cart_add(artwork_id):
     qty   = request.form.get('quantity', type=int) or 1
     weeks = request.form.get('weeks', type=int) or 1
@@ -278,6 +382,7 @@ def cart_clear():
 
 @bp.post('/cart/update/<int:item_id>/')
 @only_guests_or_customers
+@rate_limit('cart', '60/minute', by='user')
 def cart_update(item_id):
     # Optional helper for safe "next" redirects
     def _next_url(default):
@@ -335,6 +440,7 @@ def cart_remove(item_id):
 # Checkout
 @bp.route('/checkout/', methods=['GET', 'POST'])
 @only_customers
+@lane('priority')  # keeps its connections when other traffic is shed
 def checkout():
     form = CheckoutForm()
     cart = get_cart()
@@ -383,43 +489,47 @@ def checkout():
                           ', '.join(missing[:-1]) + f' and {missing[-1]}.', 'error')
                 return render_template('checkout.html', form=form, cart=cart)
 
-            # 4) Create/dedup addresses
-            deliv_id = ensure_address(
-                (form.del_streetNumber.data or '').strip(),
-                (form.del_streetName.data   or '').strip(),
-                (form.del_city.data         or '').strip(),
-                (form.del_state.data        or '').strip(),
-                (form.del_postcode.data     or '').strip(),
-                (form.del_country.data      or 'Australia').strip(),
-            )
-            same_as_delivery = (
-                (form.bill_streetNumber.data or '').strip().lower() == (form.del_streetNumber.data or '').strip().lower() and
-                (form.bill_streetName.data   or '').strip().lower() == (form.del_streetName.data   or '').strip().lower() and
-                (form.bill_city.data         or '').strip().lower() == (form.del_city.data         or '').strip().lower() and
-                (form.bill_state.data        or '').strip().lower() == (form.del_state.data        or '').strip().lower() and
-                (form.bill_postcode.data     or '').strip().lower() == (form.del_postcode.data     or '').strip().lower() and
-                ((form.bill_country.data or 'Australia').strip().lower() ==
-                 (form.del_country.data  or 'Australia').strip().lower())
-            )
-            bill_id = deliv_id if same_as_delivery else ensure_address(
-                (form.bill_streetNumber.data or '').strip(),
-                (form.bill_streetName.data   or '').strip(),
-                (form.bill_city.data         or '').strip(),
-                (form.bill_state.data        or '').strip(),
-                (form.bill_postcode.data     or '').strip(),
-                (form.bill_country.data      or 'Australia').strip(),
-            )
-
-            # 5) Build and persist order
-            order = convert_cart_to_order(cart)
-            user  = session.get('user') or {}
-            cust_id = int(user.get('id') or user.get('customer_id'))
-            if not getattr(order, 'customer_id', None):
-                order.customer_id = cust_id
-            order.deliveryAddressID = deliv_id
-            order.billingAddressID  = bill_id
-
-            add_order(order)
+            # 4-5) Addresses, order and its follow-up job commit together, once
+            with transaction():
+                # 4) Create/dedup addresses
+                deliv_id = ensure_address(
+                    (form.del_streetNumber.data or '').strip(),
+                    (form.del_streetName.data   or '').strip(),
+                    (form.del_city.data         or '').strip(),
+                    (form.del_state.data        or '').strip(),
+                    (form.del_postcode.data     or '').strip(),
+                    (form.del_country.data      or 'Australia').strip(),
+                )
+                same_as_delivery = (
+                    (form.bill_streetNumber.data or '').strip().lower() == (form.del_streetNumber.data or '').strip().lower() and
+                    (form.bill_streetName.data   or '').strip().lower() == (form.del_streetName.data   or '').strip().lower() and
+                    (form.bill_city.data         or '').strip().lower() == (form.del_city.data         or '').strip().lower() and
+                    (form.bill_state.data        or '').strip().lower() == (form.del_state.data        or '').strip().lower() and
+                    (form.bill_postcode.data     or '').strip().lower() == (form.del_postcode.data     or '').strip().lower() and
+                    ((form.bill_country.data or 'Australia').strip().lower() ==
+                     (form.del_country.data  or 'Australia').strip().lower())
+                )
+                bill_id = deliv_id if same_as_delivery else ensure_address(
+                    (form.bill_streetNumber.data or '').strip(),
+                    (form.bill_streetName.data   or '').strip(),
+                    (form.bill_city.data         or '').strip(),
+                    (form.bill_state.data        or '').strip(),
+                    (form.bill_postcode.data     or '').strip(),
+                    (form.bill_country.data      or 'Australia').strip(),
+                )
+
+                # 5) Build and persist order
+                order = convert_cart_to_order(cart)
+                user  = session.get('user') or {}
+                cust_id = int(user.get('id') or user.get('customer_id'))
+                if not getattr(order, 'customer_id', None):
+                    order.customer_id = cust_id
+                order.deliveryAddressID = deliv_id
+                order.billingAddressID  = bill_id
+
+                order_id = add_order(order)
+                # Follow-up work (rollups, emails, ...) runs in worker.py
+                enqueue('order_placed', {'order_id': order_id}, key=f'order_placed:{order_id}')
             empty_cart()
             flash('Thank you! Your order is being processed.', 'success')
             return redirect(url_for('main.index'))
@@ -466,6 +576,7 @@ def checkout():
 # Authentication
 @bp.route('/register/', methods=['GET', 'POST'])
 @only_guests
+@rate_limit('register', '5/minute', methods=('POST',))
 def register():
     form = RegisterForm()
 
@@ -519,14 +630,22 @@ def register():
             # Re-render the same page
             return render_template('register.html', form=form)
 
+        picture = None
+        if role == 'vendor' and form.profilePictureLink.data:
+            try:
+                picture = save_upload(form.profilePictureLink.data)
+            except ImageError as e:
+                form.profilePictureLink.errors.append(str(e))
+                return render_template('register.html', form=form)
+
         # Create the account (address + customer/vendor; never admins)
         try:
-            register_account(form)
+            register_account(form, picture)
         except Exception as e:
-            # Catch MySQL duplicate key
+            # Catch duplicate keys (MySQL 1062, SQLite "UNIQUE constraint failed: customers.email")
             msg = str(e)
             code = getattr(e, "args", [None])[0]
-            if ("Duplicate entry" in msg) or (code == 1062):
+            if ("Duplicate entry" in msg) or (code == 1062) or ("UNIQUE constraint failed" in msg):
                 if "email" in msg:
                     form.email.errors.append("That email is already registered. Please use another email or log in.")
                 if "phone" in msg:
@@ -547,6 +666,7 @@ def register():
 
 @bp.route('/login/', methods=['GET', 'POST'])
 @only_guests
+@rate_limit('login', '10/minute', methods=('POST',))
 def login():
     form = LoginForm()
     if request.method == 'POST' and form.validate_on_submit():
@@ -595,9 +715,10 @@ def logout():
 def manage():
     #Admin: list all orders and order items
     oid = request.args.get('order_id', type=int)
+    archived = request.args.get('archived', type=int) == 1
 
-    orders = admin_get_orders(oid)
-    order_items = admin_get_order_items(oid)
+    orders = admin_get_orders(oid, archived=archived)
+    order_items = admin_get_order_items(oid, archived=archived)
 
     # Status choices
     try:
@@ -606,15 +727,65 @@ def manage():
     except Exception:
         statuses = admin_get_order_statuses()
 
-    return render_template(
+    return stream_page(
         'manage.html',
         orders=orders,
         order_items=order_items,
         statuses=statuses,
-        filter_order_id=oid
+        filter_order_id=oid,
+        archived=archived
     )
 
 
+@bp.route('/manage/reports/', methods=['GET'])
+@only_admins
+@lane('bulk')
+def manage_reports():
+    # Admin: platform-wide revenue by category, month and vendor
+    return render_template('reports.html', report=revenue_report(*_report_range()))
+
+
+@bp.route('/manage/reports.json', methods=['GET'])
+@only_admins
+@lane('bulk')
+def manage_reports_json():
+    return jsonify(revenue_report(*_report_range()))
+
+
+def _report_range():
+    # Optional ?start= / ?end= (YYYY-MM-DD); either may be left open
+    start = request.args.get('start', type=date.fromisoformat)
+    end = request.args.get('end', type=date.fromisoformat)
+    if start and end and start > end:
+        abort(400, "The report start date is after its end date.")
+    return start, end
+
+
+@bp.route('/manage/statements.json', methods=['GET'])
+@only_admins
+def manage_statements_json():
+    # Executions and latency per registered SQL statement, this worker only
+    return jsonify(pid=os.getpid(), statements=statement_stats())
+
+
+@bp.route('/manage/profile-token', methods=['GET'])
+@only_admins
+def manage_profile_token():
+    # Send as X-Profile (or ?_profile=) to profile a request (project/profiling.py)
+    return jsonify(token=make_profile_token(), header=PROFILE_HEADER,
+                   expires_in=current_app.config['PROFILE_TOKEN_MAX_AGE'])
+
+
+@bp.route('/manage/memory.json', methods=['GET'])
+@only_admins
+def manage_memory_json():
+    # Per-endpoint allocation stats for this worker (MEMTRACK_ENABLED, project/memtrack.py)
+    tracker = current_app.extensions.get('memtrack')
+    if tracker is None:
+        return jsonify(enabled=False)
+    return jsonify(enabled=True, **tracker.report())
+
+
 @bp.route('/manage/update/', methods=['POST'])
 @only_admins
 def manage_update():
@@ -650,6 +821,10 @@ def manage_update():
 
     else:
         flash("Unknown entity.", "warning")
+        return redirect(url_for('main.manage', order_id=request.form.get('persist_order_filter', type=int)))
+
+    # Status/date/line edits change vendor sales; rebuild the rollup off-request
+    enqueue('refresh_sales_rollup')
 
     return redirect(url_for('main.manage', order_id=request.form.get('persist_order_filter', type=int)))
 
@@ -697,7 +872,6 @@ def vendor_edit_artwork(artwork_id):
         form.title.data               = row['title']
         form.itemDescription.data     = row['itemDescription']
         form.pricePerWeek.data        = row['pricePerWeek']
-        form.imageLink.data           = row['imageLink']
         form.availabilityStartDate.data = row['availabilityStartDate']  # should be date or None
         form.availabilityEndDate.data   = row['availabilityEndDate']
         form.maxQuantity.data         = row['maxQuantity']
@@ -706,8 +880,14 @@ def vendor_edit_artwork(artwork_id):
 
     # POST
     if form.validate_on_submit():
-        update_artwork_from_form(form, artwork_id, vendor_id)
-        flash('Artwork updated!', 'success')
-        return redirect(url_for('main.vendor_manage'))
+        try:
+            # No new file keeps the current image
+            image_link = save_upload(form.imageLink.data) if form.imageLink.data else None
+        except ImageError as e:
+            form.imageLink.errors.append(str(e))
+        else:
+            update_artwork_from_form(form, artwork_id, vendor_id, image_link)
+            flash('Artwork updated!', 'success')
+            return redirect(url_for('main.vendor_manage'))
 
     return render_template('edit_artwork.html', form=form, artwork=row, categories=cats)
\ No newline at end of file
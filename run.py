@@ -1,6 +1,6 @@
 from project import create_app
 
 if __name__ == '__main__':
+    # Development server only; see gunicorn.conf.py for production
     app = create_app()
-    app.run(debug = True, port=8888)
-    
\ No newline at end of file
+    app.run(debug=app.config['DEBUG'], port=8888)
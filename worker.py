@@ -0,0 +1,40 @@
+import argparse
+import multiprocessing
+import signal
+
+from project import create_app
+from project.jobs import work
+
+
+def _run(poll: float, once: bool):
+    stop = {'flag': False}
+
+    def _stop(signum, frame):
+        stop['flag'] = True
+
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+
+    app = create_app()
+    work(app, poll_interval=poll, once=once, should_stop=lambda: stop['flag'])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run background job workers.')
+    parser.add_argument('--processes', '-p', type=int, default=2, help='number of worker processes')
+    parser.add_argument('--poll', type=float, default=1.0, help='seconds to wait when the queue is empty')
+    parser.add_argument('--once', action='store_true', help='drain the queue and exit')
+    args = parser.parse_args()
+
+    procs = [multiprocessing.Process(target=_run, args=(args.poll, args.once), name=f'worker-{i}')
+             for i in range(max(1, args.processes))]
+    for p in procs:
+        p.start()
+    try:
+        for p in procs:
+            p.join()
+    except KeyboardInterrupt:
+        for p in procs:
+            p.terminate()
+        for p in procs:
+            p.join()